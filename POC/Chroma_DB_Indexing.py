@@ -2,7 +2,7 @@ import os
 import uuid
 import fitz
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
+from multi_Agents.model_registry import encode
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from pinecone import Pinecone, ServerlessSpec
 
@@ -31,9 +31,6 @@ if PINECONE_INDEX_NAME not in [i.name for i in pc.list_indexes()]:
 
 index = pc.Index(PINECONE_INDEX_NAME)
 
-# ---------- Embedding Model ----------
-embedder = SentenceTransformer(EMBED_MODEL)
-
 # ---------- Chunking Utility ----------
 text_splitter = RecursiveCharacterTextSplitter(
     chunk_size=CHUNK_SIZE,
@@ -52,8 +49,11 @@ def index_pdf_file(pdf_path, metadata):
     chunks = text_splitter.split_text(text)
     base_id = os.path.splitext(os.path.basename(pdf_path))[0]
 
+    # One batched encode for the whole file instead of one call per chunk
+    embeddings = encode(chunks, model_name=EMBED_MODEL) if chunks else []
+
     vectors = []
-    for i, chunk in enumerate(chunks):
+    for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
         chunk_id = f"{base_id}_chunk_{i}_{uuid.uuid4().hex[:6]}"
         enriched_meta = {
             **metadata,
@@ -61,10 +61,9 @@ def index_pdf_file(pdf_path, metadata):
             "source": os.path.basename(pdf_path),
             "text": chunk  # ✅ Needed by retriever to display content
         }
-        embedding = embedder.encode(chunk).tolist()
         vectors.append({
             "id": chunk_id,
-            "values": embedding,
+            "values": embedding.tolist(),
             "metadata": enriched_meta
         })
 
@@ -2,7 +2,7 @@ import os
 from dotenv import load_dotenv
 from typing import List
 from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer
+from multi_Agents.model_registry import encode
 from langchain.schema import Document
 from langchain.chat_models import ChatOpenAI
 from langchain.chains import RetrievalQA
@@ -18,9 +18,6 @@ PINECONE_INDEX_NAME = "college-recommendations"
 EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
 OPENAI_MODEL = "gpt-4o"  # or "gpt-4o-mini", "gpt-3.5-turbo"
 
-# --- Initialize Embedding Model ---
-embedder = SentenceTransformer(EMBED_MODEL_NAME)
-
 # --- Initialize Pinecone Client ---
 pc = Pinecone(api_key=PINECONE_API_KEY)
 index = pc.Index(PINECONE_INDEX_NAME)
@@ -33,7 +30,7 @@ class PineconeLangChainRetriever(BaseRetriever):
         self._top_k = top_k
 
     def get_relevant_documents(self, query: str) -> List[Document]:
-        query_embedding = embedder.encode(query).tolist()
+        query_embedding = encode(query, model_name=EMBED_MODEL_NAME).tolist()
         result = self._index.query(
             vector=query_embedding,
             top_k=self._top_k,
@@ -4,7 +4,7 @@ import re
 from dotenv import load_dotenv
 from typing import List
 from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer
+from multi_Agents.model_registry import encode
 from langchain.schema import Document
 from openai import OpenAI
 
@@ -16,7 +16,6 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
 
 
-embedder = SentenceTransformer(EMBED_MODEL_NAME)
 pc = Pinecone(api_key=PINECONE_API_KEY)
 index = pc.Index(PINECONE_INDEX_NAME)
 openai_client = OpenAI(api_key=OPENAI_API_KEY)
@@ -101,7 +100,7 @@ class PineconeRetriever:
         }
 
     def get_relevant_documents(self, query: str) -> List[Document]:
-        embedding = embedder.encode(query).tolist()
+        embedding = encode(query, model_name=EMBED_MODEL_NAME).tolist()
         college = extract_college_name(query, self.known_colleges, self.alias_map)
 
         if college:
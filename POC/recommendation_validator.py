@@ -2,7 +2,6 @@ from dotenv import load_dotenv
 from recommendation_snowflake import search_and_filter, generate_recommendation
 from RecommenderRAG_2 import PineconeRetriever, GPT4Recommender, CourseRecommenderAgent
 from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer
 from openai import OpenAI
 import os
 
@@ -14,7 +13,6 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
 
 # ---------- Setup ----------
-embedder = SentenceTransformer(EMBED_MODEL_NAME)
 pc = Pinecone(api_key=PINECONE_API_KEY)
 index = pc.Index(PINECONE_INDEX_NAME)
 openai_client = OpenAI(api_key=OPENAI_API_KEY)
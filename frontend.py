@@ -218,6 +218,43 @@ def get_downloadable_content(result):
     buffer.seek(0)
     return buffer.getvalue()
 
+def stream_events(path, payload):
+    """POST to a streaming endpoint and yield (event, data) pairs from its SSE body"""
+    with requests.post(f"{BACKEND_URL}/{path}", json=payload, stream=True, timeout=120) as response:
+        response.raise_for_status()
+        event = "message"
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                yield event, json.loads(line[len("data:"):].strip())
+
+def render_stream(path, payload, label):
+    """Show progress and validator tokens as they arrive; returns the final result dict"""
+    result = None
+    with st.chat_message("assistant"):
+        status = st.status(label, expanded=False)
+        placeholder = st.empty()
+        text = ""
+        for event, data in stream_events(path, payload):
+            if event == "progress":
+                status.write(data.get("message", data.get("node", "")))
+                if data.get("snowflake_results"):
+                    status.write(f"Found {len(data['snowflake_results'])} matching colleges")
+                if data.get("rag_results"):
+                    status.write(f"Found {len(data['rag_results'])} course document matches")
+            elif event == "token":
+                text += data["text"]
+                placeholder.markdown(text + "▌")
+            elif event == "result":
+                result = data
+            elif event == "error":
+                raise RuntimeError(data.get("detail", "Streaming failed"))
+        status.update(label="Done", state="complete")
+    if result is None:
+        raise RuntimeError("Stream ended before a result was received")
+    return result
+
 def display_pure_response(result):
     """Improved version to properly display web search results"""
     if not result:
@@ -472,32 +509,32 @@ def college_recommender_page():
         # Add user message
         st.session_state.messages.append({"role": "user", "content": prompt})
         
-        with st.spinner("Researching colleges..."):
-            try:
-                # Get backend response
-                response = requests.post(
-                    f"{BACKEND_URL}/recommend",
-                    json={
-                        "prompt": prompt,
-                        "session_id": st.session_state.session_id
-                    },
-                    timeout=120
-                )
-                result = response.json()
-                
-                # Add assistant response
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": display_pure_response(result),
-                    "result": result
-                })
-                
-                st.rerun()
-                
-            except requests.Timeout:
-                st.error("Request timed out. Please try again.")
-            except Exception as e:
-                st.error(f"Error getting recommendations: {str(e)}")
+        with st.chat_message("user"):
+            st.write(prompt)
+        try:
+            # Stream progress and the validator's answer as it is generated
+            result = render_stream(
+                "recommend/stream",
+                {
+                    "prompt": prompt,
+                    "session_id": st.session_state.session_id
+                },
+                "Researching colleges..."
+            )
+
+            # Add assistant response
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": display_pure_response(result),
+                "result": result
+            })
+            
+            st.rerun()
+            
+        except requests.Timeout:
+            st.error("Request timed out. Please try again.")
+        except Exception as e:
+            st.error(f"Error getting recommendations: {str(e)}")
 
 def college_comparator_page():
     st.markdown("""
@@ -656,29 +693,30 @@ def college_comparator_page():
     if prompt := st.chat_input("Example: 'Compare MIT and Stanford for computer science'"):
         st.session_state.messages.append({"role": "user", "content": prompt})
         
-        with st.spinner("Analyzing comparison..."):
-            try:
-                response = requests.post(
-                    f"{BACKEND_URL}/compare",
-                    json={
-                        "prompt": prompt,
-                        "session_id": st.session_state.session_id
-                    }
-                )
-                result = response.json()
-                
-                # Format the assistant response
-                assistant_response = result.get("response", "No comparison results available")
-                
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": assistant_response,
-                    "result": result
-                })
-                
-                st.rerun()
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
+        with st.chat_message("user"):
+            st.write(prompt)
+        try:
+            result = render_stream(
+                "compare/stream",
+                {
+                    "prompt": prompt,
+                    "session_id": st.session_state.session_id
+                },
+                "Analyzing comparison..."
+            )
+
+            # Format the assistant response
+            assistant_response = result.get("response", "No comparison results available")
+            
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": assistant_response,
+                "result": result
+            })
+            
+            st.rerun()
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
 
 def university_rankings_page():
     st.markdown("""
@@ -694,6 +732,7 @@ def university_rankings_page():
     with col1:
         st.title("University Rankings")
         st.markdown("Ask about QS World University Rankings")
+        include_context = st.checkbox("Add background context", value=False, key="ranking_include_context")
     with col2:
         if st.button("← Back to Home"):
             st.session_state.current_page = "home"
@@ -726,7 +765,7 @@ def university_rankings_page():
                 # Call the backend endpoint
                 response = requests.post(
                     f"{BACKEND_URL}/university_rankings",
-                    json={"question": prompt}
+                    json={"question": prompt, "include_context": include_context}
                 )
                 result = response.json()
                 
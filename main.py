@@ -1,35 +1,67 @@
 # main.py (FastAPI backend)
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional
-import uuid
+from fastapi import FastAPI, HTTPException, Depends, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime, timezone 
 from multi_Agents.multi_agent import app as langgraph_app  # Your existing LangGraph workflow
+from multi_Agents.multi_agent import initial_state as initial_recommend_state
+from multi_Agents.gate_agent import new_history
 from multi_Agents.multiagent_compare import app as comparison_workflow
 from fastapi import BackgroundTasks
 import subprocess
 import asyncio
+import json
 from agents import Agent, Runner
-from agents.mcp import MCPServerStdio
-from openai import OpenAI
+from mcp_pool import rankings_pool, MCPPoolTimeoutError
+from rankings_store import get_store as get_rankings_store
+from ranking_parser import answer_ranking_question
+from ranking_router import ranking_router, rankings_context
 import os
+import secrets
 from dotenv import load_dotenv
 from multi_Agents.app_deadline import process_deadline_query
+from multi_Agents.snowflake_pool import get_pool as get_snowflake_pool
+from multi_Agents.college_snapshot import get_snapshot, SNAPSHOT_ENABLED
+from multi_Agents import model_registry
+from multi_Agents.embedding_batcher import batcher_stats
+from multi_Agents.embedding_cache import embedding_cache
+from multi_Agents import semantic_cache
+from multi_Agents.llm_client import llm_client
+from multi_Agents.batch_runner import run_batch, BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY
+from multi_Agents.backend_limits import limit_stats
+from session_store import session_store, run_sweeper
+from newintent.safety_prefilter import safety_prefilter
+from multi_Agents.college_documents import get_document_store, COLLEGE_DOCS_ENABLED
+from multi_Agents.vector_store import VECTOR_STORE_BACKEND
+from multi_Agents.hybrid_retrieval import hybrid_retrieval, HYBRID_RETRIEVAL_ENABLED
 
 load_dotenv()
 app = FastAPI()
 
-# Session management in memory (replace with DB in production)
-sessions = {}
+# /admin/* endpoints (cache flushes, data refreshes) need this token in the
+# X-Admin-Token header; without ADMIN_TOKEN set they are switched off
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
-class UserSession(BaseModel):
-    session_id: str
-    history: list = []
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
 
 class RecommendationRequest(BaseModel):
     prompt: str
     session_id: Optional[str] = None
 
+class BatchItem(BaseModel):
+    prompt: str
+    id: Optional[str] = None
+
+class BatchRecommendationRequest(BaseModel):
+    items: List[BatchItem]
+    concurrency: int = Field(BATCH_CONCURRENCY, ge=1, le=BATCH_MAX_CONCURRENCY)
+
 class ComparisonResponse(BaseModel):
     success: bool
     is_comparison: bool
@@ -39,39 +71,117 @@ class ComparisonResponse(BaseModel):
     fallback_used: bool
     fallback_message: Optional[str] = None
 
+async def remember_result(cache: semantic_cache.SemanticCache, prompt: str, result: dict):
+    # Only completed answers are reused; early exits (safety, off-topic) always rerun
+    if (semantic_cache.RESPONSE_CACHE_ENABLED and result.get("final_output") and not result.get("early_response")
+            and not result.get("cache_hit")):
+        try:
+            await cache.store(prompt, {
+                "final_output": result["final_output"],
+                "fallback_used": result.get("fallback_used", False),
+                "is_college_related": result.get("is_college_related", False),
+            })
+        except Exception as e:
+            print(f"⚠️ Response cache store failed: {e}")
+
+async def invoke_with_cache(cache: semantic_cache.SemanticCache, workflow, state: dict) -> dict:
+    """
+    Run the workflow with `cache` in its config: its cache node (after the
+    gatekeeper) serves paraphrases of earlier prompts, and fresh answers are stored.
+    """
+    result = await workflow.ainvoke(state, config={"configurable": {"response_cache": cache}})
+    await remember_result(cache, state["user_query"], result)
+    return result
+
+# ---------- Streaming (SSE) ----------
+NODE_PROGRESS = {
+    "detect_comparison": "Checked request type",
+    "gatekeeper": "Safety and relevance check done",
+    "cache": "Checked for a cached answer",
+    "combined_agent": "Searched college data and course documents",
+    "check_results": "Checked results",
+    "web": "Searched the web",
+    "compile": "Compiled results",
+}
+# State fields forwarded in progress events (the merged text arrives as tokens)
+STREAMED_FIELDS = (
+    "is_college_related", "safety_check_passed", "early_response",
+    "is_comparison", "colleges_to_compare", "comparison_aspects",
+    "snowflake_results", "rag_results", "web_results", "fallback_used", "fallback_message",
+)
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def stream_workflow(cache: semantic_cache.SemanticCache, workflow, state: dict, finish):
+    """
+    Run `workflow` with astream and yield SSE events: `progress` per node
+    update, `token` for each delta of the final validator LLM call, then one
+    `result` holding finish(final_state) (the same body as the JSON endpoint).
+    """
+    prompt = state["user_query"]
+    events: asyncio.Queue = asyncio.Queue()
+    config = {"configurable": {
+        "token_sink": lambda text: events.put_nowait(("token", {"text": text})),
+        "response_cache": cache,
+    }}
+
+    async def run():
+        final_state = dict(state)
+        try:
+            async for update in workflow.astream(state, config=config, stream_mode="updates"):
+                for node, delta in update.items():
+                    if not isinstance(delta, dict):
+                        continue
+                    final_state.update(delta)
+                    progress = {"node": node, "message": NODE_PROGRESS.get(node, node)}
+                    progress.update({k: delta[k] for k in STREAMED_FIELDS if k in delta})
+                    events.put_nowait(("progress", progress))
+            await remember_result(cache, prompt, final_state)
+            result = finish(final_state)
+            events.put_nowait(("result", {**result, "cached": True} if final_state.get("cache_hit") else result))
+        except Exception as e:
+            events.put_nowait(("error", {"detail": f"Workflow execution failed: {str(e)}"}))
+        finally:
+            events.put_nowait(None)
+
+    task = asyncio.create_task(run())
+    try:
+        while (item := await events.get()) is not None:
+            yield sse_event(*item)
+    finally:
+        # Client went away mid-stream
+        if not task.done():
+            task.cancel()
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.post("/create_session")
 async def create_session():
-    session_id = str(uuid.uuid4())
-    sessions[session_id] = UserSession(session_id=session_id)
+    session_id = session_store.create()
     return {"session_id": session_id}
 
-@app.post("/recommend")
-async def get_recommendations(request: RecommendationRequest):
-    # Validate session
-    if request.session_id and request.session_id not in sessions:
+def gate_history(session_id: Optional[str]):
+    """The session's own gatekeeper ring buffer; requests without a session start empty."""
+    history = session_store.context(session_id, new_history) if session_id else None
+    return new_history() if history is None else history
+
+@app.get("/session/{session_id}/history")
+async def session_history(session_id: str, limit: Optional[int] = None):
+    history = session_store.history(session_id, limit=limit)
+    if history is None:
         raise HTTPException(status_code=404, detail="Session not found")
+    return {"session_id": session_id, "history": history}
 
-    # Prepare initial state for LangGraph
-    langgraph_state = {
-        "user_query": request.prompt,
-        "combined_agent_results": None,
-        "snowflake_results": [],
-        "rag_results": [],
-        "web_results": [],
-        "final_output": None,
-        "is_college_related": False,
-        "safety_check_passed": False,
-        "early_response": None,
-        "fallback_used": False,
-        "fallback_message": None
-    }
+@app.delete("/session/{session_id}")
+async def delete_session(session_id: str):
+    if not session_store.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"success": True}
 
-    # Execute the workflow
-    try:
-        result = await langgraph_app.ainvoke(langgraph_state)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Workflow execution failed: {str(e)}")
-    
+def build_recommend_response(request: RecommendationRequest, result: dict) -> dict:
     # Build unified response
     response = {
         "success": True,
@@ -126,44 +236,84 @@ async def get_recommendations(request: RecommendationRequest):
 
     # Store in session if available
     if request.session_id:
-        sessions[request.session_id].history.append({
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "prompt": request.prompt,
-            "response": response,
-            "workflow_metadata": {
+        session_store.append(
+            request.session_id,
+            request.prompt,
+            jsonable_encoder(response),
+            metadata={
                 "fallback_used": result.get("fallback_used", False),
                 "is_college_related": result.get("is_college_related", False)
-            }
-        })
+            },
+            timestamp=datetime.now(timezone.utc).isoformat()
+        )
 
     return response
 
-@app.post("/compare")
-async def compare_colleges(request: RecommendationRequest):
-    """Dedicated endpoint for college comparisons"""
+@app.post("/recommend")
+async def get_recommendations(request: RecommendationRequest):
     # Validate session
-    if request.session_id and request.session_id not in sessions:
+    if request.session_id and not session_store.exists(request.session_id):
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # Prepare initial state for comparison workflow
-    initial_state = {
-    "user_query": request.prompt,
-    "is_college_related": None,
-    "safety_check_passed": None,
-    "is_comparison": None,
-    "colleges_to_compare": [],
-    "comparison_aspects": [],
-    "combined_results": None,  # Changed from snowflake_results
-    "web_results": [],
-    "final_output": None,
-    "early_response": None,
-    "fallback_used": False,
-    "fallback_message": None
-}
+    # Execute the workflow
+    try:
+        result = await invoke_with_cache(
+            semantic_cache.recommend_cache, langgraph_app, initial_recommend_state(request.prompt, gate_history(request.session_id))
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Workflow execution failed: {str(e)}")
 
-    # Execute the comparison workflow
-    result = await comparison_workflow.ainvoke(initial_state)
-    
+    return build_recommend_response(request, result)
+
+@app.post("/recommend/stream")
+async def stream_recommendations(request: RecommendationRequest):
+    """/recommend as Server-Sent Events: node progress, validator tokens, then the full result."""
+    if request.session_id and not session_store.exists(request.session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    return sse_response(stream_workflow(
+        semantic_cache.recommend_cache, langgraph_app, initial_recommend_state(request.prompt, gate_history(request.session_id)),
+        lambda result: build_recommend_response(request, result)
+    ))
+
+@app.post("/recommend/batch")
+async def batch_recommendations(request: BatchRecommendationRequest):
+    """
+    Bulk /recommend for evaluation and import jobs. Streams one JSON line per
+    item ({"id", "prompt", "result", "error"}) in completion order; duplicate
+    prompts are answered once.
+    """
+    items = [(item.id or str(i), item.prompt) for i, item in enumerate(request.items)]
+
+    async def run_one(prompt: str) -> dict:
+        result = await invoke_with_cache(semantic_cache.recommend_cache, langgraph_app, initial_recommend_state(prompt))
+        return build_recommend_response(RecommendationRequest(prompt=prompt), result)
+
+    async def lines():
+        async for record in run_batch(items, run_one, concurrency=request.concurrency):
+            yield json.dumps(jsonable_encoder(record)) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def initial_compare_state(prompt: str, history=None) -> dict:
+    return {
+        "user_query": prompt,
+        "is_college_related": None,
+        "safety_check_passed": None,
+        "is_comparison": None,
+        "colleges_to_compare": [],
+        "comparison_aspects": [],
+        "combined_results": None,  # Changed from snowflake_results
+        "web_results": [],
+        "final_output": None,
+        "early_response": None,
+        "fallback_used": False,
+        "fallback_message": None,
+        "cache_hit": False,
+        "conversation_history": new_history() if history is None else history
+    }
+
+def build_compare_response(request: RecommendationRequest, result: dict) -> ComparisonResponse:
     # Handle early exit responses
     if result.get("early_response"):
         return ComparisonResponse(
@@ -191,17 +341,43 @@ async def compare_colleges(request: RecommendationRequest):
 
     # Store in session if available
     if request.session_id:
-        sessions[request.session_id].history.append({
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "prompt": request.prompt,
-            "response": response.dict()
-        })
+        session_store.append(
+            request.session_id,
+            request.prompt,
+            response.dict(),
+            timestamp=datetime.now(timezone.utc).isoformat()
+        )
 
     return response
 
+@app.post("/compare")
+async def compare_colleges(request: RecommendationRequest):
+    """Dedicated endpoint for college comparisons"""
+    # Validate session
+    if request.session_id and not session_store.exists(request.session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    # Execute the comparison workflow
+    result = await invoke_with_cache(
+        semantic_cache.compare_cache, comparison_workflow, initial_compare_state(request.prompt, gate_history(request.session_id))
+    )
+    return build_compare_response(request, result)
+
+@app.post("/compare/stream")
+async def stream_comparison(request: RecommendationRequest):
+    """/compare as Server-Sent Events: node progress, validator tokens, then the full result."""
+    if request.session_id and not session_store.exists(request.session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    return sse_response(stream_workflow(
+        semantic_cache.compare_cache, comparison_workflow, initial_compare_state(request.prompt, gate_history(request.session_id)),
+        lambda result: build_compare_response(request, result).dict()
+    ))
+
 # Add this model class
 class RankingRequest(BaseModel):
     question: str
+    include_context: bool = False  # opt-in LLM background for the universities in the answer
 
 # Add this endpoint
 @app.post("/university_rankings")
@@ -214,64 +390,63 @@ async def get_university_ranking(request: RankingRequest):
     - "What is MIT's ranking?"
     - "Show top 5 universities"
     """
-    openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
     try:
-        async with MCPServerStdio(
-            name="University Rankings Assistant",
-            params={
-                "command": "python",
-                "args": ["server.py"]  # Your simplified server file
-            }
-        ) as server:
+        # Structured rank / name lookups skip the agent and are answered from the store
+        route, query = await ranking_router.classify(request.question)
+        answer = None
+        if route == "direct":
+            result = await asyncio.to_thread(answer_ranking_question, request.question, get_rankings_store(), query)
+            answer = result["answer"] if result else None
+
+        if answer is None:
+            route = "agent"
+            # Borrow an already-running server.py session instead of spawning one per request
+            async with rankings_pool.session() as server:
+                
+                agent = Agent(
+                    name="University Rankings Expert",
+                    instructions="""You are an expert on QS World University Rankings with one capability:
+                                1. Answer questions about university rankings using get_qs_rankings
+                                
+                                For ranking questions:
+                                - Always verify the university name if provided
+                                - For rank number queries (e.g., "5th"), confirm the exact position
+                                - When showing top universities, always mention it's from QS rankings
+                                - Handle errors gracefully and suggest rephrasing if needed""",
+                    mcp_servers=[server]
+                )
+                
+                # Process the ranking question
+                result = await Runner.run(
+                    starting_agent=agent,
+                    input=f"Answer this question about university rankings: {request.question}"
+                )
+                answer = result.final_output
             
-            agent = Agent(
-                name="University Rankings Expert",
-                instructions="""You are an expert on QS World University Rankings with one capability:
-                            1. Answer questions about university rankings using get_qs_rankings
-                            
-                            For ranking questions:
-                            - Always verify the university name if provided
-                            - For rank number queries (e.g., "5th"), confirm the exact position
-                            - When showing top universities, always mention it's from QS rankings
-                            - Handle errors gracefully and suggest rephrasing if needed""",
-                mcp_servers=[server]
-            )
+        response = {
+            "success": True,
+            "question": request.question,
+            "answer": answer,
+            "route": route,
+            "additional_context": None
+        }
+        
+        # Background context only when asked for (cached per university)
+        if request.include_context:
+            response["additional_context"] = await rankings_context(answer)
             
-            # Process the ranking question
-            result = await Runner.run(
-                starting_agent=agent,
-                input=f"Answer this question about university rankings: {request.question}"
-            )
+        return response
             
-            response = {
-                "success": True,
-                "question": request.question,
-                "answer": result.final_output,
-                "additional_context": None
+    except MCPPoolTimeoutError as e:
+        # The rankings server is still starting (or down); structured lookups above keep working
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "success": False,
+                "error": str(e),
+                "message": "Rankings assistant is not available yet, try again shortly"
             }
-            
-            # Add OpenAI context for follow-up questions
-            if "rank" in result.final_output.lower():
-                gpt_response = openai_client.chat.completions.create(
-                    model="gpt-4-turbo",
-                    messages=[{
-                        "role": "system",
-                        "content": """Provide helpful context about university rankings. 
-                        When mentioning a ranked university:
-                        - Note its historical ranking trends if significant
-                        - Mention 1-2 notable strengths
-                        - Suggest similar-ranked institutions
-                        Keep responses concise and factual."""
-                    }, {
-                        "role": "user",
-                        "content": f"About this university ranking: {result.final_output}"
-                    }]
-                )
-                response["additional_context"] = gpt_response.choices[0].message.content
-                
-            return response
-            
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -308,4 +483,144 @@ async def get_application_deadline(query: DeadlineQuery):
                 "error": str(e),
                 "message": "Failed to process deadline request"
             }
-        )
\ No newline at end of file
+        )
+
+@app.get("/metrics/snowflake_pool")
+async def snowflake_pool_metrics():
+    """Connection pool gauges: size, in-use, waiters, connect latency."""
+    return get_snowflake_pool().metrics()
+
+@app.get("/metrics/embeddings")
+async def embedding_metrics():
+    """Micro-batcher gauges per model and query-embedding cache hit/miss counters."""
+    return {"batchers": batcher_stats(), "cache": embedding_cache.stats()}
+
+@app.get("/metrics/mcp_pool")
+async def mcp_pool_metrics():
+    """Persistent rankings MCP sessions: connected, idle, restarts."""
+    return rankings_pool.metrics()
+
+@app.get("/metrics/sessions")
+async def session_metrics():
+    """Session store size: live sessions, history entries, response blobs and their bytes."""
+    return session_store.stats()
+
+@app.get("/metrics/backends")
+async def backend_metrics():
+    """In-flight and waiting calls per external backend (OpenAI, Pinecone, Snowflake)."""
+    return limit_stats()
+
+@app.get("/metrics/safety")
+async def safety_metrics():
+    """Moderation decisions made locally vs escalated to the LLM, and the decision cache size."""
+    return safety_prefilter.stats()
+
+@app.get("/metrics/retrieval")
+async def retrieval_metrics():
+    """Hybrid course retrieval: BM25 corpus size, candidates fused and chunks kept after reranking."""
+    return hybrid_retrieval.stats()
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    """Token spend, latency and completion-cache hit rate per model."""
+    return llm_client.usage()
+
+@app.get("/metrics/response_cache")
+async def response_cache_metrics():
+    """Semantic response cache hit rate and size per endpoint."""
+    return {
+        "enabled": semantic_cache.RESPONSE_CACHE_ENABLED,
+        "recommend": semantic_cache.recommend_cache.stats(),
+        "compare": semantic_cache.compare_cache.stats(),
+    }
+
+@app.post("/admin/invalidate_response_cache", dependencies=[Depends(require_admin)])
+async def invalidate_response_cache():
+    """Drop cached answers, e.g. after Pinecone or Snowflake data is re-ingested."""
+    semantic_cache.invalidate_all()
+    return {"success": True}
+
+@app.on_event("startup")
+async def warm_college_snapshot():
+    # Load the college table once up front so no request pays for it
+    if SNAPSHOT_ENABLED:
+        try:
+            await asyncio.to_thread(get_snapshot().ensure_loaded)
+        except Exception as e:
+            print(f"⚠️ College snapshot warmup failed, will retry on first request: {e}")
+
+@app.on_event("startup")
+async def warm_embedding_model():
+    # Optional: pay the model load at startup rather than on the first request
+    if os.getenv("EMBEDDING_WARMUP", "true").lower() in ("1", "true", "yes"):
+        await asyncio.to_thread(model_registry.warmup)
+
+@app.on_event("startup")
+async def warm_rankings_store():
+    # Load QS rankings from the local cache file (or fetch once) before the first question
+    try:
+        await asyncio.to_thread(get_rankings_store().ensure_loaded)
+    except Exception as e:
+        print(f"⚠️ QS rankings warmup failed, will retry on first request: {e}")
+
+@app.on_event("startup")
+async def start_mcp_pool():
+    # Spawn the rankings MCP servers in the background; requests reuse them, and the
+    # first one waits for a session rather than boot waiting on a slow server
+    try:
+        await rankings_pool.start()
+    except Exception as e:
+        print(f"⚠️ MCP pool startup failed, sessions will start on first request: {e}")
+
+@app.on_event("startup")
+async def start_session_sweeper():
+    # Idle sessions are dropped in the background so the store stays bounded
+    app.state.session_sweeper = asyncio.create_task(run_sweeper(session_store))
+
+@app.post("/admin/refresh_college_snapshot", dependencies=[Depends(require_admin)])
+async def refresh_college_snapshot():
+    """Explicit refresh hook for after the college table is re-ingested."""
+    await asyncio.to_thread(get_snapshot().refresh)
+    # Cached answers were built from the old table
+    semantic_cache.invalidate_all()
+    snapshot = get_snapshot()
+    return {"success": True, "rows": len(snapshot), "loaded_at": snapshot.loaded_at}
+
+@app.post("/admin/refresh_college_documents", dependencies=[Depends(require_admin)])
+async def refresh_college_documents():
+    """Re-pull catalog/course chunks from Pinecone; call after an ingestion run."""
+    store = get_document_store()
+    await asyncio.to_thread(store.refresh)
+    # Cached comparisons were built from the old documents
+    semantic_cache.invalidate_all()
+    return {"success": True, **store.stats()}
+
+@app.on_event("startup")
+async def warm_college_documents():
+    # Pull (or load from disk) every college's chunks before the first comparison;
+    # the local vector store serves comparisons directly
+    if COLLEGE_DOCS_ENABLED and VECTOR_STORE_BACKEND != "local":
+        try:
+            await asyncio.to_thread(get_document_store().ensure_loaded)
+        except Exception as e:
+            print(f"⚠️ College document warmup failed, will retry on first comparison: {e}")
+    if HYBRID_RETRIEVAL_ENABLED:
+        # BM25 only reads an already-loaded corpus, so index it now rather than on the first request
+        try:
+            await asyncio.to_thread(hybrid_retrieval.warmup)
+        except Exception as e:
+            print(f"⚠️ BM25 warmup failed, course retrieval is dense-only until it builds: {e}")
+
+@app.on_event("shutdown")
+async def close_snowflake_pool():
+    get_snowflake_pool().close()
+
+@app.on_event("shutdown")
+async def stop_session_sweeper():
+    sweeper = getattr(app.state, "session_sweeper", None)
+    if sweeper is not None:
+        sweeper.cancel()
+
+@app.on_event("shutdown")
+async def close_mcp_pool():
+    await rankings_pool.close()
@@ -0,0 +1,180 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from agents.mcp import MCPServerStdio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---------- Pool configuration ----------
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))
+MCP_HEALTH_INTERVAL = float(os.getenv("MCP_HEALTH_INTERVAL", "30"))
+MCP_HEALTH_TIMEOUT = float(os.getenv("MCP_HEALTH_TIMEOUT", "10"))
+MCP_ACQUIRE_TIMEOUT = float(os.getenv("MCP_ACQUIRE_TIMEOUT", "30"))
+MCP_MAX_BACKOFF = 30.0
+
+
+class MCPPoolTimeoutError(Exception):
+    """No healthy MCP session became available within the acquire timeout."""
+
+
+class _Slot:
+    def __init__(self, index: int):
+        self.index = index
+        self.server: Optional[MCPServerStdio] = None
+        self.generation = 0
+        self.in_use = False
+        self.failed = asyncio.Event()
+        self.restarts = 0
+
+
+class MCPServerPool:
+    """
+    Keeps `size` stdio MCP server processes connected for the life of the app.
+
+    Each slot is owned by a supervisor task that opens the session, hands it to
+    the pool, pings it every `health_interval` seconds while idle and reconnects
+    (with backoff) when the process dies or a health check fails. Requests
+    borrow a connected session with `async with pool.session() as server:`,
+    so a ranking question costs only the tool call instead of a process spawn,
+    imports and MCP handshake.
+    """
+
+    def __init__(self, name: str, params: Dict, size: int = MCP_POOL_SIZE,
+                 health_interval: float = MCP_HEALTH_INTERVAL, health_timeout: float = MCP_HEALTH_TIMEOUT,
+                 acquire_timeout: float = MCP_ACQUIRE_TIMEOUT):
+        self.name = name
+        self.params = params
+        self.size = max(1, size)
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.acquire_timeout = acquire_timeout
+        self._slots: List[_Slot] = []
+        self._tasks: List[asyncio.Task] = []
+        self._available: Optional[asyncio.Queue] = None
+        self._closing = False
+        self._calls = 0
+
+    # ---------- Lifecycle ----------
+    async def start(self, wait: float = 0.0):
+        """
+        Spawn the supervisors, which connect in the background. By default this
+        returns at once (app startup never waits on a slow or missing server)
+        and the first checkout waits for a session instead; pass `wait` to
+        block up to that many seconds for the first one.
+        """
+        if self._tasks:
+            return
+        self._closing = False
+        self._available = asyncio.Queue()
+        self._slots = [_Slot(i) for i in range(self.size)]
+        self._tasks = [asyncio.create_task(self._supervise(slot)) for slot in self._slots]
+        if wait > 0:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + wait
+            while not self._available.qsize() and loop.time() < deadline:
+                await asyncio.sleep(0.1)
+        print(f"🔌 MCP pool '{self.name}': {self.size} sessions starting, {self._available.qsize()} ready")
+
+    async def close(self):
+        self._closing = True
+        for slot in self._slots:
+            slot.failed.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _supervise(self, slot: _Slot):
+        backoff = 1.0
+        while not self._closing:
+            try:
+                async with MCPServerStdio(name=self.name, params=self.params, cache_tools_list=True) as server:
+                    slot.server = server
+                    slot.generation += 1
+                    slot.failed.clear()
+                    self._available.put_nowait((slot, slot.generation))
+                    print(f"🔌 MCP session {slot.index} ready")
+                    backoff = 1.0
+                    await self._watch(slot, server)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ MCP session {slot.index} failed: {e}")
+            slot.server = None
+            if self._closing:
+                break
+            slot.restarts += 1
+            print(f"🔁 Restarting MCP session {slot.index} in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MCP_MAX_BACKOFF)
+
+    async def _watch(self, slot: _Slot, server: MCPServerStdio):
+        """Return when the session must be torn down: shutdown, a reported failure or a failed ping."""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(slot.failed.wait(), self.health_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._closing or slot.failed.is_set():
+                return
+            if not slot.in_use and not await self._healthy(server):
+                return
+
+    async def _healthy(self, server: MCPServerStdio) -> bool:
+        try:
+            # Goes to the server directly; server.list_tools() would hit the tools cache
+            await asyncio.wait_for(server.session.list_tools(), self.health_timeout)
+            return True
+        except Exception as e:
+            print(f"⚠️ MCP health check failed: {e!r}")
+            return False
+
+    # ---------- Borrowing ----------
+    @asynccontextmanager
+    async def session(self):
+        if not self._tasks:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.acquire_timeout
+        while True:
+            try:
+                slot, generation = await asyncio.wait_for(self._available.get(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                raise MCPPoolTimeoutError(f"No MCP session available after {self.acquire_timeout:.0f}s")
+            # Entries from a session that has since been restarted are stale
+            if slot.generation == generation and slot.server is not None and not slot.failed.is_set():
+                break
+
+        slot.in_use = True
+        self._calls += 1
+        try:
+            yield slot.server
+        except Exception:
+            # The error may come from the model rather than the server; only recycle a dead session
+            if not await self._healthy(slot.server):
+                slot.failed.set()
+            raise
+        finally:
+            slot.in_use = False
+            if not slot.failed.is_set() and slot.generation == generation:
+                self._available.put_nowait((slot, generation))
+
+    def metrics(self) -> Dict:
+        return {
+            "size": self.size,
+            "connected": sum(1 for slot in self._slots if slot.server is not None),
+            "idle": self._available.qsize() if self._available else 0,
+            "in_use": sum(1 for slot in self._slots if slot.in_use),
+            "restarts": sum(slot.restarts for slot in self._slots),
+            "calls": self._calls,
+        }
+
+
+rankings_pool = MCPServerPool(
+    name="University Rankings Assistant",
+    params={
+        "command": "python",
+        "args": ["server.py"]
+    }
+)
@@ -1,44 +1,30 @@
-import os
 import json
-import re
 from dotenv import load_dotenv
-from typing import List
-from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer
+from typing import List, Optional
+from multi_Agents.embedding_cache import embed_query
 from langchain.schema import Document
-from openai import OpenAI
+from multi_Agents.llm_client import complete
+from multi_Agents.backend_limits import limit
+from multi_Agents.college_registry import college_resolver
+from multi_Agents.vector_store import get_vector_store
+from multi_Agents.hybrid_retrieval import hybrid_retrieval, HYBRID_RETRIEVAL_ENABLED, HYBRID_DENSE_CANDIDATES
 
 # ---------- Load environment ----------
 load_dotenv("Agents/.env")
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-PINECONE_INDEX_NAME = "college-recommendations"
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
 
 # ---------- Setup ----------
-embedder = SentenceTransformer(EMBED_MODEL_NAME)
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(PINECONE_INDEX_NAME)
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
-
-# ---------- Normalization Helper ----------
-def normalize(text: str) -> str:
-    return re.sub(r"\s+", "", text.lower().strip())  # remove all spaces + lowercase
+# Pinecone index or local memory-mapped store, per VECTOR_STORE_BACKEND
+index = get_vector_store()
 
 # ---------- College Extractor ----------
-def extract_college_name(query: str, known_colleges: List[str], alias_map: dict) -> str:
-    normalized_query = normalize(query)
-
-    # Check alias map (long name → short form used in Pinecone)
-    for full_name, alias in alias_map.items():
-        if normalize(full_name) in normalized_query:
-            return alias
-
-    # Check known_colleges (short forms)
-    for college in known_colleges:
-        if normalize(college) in normalized_query:
-            return college
-
+def extract_college_name(query: str) -> Optional[str]:
+    """Pinecone `college_name` of the first indexed college mentioned in the query."""
+    mentions, doubtful = college_resolver.scan(query)
+    # A lowercase "bu"/"duke" still names the college when nothing clearer is mentioned
+    for mention in mentions + doubtful:
+        if mention.college.pinecone:
+            return mention.college.pinecone
     return None
 
 # ---------- Retriever ----------
@@ -47,62 +33,9 @@ class PineconeRetriever:
         self._index = pinecone_index
         self._top_k = top_k
 
-        self.known_colleges = [
-            "MIT", "Stanford", "Harvard", "UCLA", "UCSD", "UC Berkeley", "Columbia", "Gatech",
-            "UWashington", "Yale", "Cornell", "CMU", "USC", "Princeton", "Georgetown",
-            "University of Virginia", "BU", "EmoryUniversity", "University of Michigan",
-            "Northeastern", "NorthwesternUniversity", "NYU", "UtAustin", "UFL", "UIC", "WPI",
-            "UNCC", "Upenn", "UCBerkeley", "Tufts"
-        ]
-
-        self.alias_map = {
-            "Massachusetts Institute of Technology": "MIT",
-            "Stanford University": "Stanford",
-            "Harvard University": "Harvard",
-            "University of California Los Angeles": "UCLA",
-            "University of California San Diego": "UCSD",
-            "University of California Berkeley": "UC Berkeley",
-            "Georgia Institute of Technology": "Gatech",
-            "University of Washington": "UWashington",
-            "Carnegie Mellon University": "CMU",
-            "University of Southern California": "USC",
-            "New York University": "NYU",
-            "University of Michigan": "University of Michigan",
-            "University of Florida": "UFL",
-            "University of Illinois Chicago": "UIC",
-            "University of North Carolina Charlotte": "UNCC",
-            "University of Texas at Austin": "UtAustin",
-            "University of Virginia": "University of Virginia",
-            "University of Pennsylvania": "Upenn",
-            "Northeastern University": "Northeastern",
-            "NEU":"Northeastern",
-            "Boston University": "BU",
-            "Emory University": "EmoryUniversity",
-            "Emory": "EmoryUniversity",
-            "Tufts University": "Tufts",
-            "Tuft":"Tufts",
-            "Columbia University": "Columbia",
-            "Georgia Tech": "Gatech",
-            "Georgia Institute of Technology": "Gatech",
-            "University of Texas": "UtAustin",
-            "university of texas": "UtAustin",
-            "Yale":"YaleUniv",
-            "Worcester Polytechnic Institute": "WPI",
-            "Worcester":"WPI",
-            "University of Illinois at Urbana-Champaign": "UIUC",
-            "Princeton University": "Princeton",
-            "Cornell University": "Cornell",
-            "university of california berkeley": "UC Berkeley",
-
-
-
-
-            "Northwestern University": "NorthwesternUniversity"
-        }
-
     def get_relevant_documents(self, query: str) -> List[Document]:
-        embedding = embedder.encode(query).tolist()
-        college = extract_college_name(query, self.known_colleges, self.alias_map)
+        embedding = embed_query(query, model_name=EMBED_MODEL_NAME).tolist()
+        college = extract_college_name(query)
 
         if college:
             print(f"🎯 Filtered search for college: {college}")
@@ -116,14 +49,18 @@ class PineconeRetriever:
                 "type": {"$in": ["catalog", "courses"]}
             }
 
-        result = self._index.query(
-            vector=embedding,
-            top_k=self._top_k,
-            include_metadata=True,
-            filter=filter_metadata
-        )
+        with limit("pinecone"):
+            result = self._index.query(
+                vector=embedding,
+                top_k=HYBRID_DENSE_CANDIDATES if HYBRID_RETRIEVAL_ENABLED else self._top_k,
+                include_metadata=True,
+                filter=filter_metadata
+            )
 
         matches = result.get("matches", [])
+        if HYBRID_RETRIEVAL_ENABLED:
+            # Fuse with BM25 (exact course codes/titles) and keep only what the cross-encoder finds relevant
+            matches = hybrid_retrieval.search(query, matches, filter_metadata, top_k=self._top_k)
         print("📄 Top Matched Chunks (by college):")
         for m in matches:
             print("-", m["metadata"].get("college_name", "Unknown"), ":", m["metadata"].get("source", "N/A"))
@@ -165,12 +102,7 @@ If the user asks about admission requirements, answer based on context and gener
 Be helpful, focused, and relevant to the specified university only.
 """
 
-        response = openai_client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
+        return complete(prompt, model=self.model, temperature=0.7).strip()
 
 # ---------- RAG Agent ----------
 class CourseRecommenderAgent:
@@ -185,7 +117,7 @@ class CourseRecommenderAgent:
         if not any(keyword in query_lower for keyword in allowed_keywords):
             return ""
 
-        college = extract_college_name(query, self.retriever.known_colleges, self.retriever.alias_map)
+        college = extract_college_name(query)
         if not college:
          return ""
         
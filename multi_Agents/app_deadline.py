@@ -1,36 +1,30 @@
-import os
 import re
 from dotenv import load_dotenv
-import snowflake.connector
+from multi_Agents.snowflake_pool import get_pool
+from multi_Agents.college_snapshot import get_snapshot, SNAPSHOT_ENABLED
+from multi_Agents.college_registry import college_resolver
 
 load_dotenv()
 
-# Snowflake configuration
-SNOWFLAKE_CONFIG = {
-    "user": os.getenv("SNOWFLAKE_USER"),
-    "password": os.getenv("SNOWFLAKE_PASSWORD"),
-    "account": os.getenv("SNOWFLAKE_ACCOUNT"),
-    "warehouse": os.getenv("SNOWFLAKE_WAREHOUSE"),
-    "database": os.getenv("SNOWFLAKE_DATABASE"),
-    "schema": "TOP_30"
-}
-
 # Table configuration
 COLLEGE_TABLE = "UNIVERSITY_LIST"
 DEFAULT_COLUMNS = ["COLLEGE_NAME", "APPLICATION_DEADLINE"]
 
 def get_snowflake_connection():
-    """Establish connection to Snowflake"""
-    return snowflake.connector.connect(**SNOWFLAKE_CONFIG)
+    """Check out a pooled Snowflake connection (use as a context manager)"""
+    return get_pool().connection()
 
 def extract_college_name(prompt: str) -> str:
     """
-    Extract college name from user prompt using regex patterns
-    Handles common variations and abbreviations
+    Extract college name from user prompt: registry colleges resolve to
+    their Snowflake COLLEGE_NAME; other names fall back to regex patterns
     """
+    college = college_resolver.first(prompt)
+    if college:
+        return college.snowflake
+
     patterns = [
         r"(?:for|of|at)\s+(the\s+)?([A-Za-z\s]+?)(?:\s+university|\s+college|$|\?)",
-        r"(Harvard|MIT|Stanford|Yale|Princeton|Columbia|Caltech|Berkeley|UCLA|NYU)",
         r"\b(for|get)\s+([A-Za-z\s]+?)(?:'s)?\s+deadline"
     ]
     
@@ -41,21 +35,14 @@ def extract_college_name(prompt: str) -> str:
             college = match.group(match.lastindex).strip()
             # Standardize common names
             college = college.replace("the ", "").strip()
-            if college.upper() == "MIT":
-                return "Massachusetts Institute of Technology"
-            if college.upper() == "UCLA":
-                return "University of California, Los Angeles"
-            if college.upper() == "NYU":
-                return "New York University"
-            if "berkeley" in college.lower():
-                return "University of California, Berkeley"
             return college.title()
     
     return ""
 
 def fetch_application_deadline(college_name: str) -> dict:
     """
-    Query Snowflake for application deadline of a specific college
+    Look up the application deadline of a specific college
+    (from the local college snapshot, or Snowflake when it is disabled)
     Returns a dictionary with college name and deadline
     """
     if not college_name:
@@ -69,12 +56,18 @@ def fetch_application_deadline(college_name: str) -> dict:
     """
     
     try:
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
-        
-        # Use ILIKE for case-insensitive matching and % for partial matches
-        cursor.execute(query, (f"%{college_name}%",))
-        result = cursor.fetchone()
+        if SNAPSHOT_ENABLED:
+            row = get_snapshot().find_first("COLLEGE_NAME", college_name, DEFAULT_COLUMNS)
+            result = (row["COLLEGE_NAME"], row["APPLICATION_DEADLINE"]) if row else None
+        else:
+            with get_snowflake_connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    # Use ILIKE for case-insensitive matching and % for partial matches
+                    cursor.execute(query, (f"%{college_name}%",))
+                    result = cursor.fetchone()
+                finally:
+                    cursor.close()
         
         if result:
             return {
@@ -93,9 +86,6 @@ def fetch_application_deadline(college_name: str) -> dict:
             "error": f"Database error: {str(e)}",
             "status": "error"
         }
-    finally:
-        if 'conn' in locals():
-            conn.close()
 
 def process_deadline_query(prompt: str) -> str:
     """
@@ -0,0 +1,128 @@
+import os
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Dict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---------- Per-backend concurrency limits ----------
+# Caps in-flight calls to each external service across every request, batch
+# job and worker thread in the process. Snowflake is additionally bounded by
+# the connection pool size (SNOWFLAKE_POOL_SIZE).
+
+BACKEND_LIMITS = {
+    "openai": int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+    "pinecone": int(os.getenv("PINECONE_MAX_CONCURRENCY", "8")),
+    "snowflake": int(os.getenv("SNOWFLAKE_MAX_CONCURRENCY", os.getenv("SNOWFLAKE_POOL_SIZE", "4"))),
+}
+
+class _BackendLimit:
+    """
+    Counting slot limit shared by worker threads and event-loop tasks. Waiters
+    queue FIFO: a thread waits on an Event, a task awaits a future, and
+    release() hands the slot straight to the oldest waiter, so nobody polls
+    and nobody is starved.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._waiters: Deque = deque()  # threading.Event | (loop, future)
+
+    def _take(self) -> bool:
+        # Caller holds _lock; queued waiters go first
+        if self.in_flight < self.size and not self._waiters:
+            self.in_flight += 1
+            return True
+        return False
+
+    def acquire(self):
+        with self._lock:
+            if self._take():
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()  # release() handed us its slot
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._take():
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        future = waiter[1]
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # Already handed a slot: give it back (a pending hand-off to a
+            # cancelled future is passed on by _hand_off instead)
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while True:
+            with self._lock:
+                if not self._waiters:
+                    self.in_flight -= 1
+                    return
+                waiter = self._waiters.popleft()
+            # The slot passes to the waiter, so in_flight is unchanged
+            if isinstance(waiter, threading.Event):
+                waiter.set()
+                return
+            loop, future = waiter
+            try:
+                loop.call_soon_threadsafe(self._hand_off, future)
+                return
+            except RuntimeError:
+                # The waiter's event loop is closed (e.g. asyncio.run returned); try the next waiter
+                continue
+
+    def _hand_off(self, future: asyncio.Future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"limit": self.size, "in_flight": self.in_flight, "waiting": len(self._waiters)}
+
+
+_limits: Dict[str, _BackendLimit] = {name: _BackendLimit(size) for name, size in BACKEND_LIMITS.items()}
+
+
+@contextmanager
+def limit(backend: str):
+    """Blocking slot for sync code (worker threads)."""
+    backend_limit = _limits[backend]
+    backend_limit.acquire()
+    try:
+        yield
+    finally:
+        backend_limit.release()
+
+
+@asynccontextmanager
+async def alimit(backend: str):
+    """Awaitable slot that never blocks the event loop; shares the thread-side limit."""
+    backend_limit = _limits[backend]
+    await backend_limit.aacquire()
+    try:
+        yield
+    finally:
+        backend_limit.release()
+
+
+def limit_stats() -> Dict[str, Dict[str, int]]:
+    return {name: backend_limit.stats() for name, backend_limit in _limits.items()}
@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from multi_Agents import model_registry
+from multi_Agents.embedding_cache import embedding_cache, normalize_query
+from multi_Agents.college_snapshot import get_snapshot, SNAPSHOT_ENABLED
+
+load_dotenv()
+
+# ---------- Bulk recommendation runs ----------
+# Shared by POST /recommend/batch and the offline CLI below. Identical prompts
+# (after normalization) run once, every unique prompt is embedded in a single
+# batched encode before any workflow starts, the college snapshot is loaded
+# once for the whole batch, and per-backend limits (backend_limits) keep
+# OpenAI / Pinecone / Snowflake within their concurrency budgets.
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+# Upper bound on the concurrency a /recommend/batch caller may ask for
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+
+
+async def prepare_batch(prompts: List[str], model_name: str = model_registry.DEFAULT_MODEL_NAME):
+    """Warm the shared caches so each workflow run hits them instead of the backends."""
+    missing = [p for p in prompts if embedding_cache.get(model_name, p) is None]
+    if missing:
+        vectors = await asyncio.to_thread(model_registry.encode, missing, model_name=model_name)
+        for prompt, vector in zip(missing, vectors):
+            embedding_cache.put(model_name, prompt, vector)
+        print(f"🧮 Pre-embedded {len(missing)} batch prompts in one pass")
+    if SNAPSHOT_ENABLED:
+        await asyncio.to_thread(get_snapshot().ensure_loaded)
+
+
+async def run_batch(items: List[Tuple[str, str]], run_one: Callable[[str], Awaitable[Dict]],
+                    concurrency: int = BATCH_CONCURRENCY) -> AsyncIterator[Dict]:
+    """
+    Run (id, prompt) items through `run_one` and yield one record per item in
+    completion order. Duplicate prompts share a single run; their records are
+    yielded together when it finishes and name the id that ran as `duplicate_of`.
+    """
+    groups: "OrderedDict[str, List[Tuple[str, str]]]" = OrderedDict()
+    for item_id, prompt in items:
+        groups.setdefault(normalize_query(prompt), []).append((item_id, prompt))
+    print(f"📦 Batch of {len(items)} prompts, {len(groups)} unique")
+
+    try:
+        await prepare_batch([members[0][1] for members in groups.values()])
+    except Exception as e:
+        print(f"⚠️ Batch warmup failed, continuing without it: {e}")
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_group(key: str) -> Tuple[str, Optional[Dict], Optional[str]]:
+        async with semaphore:
+            try:
+                return key, await run_one(groups[key][0][1]), None
+            except Exception as e:
+                return key, None, str(e)
+
+    tasks = [asyncio.create_task(run_group(key)) for key in groups]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            key, result, error = await next_done
+            first_id = groups[key][0][0]
+            for item_id, prompt in groups[key]:
+                record = {"id": item_id, "prompt": prompt, "result": result, "error": error}
+                if item_id != first_id:
+                    record["duplicate_of"] = first_id
+                yield record
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+# ---------- Offline CLI ----------
+async def _run_workflow(prompt: str) -> Dict:
+    from multi_Agents.multi_agent import app, initial_state
+
+    result = await app.ainvoke(initial_state(prompt))
+    return {
+        "early_response": result.get("early_response"),
+        "final_output": result.get("final_output"),
+    }
+
+
+def _read_items(path: str, field: str) -> List[Tuple[str, str]]:
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            prompt = row.get(field) if isinstance(row, dict) else row
+            if not prompt:
+                print(f"⚠️ Line {line_no}: no '{field}' field, skipped")
+                continue
+            item_id = str(row.get("id") or row.get("request_id") or line_no) if isinstance(row, dict) else str(line_no)
+            items.append((item_id, prompt))
+    return items
+
+
+async def _main(args):
+    items = _read_items(args.input, args.field)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        async for record in run_batch(items, _run_workflow, concurrency=args.concurrency):
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run recommendation prompts from a JSONL file")
+    parser.add_argument("input", help="JSONL file, one object per line (or one JSON string per line)")
+    parser.add_argument("--field", default="prompt", help="key holding the prompt (default: prompt)")
+    parser.add_argument("--output", "-o", help="write results here instead of stdout")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    asyncio.run(_main(parser.parse_args()))
@@ -1,12 +1,13 @@
 from typing import Dict, Any
 import json
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
+from multi_Agents.llm_client import acomplete
+from multi_Agents.comparison_extractor import extract_comparison
 import asyncio
 
 class ComparisonDetector:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4-turbo", temperature=0)
+        self.llm_model = "gpt-4-turbo"
         # Fixed prompt template with escaped curly braces
         self.prompt_template = ChatPromptTemplate.from_messages([
             ("system", """You are an expert at detecting college comparison requests. Analyze the user's query and determine:
@@ -27,14 +28,27 @@ class ComparisonDetector:
             }}"""),
             ("human", "{query}")
         ])
-        self.chain = self.prompt_template | self.llm
+        self.local_hits = 0
+        self.llm_calls = 0
 
     async def detect(self, query: str) -> Dict[str, Any]:
+        """Local registry/vocabulary extraction; the LLM only when fewer than two colleges are found"""
+        local = extract_comparison(query)
+        if local is not None:
+            self.local_hits += 1
+            return local
+        self.llm_calls += 1
+        return await self.detect_with_llm(query)
+
+    async def detect_with_llm(self, query: str) -> Dict[str, Any]:
         """Detect comparison with robust error handling"""
         try:
-            response = await self.chain.ainvoke({"query": query})
+            messages = [
+                {"role": "system" if m.type == "system" else "user", "content": m.content}
+                for m in self.prompt_template.format_messages(query=query)
+            ]
+            content = await acomplete(messages, model=self.llm_model, temperature=0)
             # Handle cases where response might be markdown with json code blocks
-            content = response.content
             if '```json' in content:
                 content = content.split('```json')[1].split('```')[0]
             return json.loads(content)
@@ -0,0 +1,305 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from langchain.schema import Document
+from multi_Agents.backend_limits import limit
+from multi_Agents.college_registry import COLLEGES
+
+load_dotenv()
+
+# ---------- Local college document store ----------
+# Course and catalog chunks for every indexed college, held in memory and
+# keyed by college_name and type, so comparison retrieval is a dict lookup
+# plus a dot product against the real query embedding instead of a
+# zero-vector Pinecone query per request. Filling the store lists and fetches
+# the index; only indexes without list() support (pod-based) fall back to
+# zero-vector filtered queries, once per load, and the store reports that as
+# degraded in stats().
+
+COLLEGE_DOCS_ENABLED = os.getenv("COLLEGE_DOCS_ENABLED", "true").lower() not in ("0", "false", "no")
+COLLEGE_DOCS_PATH = os.getenv("COLLEGE_DOCS_PATH", ".cache/college_docs.npz")
+COLLEGE_DOCS_TTL = float(os.getenv("COLLEGE_DOCS_TTL", str(24 * 3600)))
+# After a failed pull, wait this long before pulling from Pinecone again
+COLLEGE_DOCS_RETRY_AFTER = float(os.getenv("COLLEGE_DOCS_RETRY_AFTER", "300"))
+DOCUMENT_TYPES = ("catalog", "courses")
+FETCH_BATCH_SIZE = 100
+# Per-college cap when the index can't be listed and chunks are pulled by filter
+FILTER_FETCH_TOP_K = int(os.getenv("COLLEGE_DOCS_FILTER_TOP_K", "1000"))
+
+
+def _field(obj, name: str, default=None):
+    # Pinecone responses are objects in newer clients and dicts in older ones
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+class DocumentFrame:
+    """
+    One immutable load of the chunks: chunk dicts, their unit vectors and the
+    (college_name, type) -> rows index. Readers grab a frame once, so a
+    concurrent refresh can never pair new chunks with old rows.
+    """
+
+    def __init__(self, chunks: List[Dict], vectors: np.ndarray, loaded_at: Optional[float], source: Optional[str]):
+        if len(chunks):
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1.0, norms)
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for row, chunk in enumerate(chunks):
+            groups.setdefault((chunk["metadata"]["college_name"], chunk["metadata"]["type"]), []).append(row)
+        self.chunks = chunks
+        self.vectors = vectors
+        self.groups: Dict[Tuple[str, str], np.ndarray] = {key: np.asarray(rows, dtype=np.int64) for key, rows in groups.items()}
+        self.loaded_at = loaded_at
+        self.source = source
+
+
+class CollegeDocumentStore:
+    """
+    Every catalog/courses chunk in the Pinecone index, grouped by
+    (college_name, type), with its stored vector.
+
+    The store is filled by listing the index's vector IDs and fetching them in
+    batches (falling back to one metadata-filtered query per registry college
+    on indexes that can't be listed) and persisted to `path` so restarts load
+    from disk. Only the very first load blocks: once older than `ttl` the
+    current chunks keep serving while a background thread re-pulls them, and
+    a failed pull is not retried for `retry_after` seconds. Pulls run outside
+    the lock readers take; `_lock` is held only to swap in the new frame.
+    `refresh()` rebuilds synchronously after an ingestion run.
+    """
+
+    def __init__(self, index=None, path: str = COLLEGE_DOCS_PATH, ttl: float = COLLEGE_DOCS_TTL,
+                 types: Sequence[str] = DOCUMENT_TYPES, retry_after: float = COLLEGE_DOCS_RETRY_AFTER):
+        self._index = index
+        self.path = path
+        self.ttl = ttl
+        self.types = tuple(types)
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        # Serializes pulls (cold start, background and explicit refreshes), never held by readers
+        self._pull_lock = threading.Lock()
+        self._refreshing = False
+        self._retry_at = 0.0  # no pull before this time (set after a failed one)
+        self._degraded = False  # last pull used zero-vector filtered queries
+        self._frame = DocumentFrame([], np.zeros((0, 0), dtype=np.float32), None, None)
+
+    @property
+    def index(self):
+        if self._index is None:
+            from multi_Agents.compareRAG import index
+
+            self._index = index
+        return self._index
+
+    @property
+    def loaded_at(self) -> Optional[float]:
+        return self._frame.loaded_at
+
+    @property
+    def source(self) -> Optional[str]:
+        return self._frame.source
+
+    # ---------- Loading ----------
+    def ensure_loaded(self):
+        """Load on first use (file first, then Pinecone); refresh in the background once stale."""
+        if self.loaded_at is None:
+            # Nothing to serve yet, so the first load blocks (one puller, the rest wait for it)
+            with self._pull_lock:
+                if self.loaded_at is None and not self._read_file():
+                    if time.time() < self._retry_at:
+                        raise RuntimeError("College documents unavailable, last pull failed")
+                    self._refresh_unlocked()
+        if time.time() - self.loaded_at > self.ttl and time.time() >= self._retry_at:
+            self._refresh_in_background()
+
+    def refresh(self):
+        """Re-pull every chunk from Pinecone (call after ingestion)."""
+        with self._pull_lock:
+            self._refresh_unlocked()
+
+    def _refresh_unlocked(self):
+        # Caller holds _pull_lock; the pull itself runs without _lock so readers keep the old frame
+        try:
+            chunks, vectors, degraded = self._pull_from_pinecone()
+        except Exception as e:
+            with self._lock:
+                self._retry_at = time.time() + self.retry_after
+            if self.loaded_at is None:
+                raise
+            print(f"⚠️ College document refresh failed, serving previous copy for {self.retry_after:.0f}s: {e}")
+            return
+        frame = DocumentFrame(chunks, vectors, time.time(), "pinecone")
+        # Swap in the new frame atomically; readers never see a half-built one
+        with self._lock:
+            self._frame = frame
+            self._retry_at = 0.0
+            self._degraded = degraded
+        self._write_file(frame)
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="college-documents-refresh", daemon=True).start()
+
+    def _pull_from_pinecone(self) -> Tuple[List[Dict], np.ndarray, bool]:
+        degraded = False
+        try:
+            records = self._fetch_listed()
+        except Exception as e:
+            # Pod-based indexes don't support list(); pull each college by metadata filter instead
+            print(f"⚠️ Pinecone list() unavailable ({e}), degraded mode: zero-vector query per college, "
+                  f"capped at {FILTER_FETCH_TOP_K} chunks each")
+            records = self._fetch_by_filter()
+            degraded = True
+
+        chunks, vectors = [], []
+        for vector_id, values, metadata in records:
+            metadata = dict(metadata or {})
+            if metadata.get("type") not in self.types or not metadata.get("college_name") or values is None:
+                continue
+            chunks.append({"id": vector_id, "text": metadata.get("text", ""), "metadata": metadata})
+            vectors.append(np.asarray(values, dtype=np.float32))
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        print(f"📚 Pulled {len(chunks)} college document chunks from Pinecone")
+        return chunks, matrix, degraded
+
+    def _fetch_listed(self) -> Iterable[Tuple[str, List[float], Dict]]:
+        records = []
+        for page in self.index.list():
+            ids = list(page)
+            for start in range(0, len(ids), FETCH_BATCH_SIZE):
+                with limit("pinecone"):
+                    response = self.index.fetch(ids=ids[start:start + FETCH_BATCH_SIZE])
+                for vector_id, vector in (_field(response, "vectors") or {}).items():
+                    records.append((vector_id, _field(vector, "values"), _field(vector, "metadata")))
+        return records
+
+    def _fetch_by_filter(self) -> Iterable[Tuple[str, List[float], Dict]]:
+        records = []
+        dimension = None
+        for college in {c.pinecone for c in COLLEGES if c.pinecone}:
+            if dimension is None:
+                dimension = _field(self.index.describe_index_stats(), "dimension") or 384
+            with limit("pinecone"):
+                response = self.index.query(
+                    vector=[0.0] * dimension,
+                    top_k=FILTER_FETCH_TOP_K,
+                    include_metadata=True,
+                    include_values=True,
+                    filter={"college_name": {"$eq": college}, "type": {"$in": list(self.types)}},
+                )
+            for match in _field(response, "matches") or []:
+                records.append((_field(match, "id"), _field(match, "values"), _field(match, "metadata")))
+        return records
+
+    # ---------- Persistence ----------
+    def _write_file(self, frame: DocumentFrame):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp.npz"
+            np.savez_compressed(tmp_path, vectors=frame.vectors, chunks=np.array(json.dumps(frame.chunks)),
+                                loaded_at=np.array(frame.loaded_at))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ Could not persist college documents: {e}")
+
+    def _read_file(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as data:
+                chunks = json.loads(str(data["chunks"]))
+                frame = DocumentFrame(chunks, data["vectors"], float(data["loaded_at"]), "file")
+            with self._lock:
+                self._frame = frame
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not read college document file: {e}")
+            return False
+
+    # ---------- Lookups ----------
+    def has_college(self, college: str) -> bool:
+        groups = self.frame().groups
+        return any((college, doc_type) in groups for doc_type in self.types)
+
+    def get_documents(self, college: str, query_vector=None, top_k: int = 5,
+                      types: Optional[Sequence[str]] = None) -> List[Document]:
+        """
+        `college`'s chunks of the given types, best match to `query_vector`
+        first (cosine over the stored vectors); without a query vector they
+        come back in index order.
+        """
+        frame = self.frame()
+        chunks, vectors, groups = frame.chunks, frame.vectors, frame.groups
+        rows = [groups[(college, t)] for t in (types or self.types) if (college, t) in groups]
+        if not rows:
+            return []
+        rows = np.concatenate(rows)
+        if query_vector is not None and len(rows) > top_k:
+            query = np.asarray(query_vector, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1.0)
+            scores = vectors[rows] @ query
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            rows = rows[best[np.argsort(-scores[best])]]
+        elif query_vector is not None:
+            query = np.asarray(query_vector, dtype=np.float32)
+            rows = rows[np.argsort(-(vectors[rows] @ query))]
+        return [
+            Document(page_content=chunks[row]["text"], metadata=chunks[row]["metadata"])
+            for row in rows[:top_k]
+        ]
+
+    def chunks(self) -> List[Dict]:
+        """Every loaded chunk as {"id", "text", "metadata"}, for building text indexes."""
+        return self.frame().chunks
+
+    def frame(self) -> DocumentFrame:
+        self.ensure_loaded()
+        return self._frame
+
+    def current_frame(self) -> DocumentFrame:
+        """The frame held right now, without loading or refreshing (empty before the first load)."""
+        return self._frame
+
+    def stats(self) -> Dict:
+        frame = self._frame
+        return {
+            "enabled": COLLEGE_DOCS_ENABLED,
+            "loaded_at": frame.loaded_at,
+            "source": frame.source,
+            "chunks": len(frame.chunks),
+            "colleges": len({college for college, _ in frame.groups}),
+            "refreshing": self._refreshing,
+            "degraded": self._degraded,
+        }
+
+
+_store: Optional[CollegeDocumentStore] = None
+_store_lock = threading.Lock()
+
+
+def get_document_store() -> CollegeDocumentStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CollegeDocumentStore()
+    return _store
@@ -0,0 +1,123 @@
+import re
+import datetime
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# ---------- Normalized shadow columns ----------
+# TOP_30.UNIVERSITY_LIST stores most numbers as display strings ("$57,000",
+# "4%", "1500-1570", "January 1"). They are parsed exactly once per load
+# into typed shadow columns, which every filter path then reads directly:
+#   * the local snapshot adds them to each row at ingestion (normalize_rows)
+#   * the Snowflake path reads them from NORMALIZED_VIEW (create_view_sql)
+# The Python parser and SQL expression of each column must agree.
+
+NORMALIZED_VIEW = os.getenv("COLLEGE_NORMALIZED_VIEW", "TOP_30.UNIVERSITY_LIST_NORMALIZED")
+
+def parse_number(value) -> Optional[float]:
+    try:
+        return float(str(value).replace(",", "").replace("$", "").replace("%", "").strip())
+    except ValueError:
+        return None
+
+def parse_first_number(value) -> Optional[float]:
+    match = re.search(r"\d+(?:\.\d+)?", str(value))
+    return float(match.group(0)) if match else None
+
+def parse_sat_range(value) -> Tuple[Optional[float], Optional[float]]:
+    numbers = re.findall(r"\d{3,4}", str(value))
+    if not numbers:
+        return None, None
+    low = float(numbers[0])
+    high = float(numbers[1]) if len(numbers) > 1 else low
+    return low, high
+
+def parse_deadline_doy(value) -> Optional[float]:
+    try:
+        # Fixed non-leap year so day-of-year matches Snowflake's DAYOFYEAR below
+        return float(datetime.datetime.strptime(f"{str(value).strip()} 2001", "%B %d %Y").timetuple().tm_yday)
+    except ValueError:
+        return None
+
+def parse_state_abbr(value) -> Optional[str]:
+    match = re.search(r",\s*([A-Za-z]{2})\b", str(value))
+    return match.group(1).upper() if match else None
+
+def _num_sql(col: str) -> str:
+    return f"TRY_TO_DOUBLE(REGEXP_REPLACE(TO_VARCHAR({col}), '[$,%]', ''))"
+
+def _sat_sql(occurrence: int) -> str:
+    return f"TRY_TO_DOUBLE(REGEXP_SUBSTR(TO_VARCHAR(SAT_RANGE), '[0-9]{{3,4}}', 1, {occurrence}))"
+
+@dataclass(frozen=True)
+class ShadowColumn:
+    source: str
+    parse: Callable
+    sql: str
+    numeric: bool = True
+
+SHADOW_COLUMNS: Dict[str, ShadowColumn] = {
+    "TUITION_USD": ShadowColumn("TUITION_FEES", parse_number, _num_sql("TUITION_FEES")),
+    "ACCEPTANCE_PCT": ShadowColumn("ACCEPTANCE_RATE", parse_number, _num_sql("ACCEPTANCE_RATE")),
+    "SALARY_USD": ShadowColumn(
+        "MEDIAN_SALARY_AFTER_GRADUATION", parse_number, _num_sql("MEDIAN_SALARY_AFTER_GRADUATION")),
+    "ENROLLMENT_COUNT": ShadowColumn(
+        "UNDERGRADUATE_ENROLLMENT", parse_number, _num_sql("UNDERGRADUATE_ENROLLMENT")),
+    "GPA_MIN": ShadowColumn(
+        "MINIMUM_GPA", parse_first_number,
+        "TRY_TO_DOUBLE(REGEXP_SUBSTR(TO_VARCHAR(MINIMUM_GPA), '[0-9]+([.][0-9]+)?'))"),
+    "SAT_LOW": ShadowColumn("SAT_RANGE", lambda v: parse_sat_range(v)[0], _sat_sql(1)),
+    "SAT_HIGH": ShadowColumn("SAT_RANGE", lambda v: parse_sat_range(v)[1], f"COALESCE({_sat_sql(2)}, {_sat_sql(1)})"),
+    "DEADLINE_DOY": ShadowColumn(
+        "APPLICATION_DEADLINE", parse_deadline_doy,
+        "DAYOFYEAR(TRY_TO_DATE(TRIM(TO_VARCHAR(APPLICATION_DEADLINE)) || ' 2001', 'MMMM DD YYYY'))"),
+    "STATE_ABBR": ShadowColumn(
+        "LOCATION", parse_state_abbr,
+        "UPPER(REGEXP_SUBSTR(LOCATION, ',[[:space:]]*([A-Za-z]{2})([^A-Za-z]|$)', 1, 1, 'e', 1))",
+        numeric=False),
+}
+
+NUMERIC_SHADOW_COLUMNS = {name for name, spec in SHADOW_COLUMNS.items() if spec.numeric}
+
+# Raw display column -> its numeric shadow (used for numeric filters and typed output)
+NUMERIC_SHADOWS = {
+    "TUITION_FEES": "TUITION_USD",
+    "ACCEPTANCE_RATE": "ACCEPTANCE_PCT",
+    "MEDIAN_SALARY_AFTER_GRADUATION": "SALARY_USD",
+    "UNDERGRADUATE_ENROLLMENT": "ENROLLMENT_COUNT",
+}
+
+def normalize_rows(rows: List[Dict]) -> List[Dict]:
+    """Ingestion stage: add every shadow column to each raw row (in place)."""
+    for row in rows:
+        for name, spec in SHADOW_COLUMNS.items():
+            raw = row.get(spec.source)
+            row[name] = spec.parse(raw) if raw is not None else None
+    return rows
+
+def numeric_select(columns: List[str], numeric: List[str]) -> List:
+    """
+    Select list where the `numeric` display columns are served from their
+    shadow column under the original name, e.g. ("TUITION_FEES", "TUITION_USD").
+    """
+    return [(col, NUMERIC_SHADOWS[col]) if col in numeric and col in NUMERIC_SHADOWS else col for col in columns]
+
+def create_view_sql(source_table: str = "TOP_30.UNIVERSITY_LIST", view: str = NORMALIZED_VIEW,
+                    materialized: bool = False) -> str:
+    """DDL for the Snowflake-side equivalent of normalize_rows."""
+    shadow_list = ",\n    ".join(f"{spec.sql} AS {name}" for name, spec in SHADOW_COLUMNS.items())
+    kind = "MATERIALIZED VIEW" if materialized else "VIEW"
+    return f"CREATE OR REPLACE {kind} {view} AS\nSELECT\n    *,\n    {shadow_list}\nFROM {source_table}"
+
+if __name__ == "__main__":
+    # One-off: create the normalized view used when COLLEGE_SNAPSHOT_ENABLED=false
+    from multi_Agents.snowflake_pool import get_pool
+
+    ddl = create_view_sql(materialized=os.getenv("COLLEGE_NORMALIZED_VIEW_MATERIALIZED", "false").lower() == "true")
+    print(ddl)
+    with get_pool().connection() as conn:
+        conn.cursor().execute(ddl)
+    print(f"✅ Created {NORMALIZED_VIEW}")
@@ -0,0 +1,251 @@
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# ---------- Canonical colleges ----------
+# The one college registry. Each college has a stable id plus the name each
+# backend expects: `name` is the short display form the comparison agents
+# use, `snowflake` the COLLEGE_NAME in TOP_30.UNIVERSITY_LIST, `pinecone`
+# the `college_name` metadata on course/catalog chunks (None when the index
+# has no documents for it) and `qs` the QS World University Rankings name.
+# Aliases are everything users type; they are normalized once, at load.
+
+
+@dataclass(frozen=True)
+class College:
+    id: str
+    name: str
+    full_name: str
+    snowflake: str
+    pinecone: Optional[str] = None
+    qs: Optional[str] = None
+    aliases: Tuple[str, ...] = ()
+
+
+def _college(id: str, name: str, full_name: str, pinecone: Optional[str] = None, qs: Optional[str] = None,
+             snowflake: Optional[str] = None, aliases: Tuple[str, ...] = ()) -> College:
+    return College(id, name, full_name, snowflake or full_name, pinecone, qs or full_name, aliases)
+
+
+COLLEGES: List[College] = [
+    _college("mit", "MIT", "Massachusetts Institute of Technology", "MIT",
+             qs="Massachusetts Institute of Technology (MIT)", aliases=("mit", "m.i.t.")),
+    _college("stanford", "Stanford", "Stanford University", "Stanford", aliases=("stanford",)),
+    _college("harvard", "Harvard", "Harvard University", "Harvard", aliases=("harvard",)),
+    _college("yale", "Yale", "Yale University", "YaleUniv", aliases=("yale", "yaleuniv")),
+    _college("princeton", "Princeton", "Princeton University", "Princeton", aliases=("princeton",)),
+    _college("columbia", "Columbia", "Columbia University", "Columbia", aliases=("columbia",)),
+    _college("cornell", "Cornell", "Cornell University", "Cornell", aliases=("cornell",)),
+    _college("brown", "Brown", "Brown University", aliases=("brown",)),
+    _college("dartmouth", "Dartmouth", "Dartmouth College", aliases=("dartmouth",)),
+    _college("upenn", "UPenn", "University of Pennsylvania", "Upenn", aliases=("upenn", "penn", "u penn")),
+    _college("caltech", "Caltech", "California Institute of Technology",
+             qs="California Institute of Technology (Caltech)", aliases=("caltech", "cal tech")),
+    _college("uchicago", "UChicago", "University of Chicago", aliases=("uchicago", "u chicago")),
+    _college("jhu", "Johns Hopkins", "Johns Hopkins University", aliases=("johns hopkins", "jhu", "hopkins")),
+    _college("duke", "Duke", "Duke University", aliases=("duke",)),
+    _college("northwestern", "Northwestern", "Northwestern University", "NorthwesternUniversity",
+             aliases=("northwestern", "northwesternuniversity")),
+    _college("uc-berkeley", "UC Berkeley", "University of California Berkeley", "UC Berkeley",
+             qs="University of California, Berkeley (UCB)", snowflake="University of California, Berkeley",
+             aliases=("uc berkeley", "ucberkeley", "berkeley", "cal berkeley")),
+    _college("ucla", "UCLA", "University of California Los Angeles", "UCLA",
+             qs="University of California, Los Angeles (UCLA)", snowflake="University of California, Los Angeles",
+             aliases=("ucla",)),
+    _college("ucsd", "UCSD", "University of California San Diego", "UCSD",
+             qs="University of California, San Diego (UCSD)", snowflake="University of California, San Diego",
+             aliases=("ucsd", "uc san diego")),
+    _college("cmu", "CMU", "Carnegie Mellon University", "CMU", aliases=("cmu", "carnegie mellon")),
+    _college("georgia-tech", "Georgia Tech", "Georgia Institute of Technology", "Gatech",
+             aliases=("georgia tech", "gatech", "ga tech")),
+    _college("uw", "University of Washington", "University of Washington", "UWashington",
+             aliases=("uwashington", "uw seattle", "udub")),
+    _college("usc", "USC", "University of Southern California", "USC", aliases=("usc",)),
+    _college("nyu", "NYU", "New York University", "NYU", qs="New York University (NYU)", aliases=("nyu",)),
+    _college("georgetown", "Georgetown", "Georgetown University", "Georgetown", aliases=("georgetown",)),
+    _college("uva", "University of Virginia", "University of Virginia", "University of Virginia",
+             aliases=("uva", "uvirginia")),
+    _college("umich", "University of Michigan", "University of Michigan", "University of Michigan",
+             qs="University of Michigan-Ann Arbor",
+             aliases=("umich", "u mich", "michigan ann arbor", "university of michigan ann arbor")),
+    _college("bu", "Boston University", "Boston University", "BU", aliases=("bu",)),
+    _college("northeastern", "Northeastern", "Northeastern University", "Northeastern",
+             aliases=("northeastern", "neu")),
+    _college("emory", "Emory", "Emory University", "EmoryUniversity", aliases=("emory", "emoryuniversity")),
+    _college("tufts", "Tufts", "Tufts University", "Tufts", aliases=("tufts", "tuft")),
+    _college("ut-austin", "UT Austin", "University of Texas at Austin", "UtAustin",
+             aliases=("ut austin", "utaustin", "university of texas austin", "texas austin", "university of texas")),
+    _college("ufl", "University of Florida", "University of Florida", "UFL", aliases=("ufl", "uf")),
+    _college("uic", "UIC", "University of Illinois Chicago", "UIC",
+             aliases=("uic", "university of illinois at chicago")),
+    _college("uiuc", "UIUC", "University of Illinois at Urbana-Champaign", "UIUC",
+             aliases=("uiuc", "university of illinois urbana champaign", "illinois urbana champaign")),
+    _college("uncc", "UNC Charlotte", "University of North Carolina Charlotte", "UNCC",
+             aliases=("uncc", "unc charlotte", "university of north carolina at charlotte")),
+    _college("wpi", "WPI", "Worcester Polytechnic Institute", "WPI", aliases=("wpi", "worcester")),
+    _college("vanderbilt", "Vanderbilt", "Vanderbilt University", aliases=("vanderbilt",)),
+    _college("rice", "Rice", "Rice University"),
+    _college("notre-dame", "Notre Dame", "University of Notre Dame", aliases=("notre dame",)),
+    _college("purdue", "Purdue", "Purdue University", aliases=("purdue",)),
+    # Listed so their names aren't read as the colleges above ("Penn State" is not UPenn)
+    _college("penn-state", "Penn State", "Pennsylvania State University", aliases=("penn state", "psu")),
+    _college("ubc", "UBC", "University of British Columbia", aliases=("ubc", "british columbia")),
+    _college("washu", "WashU", "Washington University in St Louis",
+             aliases=("washu", "wustl", "washington university in st louis", "washington university")),
+    _college("michigan-state", "Michigan State", "Michigan State University", aliases=("michigan state", "msu")),
+]
+
+
+# Single-word names that are also everyday words ("brown rice", "duke it out", "bu" as a typo).
+# In running text they only count when capitalised or followed by "university"/"college".
+AMBIGUOUS_NAMES = frozenset({"brown", "rice", "duke", "penn", "bu", "uf"})
+INSTITUTION_WORDS = frozenset({"university", "college"})
+
+
+def _strip(text: str) -> str:
+    # Case-preserving half of normalize_text, so token positions line up with the cased text
+    text = re.sub(r"['’][sS]\b", "", text)
+    text = re.sub(r"(?<=\b[A-Za-z])\.(?=[A-Za-z]\b)", "", text).replace("'", "").replace("’", "")
+    return re.sub(r"\s+", " ", re.sub(r"[^A-Za-z0-9&]+", " ", text)).strip()
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop possessives and punctuation (dotted "M.I.T." -> "mit"), collapse spaces."""
+    return _strip(text).lower()
+
+
+@dataclass(frozen=True)
+class Mention:
+    college: College
+    start: int  # token offsets into normalize_text(text)
+    end: int
+
+
+# ---------- Alias automaton ----------
+class CollegeResolver:
+    """
+    Aho–Corasick automaton over the normalized word sequences of every name,
+    full name, backend name and alias. Matching runs on whole tokens, so
+    aliases only match on word boundaries ("penn" never fires inside
+    "pennsylvania") and one pass over the query finds every alias at once,
+    independent of how many aliases are registered. Overlapping matches are
+    resolved leftmost-longest ("University of California Berkeley" beats
+    "Berkeley", "Penn State" beats "Penn").
+    """
+
+    def __init__(self, colleges: List[College] = COLLEGES):
+        self.colleges = colleges
+        self.by_id: Dict[str, College] = {c.id: c for c in colleges}
+        self.by_pinecone: Dict[str, College] = {c.pinecone: c for c in colleges if c.pinecone}
+        # State 0 is the root; goto[s][token] -> state, out[s] -> [(pattern length, college)]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, College]]] = [[]]
+        for college in colleges:
+            phrases = {college.name, college.full_name, college.snowflake, *college.aliases}
+            if college.pinecone:
+                phrases.add(college.pinecone)
+            for phrase in phrases:
+                self._add(normalize_text(phrase).split(), college)
+        self._link()
+
+    def _add(self, tokens: List[str], college: College):
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            nxt = self._goto[state].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][token] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        if not any(length == len(tokens) for length, _ in self._out[state]):
+            self._out[state].append((len(tokens), college))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(token, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _matches(self, tokens: List[str]) -> List[Tuple[int, int, College]]:
+        """Every (start, end, college) alias occurrence, overlapping ones included."""
+        found = []
+        state = 0
+        for i, token in enumerate(tokens):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for length, college in self._out[state]:
+                found.append((i + 1 - length, i + 1, college))
+        return found
+
+    @staticmethod
+    def _plausible(cased: List[str], start: int, end: int) -> bool:
+        """An ambiguous one-word name counts only as "Brown"/"BU" or before "university"/"college"."""
+        if end - start != 1 or cased[start].lower() not in AMBIGUOUS_NAMES:
+            return True
+        following = cased[end].lower() if end < len(cased) else ""
+        return cased[start][0].isupper() or following in INSTITUTION_WORDS
+
+    def scan(self, text: str, strict: bool = True) -> Tuple[List[Mention], List[Mention]]:
+        """
+        (mentions, doubtful): leftmost-longest college mentions, and the
+        ambiguous lowercase names ("brown rice") that were left out of them.
+        With strict=False every alias counts.
+        """
+        cased = _strip(text).split()
+        matches = sorted(self._matches([token.lower() for token in cased]), key=lambda m: (m[0], -m[1]))
+        mentions, doubtful, covered = [], [], 0
+        for start, end, college in matches:
+            if start < covered:
+                continue
+            if strict and not self._plausible(cased, start, end):
+                doubtful.append(Mention(college, start, end))
+                continue
+            mentions.append(Mention(college, start, end))
+            covered = end
+        return mentions, doubtful
+
+    # ---------- Public API ----------
+    def mentions(self, text: str) -> List[Mention]:
+        """Every college mention in order (repeats included), leftmost-longest."""
+        return self.scan(text)[0]
+
+    def find(self, text: str) -> List[College]:
+        """Distinct colleges mentioned in `text`, in order of first mention."""
+        seen, colleges = set(), []
+        for mention in self.mentions(text):
+            if mention.college.id not in seen:
+                seen.add(mention.college.id)
+                colleges.append(mention.college)
+        return colleges
+
+    def first(self, text: str) -> Optional[College]:
+        mentions = self.mentions(text)
+        return mentions[0].college if mentions else None
+
+    def resolve(self, name: str) -> Optional[College]:
+        """The college whose whole name, backend name or alias is `name` (not a mention inside it)."""
+        tokens = normalize_text(name).split()
+        # A whole string that is a name is unambiguous, whatever its case
+        mentions = self.scan(name, strict=False)[0]
+        if len(mentions) == 1 and mentions[0].start == 0 and mentions[0].end == len(tokens):
+            return mentions[0].college
+        return None
+
+    def get(self, college_id: str) -> Optional[College]:
+        return self.by_id.get(college_id)
+
+
+college_resolver = CollegeResolver()
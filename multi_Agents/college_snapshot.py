@@ -0,0 +1,245 @@
+import os
+import time
+import decimal
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from dotenv import load_dotenv
+from multi_Agents.snowflake_pool import get_pool
+from multi_Agents.college_normalize import normalize_rows, NUMERIC_SHADOW_COLUMNS
+
+load_dotenv()
+
+# ---------- Snapshot configuration ----------
+SNAPSHOT_TABLE = "TOP_30.UNIVERSITY_LIST"
+SNAPSHOT_TTL = float(os.getenv("COLLEGE_SNAPSHOT_TTL", "3600"))
+SNAPSHOT_PARQUET_PATH = os.getenv("COLLEGE_SNAPSHOT_PATH", ".cache/university_list.parquet")
+# Set COLLEGE_SNAPSHOT_ENABLED=false to send every query to Snowflake again
+SNAPSHOT_ENABLED = os.getenv("COLLEGE_SNAPSHOT_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
+def load_from_snowflake() -> List[Dict]:
+    """Default loader: the full college table in one round trip."""
+    return get_pool().execute(f"SELECT * FROM {SNAPSHOT_TABLE}")
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float, decimal.Decimal, np.integer, np.floating)) and not isinstance(value, bool)
+
+
+class SnapshotFrame:
+    """
+    One immutable load of the table: column arrays and validity masks.
+    Queries grab a frame once so a concurrent reload can never mix rows
+    from two loads.
+    """
+
+    def __init__(self, rows: List[Dict], float_columns=()):
+        self.order = list(rows[0].keys()) if rows else []
+        self.num_rows = len(rows)
+        self.columns: Dict[str, np.ndarray] = {}
+        self.valid: Dict[str, np.ndarray] = {}
+        self.integral = set()
+
+        for name in self.order:
+            values = [row.get(name) for row in rows]
+            mask = np.array([v is not None and v == v for v in values], dtype=bool)
+            present = [v for v, ok in zip(values, mask) if ok]
+            if name in float_columns or (present and all(_is_number(v) for v in present)):
+                self.columns[name] = np.array([float(v) if ok else np.nan for v, ok in zip(values, mask)], dtype=np.float64)
+                if present and all(float(v).is_integer() for v in present):
+                    self.integral.add(name)
+            else:
+                self.columns[name] = np.array(values, dtype=object)
+            self.valid[name] = mask
+
+
+class CollegeSnapshot:
+    """
+    In-memory columnar copy of TOP_30.UNIVERSITY_LIST.
+
+    Each column is a NumPy array (float64 when every non-null value is numeric,
+    object otherwise) plus a validity mask, alongside the typed shadow columns
+    from college_normalize, so the handful of query shapes used
+    by the Snowflake agents are answered in-process. When the TTL lapses the
+    current data keeps serving while a background thread reloads it, so
+    Snowflake stays off the request path after the first load. Snapshots are
+    persisted to Parquet for warm starts.
+    """
+
+    def __init__(self, loader=load_from_snowflake, ttl: float = SNAPSHOT_TTL,
+                 parquet_path: Optional[str] = SNAPSHOT_PARQUET_PATH):
+        self._loader = loader
+        self.ttl = ttl
+        self.parquet_path = parquet_path
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._frame = SnapshotFrame([])
+        self.loaded_at: Optional[float] = None
+        self.source: Optional[str] = None
+
+    # ---------- Loading ----------
+    def _build(self, rows: List[Dict], loaded_at: float, source: str):
+        # Normalization happens here, once per load, not once per request
+        frame = SnapshotFrame(normalize_rows(rows), float_columns=NUMERIC_SHADOW_COLUMNS)
+        # Swap in the new frame atomically; readers never see a half-built snapshot
+        with self._lock:
+            self._frame = frame
+            self.loaded_at = loaded_at
+            self.source = source
+        print(f"🗂️ College snapshot loaded from {source}: {frame.num_rows} rows × {len(frame.order)} columns")
+
+    def refresh(self):
+        """Reload from the source table and persist the result for warm starts."""
+        rows = self._loader()
+        self._build(rows, time.time(), "snowflake")
+        self._persist(rows)
+
+    def _persist(self, rows: List[Dict]):
+        if not self.parquet_path:
+            return
+        try:
+            import pandas as pd
+
+            os.makedirs(os.path.dirname(self.parquet_path) or ".", exist_ok=True)
+            tmp_path = f"{self.parquet_path}.tmp"
+            pd.DataFrame(rows).to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self.parquet_path)
+        except Exception as e:
+            print(f"⚠️ Could not persist college snapshot: {e}")
+
+    def _load_parquet(self) -> bool:
+        if not self.parquet_path or not os.path.exists(self.parquet_path):
+            return False
+        try:
+            import pandas as pd
+
+            df = pd.read_parquet(self.parquet_path)
+            rows = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+            self._build(rows, os.path.getmtime(self.parquet_path), "parquet")
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not read college snapshot file: {e}")
+            return False
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ College snapshot refresh failed, serving stale data: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="college-snapshot-refresh", daemon=True).start()
+
+    def ensure_loaded(self):
+        """Load on first use (Parquet first, then Snowflake); refresh in the background once stale."""
+        if self.loaded_at is None:
+            with self._lock:
+                needs_load = self.loaded_at is None
+            if needs_load and not self._load_parquet():
+                self.refresh()
+        if self.ttl > 0 and time.time() - self.loaded_at > self.ttl:
+            self._refresh_in_background()
+
+    def invalidate(self):
+        """Reload now (e.g. after the table was re-ingested); current data keeps serving meanwhile."""
+        if self.loaded_at is None:
+            return
+        self._refresh_in_background()
+
+    def frame(self) -> SnapshotFrame:
+        self.ensure_loaded()
+        with self._lock:
+            return self._frame
+
+    # ---------- Queries ----------
+    def __len__(self) -> int:
+        return self._frame.num_rows
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._frame.order)
+
+    def select(self, columns: Sequence[Union[str, Tuple[str, str]]], not_null: Sequence[str] = (),
+               where: Optional[Callable[[SnapshotFrame], np.ndarray]] = None,
+               order_by: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Equivalent of
+            SELECT <columns> FROM table WHERE <not_null> IS NOT NULL [AND where]
+            ORDER BY <order_by> ASC LIMIT <limit>
+        `where` receives the frame being queried and returns a boolean row mask.
+        A column given as (name, source) is read from `source` and returned
+        under `name` (SELECT source AS name). Returns rows as dicts, like the
+        Snowflake query path.
+        """
+        frame = self.frame()
+        cols, valid = frame.columns, frame.valid
+        pairs = [(c, c) if isinstance(c, str) else tuple(c) for c in columns]
+
+        missing = [c for c in [src for _, src in pairs] + list(not_null) if c not in cols]
+        if missing:
+            raise KeyError(f"Unknown column(s) in {SNAPSHOT_TABLE}: {', '.join(missing)}")
+
+        keep = np.ones(frame.num_rows, dtype=bool) if where is None else np.asarray(where(frame), dtype=bool)
+        for name in not_null:
+            keep = keep & valid[name]
+        idx = np.flatnonzero(keep)
+
+        if order_by:
+            key = cols[order_by][idx]
+            if key.dtype == np.float64:
+                idx = idx[np.argsort(key, kind="stable")]  # NaN sorts last, like NULLS LAST
+            else:
+                order = sorted(range(len(idx)), key=lambda i: (key[i] is None, str(key[i])))
+                idx = idx[np.array(order, dtype=np.intp)]
+        if limit is not None:
+            idx = idx[:limit]
+
+        out_cols = []
+        for name, src in pairs:
+            values = cols[src][idx]
+            if src in frame.integral:
+                values = np.where(valid[src][idx], values, 0).astype(np.int64)
+            out_cols.append((name, values.tolist(), valid[src][idx]))
+        return [
+            {name: (values[i] if ok[i] else None) for name, values, ok in out_cols}
+            for i in range(len(idx))
+        ]
+
+    def find_first(self, column: str, contains: str, columns: Sequence[str]) -> Optional[Dict]:
+        """Equivalent of `WHERE <column> ILIKE '%<contains>%' LIMIT 1`."""
+        needle = contains.lower()
+
+        def where(frame: SnapshotFrame) -> np.ndarray:
+            values, valid = frame.columns[column], frame.valid[column]
+            mask = np.zeros(frame.num_rows, dtype=bool)
+            for i in range(frame.num_rows):
+                if valid[i] and needle in str(values[i]).lower():
+                    mask[i] = True
+                    break
+            return mask
+
+        rows = self.select(columns, where=where)
+        return rows[0] if rows else None
+
+
+# ---------- Shared process-wide snapshot ----------
+_snapshot: Optional[CollegeSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot() -> CollegeSnapshot:
+    global _snapshot
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = CollegeSnapshot()
+    return _snapshot
@@ -1,39 +1,26 @@
-import os
-import re
 from dotenv import load_dotenv
-from typing import List, Dict
-from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer
+from typing import List, Dict, Optional
 from langchain.schema import Document
-from openai import OpenAI
+from multi_Agents.llm_client import complete
+from multi_Agents.backend_limits import limit
+from multi_Agents.college_registry import college_resolver
+from multi_Agents.vector_store import get_vector_store, VECTOR_STORE_BACKEND
+from multi_Agents.college_documents import get_document_store, COLLEGE_DOCS_ENABLED
+from multi_Agents.embedding_cache import embed_query
 
 # ---------- Load environment ----------
 load_dotenv("Agents/.env")
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-PINECONE_INDEX_NAME = "college-recommendations"
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
 
 # ---------- Setup ----------
-embedder = SentenceTransformer(EMBED_MODEL_NAME)
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(PINECONE_INDEX_NAME)
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
-
-# ---------- Normalization ----------
-def normalize(text: str) -> str:
-    return re.sub(r"\s+", "", text.lower().strip())
+# Pinecone index or local memory-mapped store, per VECTOR_STORE_BACKEND
+index = get_vector_store()
 
 # ---------- College Resolver ----------
-def resolve_college(input_name: str, known_colleges: List[str], alias_map: Dict[str, str]) -> str:
-    input_norm = normalize(input_name)
-    for full, alias in alias_map.items():
-        if normalize(full) == input_norm:
-            return alias
-    for college in known_colleges:
-        if normalize(college) == input_norm:
-            return college
-    return None
+def resolve_college(input_name: str) -> Optional[str]:
+    """Pinecone `college_name` for a college name or alias; None when it isn't indexed."""
+    college = college_resolver.resolve(input_name)
+    return college.pinecone if college else None
 
 # ---------- Document Retriever ----------
 class CollegeDocumentRetriever:
@@ -41,59 +28,29 @@ class CollegeDocumentRetriever:
         self._index = pinecone_index
         self._top_k = top_k
 
-        self.known_colleges = [
-            "MIT", "Stanford", "Harvard", "UCLA", "UCSD", "UC Berkeley", "Columbia", "Gatech",
-            "UWashington", "Yale", "Cornell", "CMU", "USC", "Princeton", "Georgetown",
-            "University of Virginia", "BU", "EmoryUniversity", "University of Michigan",
-            "Northeastern", "NEU", "NorthwesternUniversity", "NYU", "UtAustin", "UFL", "UIC", "WPI",
-            "UNCC", "Upenn", "UCBerkeley", "Tufts"
-        ]
-
-        self.alias_map = {
-            "Massachusetts Institute of Technology": "MIT",
-            "Stanford University": "Stanford",
-            "Harvard University": "Harvard",
-            "University of California Los Angeles": "UCLA",
-            "University of California San Diego": "UCSD",
-            "University of California Berkeley": "UC Berkeley",
-            "Georgia Institute of Technology": "Gatech",
-            "University of Washington": "UWashington",
-            "Carnegie Mellon University": "CMU",
-            "University of Southern California": "USC",
-            "New York University": "NYU",
-            "University of Michigan": "University of Michigan",
-            "University of Florida": "UFL",
-            "University of Illinois Chicago": "UIC",
-            "University of North Carolina Charlotte": "UNCC",
-            "University of Texas at Austin": "UtAustin",
-            "University of Virginia": "University of Virginia",
-            "University of Pennsylvania": "Upenn",
-            "Northeastern University": "Northeastern",
-            "NEU": "Northeastern",
-            "Boston University": "BU",
-            "Emory University": "EmoryUniversity",
-            "Tufts University": "Tufts",
-            "Columbia University": "Columbia",
-            "Georgia Tech": "Gatech",
-            "Yale": "YaleUniv",
-            "Worcester Polytechnic Institute": "WPI",
-            "University of Illinois at Urbana-Champaign": "UIUC",
-            "Princeton University": "Princeton",
-            "Cornell University": "Cornell",
-            "Northwestern University": "NorthwesternUniversity"
-        }
-
-    def get_documents_for_college(self, college: str) -> List[Document]:
+    def get_documents_for_college(self, college: str, query: Optional[str] = None) -> List[Document]:
+        """The college's catalog/course chunks most relevant to `query` (local store first)."""
         print(f"📚 Retrieving for: {college}")
-        result = self._index.query(
-            vector=[0.0] * 384,
-            top_k=self._top_k,
-            include_metadata=True,
-            filter={
-                "college_name": {"$eq": college},
-                "type": {"$in": ["catalog", "courses"]}
-            }
-        )
+        query_vector = embed_query(query, model_name=EMBED_MODEL_NAME) if query else None
+        # The local vector store is already in-process; the document cache only fronts Pinecone
+        if COLLEGE_DOCS_ENABLED and VECTOR_STORE_BACKEND != "local":
+            try:
+                store = get_document_store()
+                if store.has_college(college):
+                    return store.get_documents(college, query_vector, top_k=self._top_k)
+            except Exception as e:
+                print(f"⚠️ Local college documents unavailable, querying Pinecone: {e}")
+
+        with limit("pinecone"):
+            result = self._index.query(
+                vector=query_vector.tolist() if query_vector is not None else [0.0] * 384,
+                top_k=self._top_k,
+                include_metadata=True,
+                filter={
+                    "college_name": {"$eq": college},
+                    "type": {"$in": ["catalog", "courses"]}
+                }
+            )
         return [
             Document(
                 page_content=m["metadata"].get("text", ""),
@@ -130,12 +87,7 @@ You have access to the following university course and catalog data:
 Please compare these two colleges thoroughly based on the above prompt.
 """
 
-        response = openai_client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": full_prompt}],
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
+        return complete(full_prompt, model=self.model, temperature=0.7).strip()
 
 # ---------- CLI ----------
 if __name__ == "__main__":
@@ -146,15 +98,15 @@ if __name__ == "__main__":
     clg2_input = input("🏫 Enter second college name: ").strip()
     prompt = input("🔍 What do you want to compare them on?\n> ").strip()
 
-    clg1 = resolve_college(clg1_input, retriever.known_colleges, retriever.alias_map)
-    clg2 = resolve_college(clg2_input, retriever.known_colleges, retriever.alias_map)
+    clg1 = resolve_college(clg1_input)
+    clg2 = resolve_college(clg2_input)
 
     if not clg1 or not clg2:
         print("❌ Unable to resolve one or both college names. Please try again.")
         exit()
 
-    docs1 = retriever.get_documents_for_college(clg1)
-    docs2 = retriever.get_documents_for_college(clg2)
+    docs1 = retriever.get_documents_for_college(clg1, prompt)
+    docs2 = retriever.get_documents_for_college(clg2, prompt)
 
     college_docs = {clg1: docs1, clg2: docs2}
 
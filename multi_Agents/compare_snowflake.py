@@ -1,10 +1,11 @@
-import os
 import re
-import datetime
 from dotenv import load_dotenv
-import snowflake.connector
-from langchain_openai import ChatOpenAI
 from langgraph.graph import Graph
+from multi_Agents.snowflake_pool import get_pool
+from multi_Agents.llm_client import complete
+from multi_Agents.college_snapshot import get_snapshot, SNAPSHOT_ENABLED
+from multi_Agents.filter_compiler import compile_filters
+from multi_Agents.college_normalize import NORMALIZED_VIEW, numeric_select
 
 load_dotenv()
 
@@ -45,27 +46,8 @@ SHORT_COLUMN_NAMES = {
 
 DEFAULT_COLUMNS = list(SHORT_COLUMN_NAMES.keys())
 
-def query_snowflake(query: str) -> list:
-    conn = snowflake.connector.connect(
-        user=os.getenv("SNOWFLAKE_USER"),
-        password=os.getenv("SNOWFLAKE_PASSWORD"),
-        account=os.getenv("SNOWFLAKE_ACCOUNT"),
-        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
-        database=os.getenv("SNOWFLAKE_DATABASE"),
-        schema="TOP_30"
-    )
-    cursor = conn.cursor()
-    cursor.execute(query)
-    results = cursor.fetchall()
-    columns = [col[0] for col in cursor.description]
-    conn.close()
-    return [dict(zip(columns, row)) for row in results]
-
-def parse_date_string(date_str):
-    try:
-        return datetime.datetime.strptime(date_str.strip(), "%B %d")
-    except Exception:
-        return None
+def query_snowflake(query: str, params=None) -> list:
+    return get_pool().execute(query, params)
 
 def parse_numeric_filters(prompt: str):
     filters = []
@@ -102,73 +84,27 @@ def search_compare_data(prompt: str) -> list:
     if check_deadline and "APPLICATION_DEADLINE" not in cols:
         cols.append("APPLICATION_DEADLINE")
 
-    query = f"SELECT {', '.join(cols)} FROM {COLLEGE_TABLE}"
-    results = query_snowflake(query)
+    college_filter = compile_filters(
+        numeric_filters=numeric_filters,
+        gpa=gpa,
+        sat=sat,
+        location_abbr="CA" if "california" in prompt.lower() else "",
+        check_deadline=check_deadline,
+        class_size_ranges=["10 – 20", "10-20"] if "class size" in prompt.lower() and "below" in prompt.lower() else [],
+    )
+
+    numeric_columns = ["UNDERGRADUATE_ENROLLMENT", "MEDIAN_SALARY_AFTER_GRADUATION", "ACCEPTANCE_RATE"]
+    select_columns = numeric_select(cols, numeric_columns)
+
+    if SNAPSHOT_ENABLED:
+        results = get_snapshot().select(select_columns, where=college_filter.mask)
+    else:
+        query, params = college_filter.to_sql(select_columns, NORMALIZED_VIEW)
+        results = query_snowflake(query, params)
 
     for row in results:
         for key in ["UNDERGRADUATE_ENROLLMENT", "MEDIAN_SALARY_AFTER_GRADUATION"]:
-            try:
-                row[key] = float(row[key])
-            except:
-                row[key] = None
-
-        if "ACCEPTANCE_RATE" in row and isinstance(row["ACCEPTANCE_RATE"], str):
-            match = re.search(r"(\d+)", row["ACCEPTANCE_RATE"])
-            row["ACCEPTANCE_RATE"] = int(match.group(1)) if match else None
-
-    if check_deadline:
-        jan15 = datetime.datetime.strptime("January 15", "%B %d")
-        results = [
-            row for row in results
-            if "APPLICATION_DEADLINE" in row and parse_date_string(str(row["APPLICATION_DEADLINE"])) and
-               parse_date_string(str(row["APPLICATION_DEADLINE"])) > jan15
-        ]
-
-    if gpa or sat:
-        filtered = []
-        for row in results:
-            gpa_match = sat_match = False
-            gpa_str = str(row.get("MINIMUM_GPA", "")).strip()
-            match = re.search(r"(\d+(?:\.\d+)?)\s*[-–]?\s*(\d+(?:\.\d+)?)?", gpa_str)
-            if match and gpa:
-                low = float(match.group(1))
-                high = float(match.group(2)) if match.group(2) else low
-                gpa_match = low <= gpa <= high
-            elif gpa_str.replace(".", "", 1).isdigit():
-                gpa_match = gpa >= float(gpa_str)
-
-            sat_str = str(row.get("SAT_RANGE", "")).strip()
-            match = re.search(r"(\d{3,4})\s*[-–]?\s*(\d{3,4})?", sat_str)
-            if match and sat:
-                low = int(match.group(1))
-                high = int(match.group(2)) if match.group(2) else low
-                sat_match = low <= sat <= high
-
-            if gpa_match or sat_match:
-                filtered.append(row)
-        results = filtered
-
-    for col, op, val in numeric_filters:
-        results = [
-            row for row in results
-            if isinstance(row.get(col), (int, float)) and (
-                (op == ">" and row[col] > val) or (op == "<" and row[col] < val)
-            )
-        ]
-
-    if "class size" in prompt.lower() and "below" in prompt.lower():
-        results = [
-            row for row in results
-            if "AVERAGE_CLASS_SIZE" in row and any(
-                limit in row["AVERAGE_CLASS_SIZE"] for limit in ["10 – 20", "10-20"]
-            )
-        ]
-
-    if "california" in prompt.lower():
-        results = [
-            row for row in results
-            if "LOCATION" in row and ", ca" in row["LOCATION"].lower()
-        ]
+            row.setdefault(key, None)
 
     return results
 
@@ -176,14 +112,13 @@ def generate_comparison(prompt: str, data: list) -> str:
     if not data:
         return "❌ No valid comparison found in Snowflake for the given prompt."
 
-    llm = ChatOpenAI(model="gpt-4", temperature=0.3)
     rows = []
     for row in data:
         parts = [f"{SHORT_COLUMN_NAMES.get(k, k)}: {v}" for k, v in row.items() if v]
         rows.append(" | ".join(parts))
     formatted = "\n".join(rows)
 
-    return llm.invoke(
+    return complete(
         f"""You are a helpful assistant.
 Compare the following colleges using only the data below:
 
@@ -192,8 +127,10 @@ Compare the following colleges using only the data below:
 User prompt: {prompt}
 
 Generate a clean, tabular comparison.
-"""
-    ).content
+""",
+        model="gpt-4",
+        temperature=0.3
+    )
 
 # ---------------------- AGENT FLOW ----------------------
 def input_node(state): prompt = input("\n💬 What would you like to compare?\n> "); return {"prompt": prompt}
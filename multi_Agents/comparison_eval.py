@@ -0,0 +1,104 @@
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from statistics import median
+from typing import Dict, List
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from multi_Agents.comparison_extractor import extract_comparison, is_comparison_request
+
+# ---------- Comparison detector regression report ----------
+# Scores the local extractor against comparison_cases.jsonl: decision and
+# college accuracy, aspect recall, how often it defers to the LLM, and
+# per-query latency. The /recommend comparison gate (is_comparison_request)
+# is scored on the same labels. With --llm, deferred cases go through the full
+# ComparisonDetector (needs OPENAI_API_KEY) and are scored too.
+#
+#   python multi_Agents/comparison_eval.py [--cases path] [--llm] [--verbose]
+
+DEFAULT_CASES = Path(__file__).parent / "comparison_cases.jsonl"
+
+
+def load_cases(path: Path) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def score(case: Dict, result: Dict) -> Dict:
+    expected_aspects = set(case["comparison_aspects"])
+    return {
+        "decision": result["is_comparison"] == case["is_comparison"],
+        "colleges": not case["is_comparison"] or result["colleges"] == case["colleges"],
+        "aspect_recall": (len(expected_aspects & set(result["comparison_aspects"])) / len(expected_aspects)
+                          if case["is_comparison"] and expected_aspects else 1.0),
+    }
+
+
+def _pct(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def run(cases: List[Dict], use_llm: bool, verbose: bool):
+    detector = None
+    if use_llm:
+        from multi_Agents.college_compare import ComparisonDetector
+        detector = ComparisonDetector()
+
+    rows, local_ms, llm_ms = [], [], []
+    gate_misses = [case["query"] for case in cases if is_comparison_request(case["query"]) != case["is_comparison"]]
+    for case in cases:
+        start = time.perf_counter()
+        result = extract_comparison(case["query"])
+        local_ms.append((time.perf_counter() - start) * 1000)
+        source = "local"
+        if result is None:
+            source = "deferred"
+            if detector is not None:
+                start = time.perf_counter()
+                result = await detector.detect_with_llm(case["query"])
+                llm_ms.append((time.perf_counter() - start) * 1000)
+                source = "llm"
+        row = {"query": case["query"], "source": source, "result": result}
+        if result is not None:
+            row.update(score(case, result))
+        rows.append(row)
+        if verbose:
+            print(json.dumps(row))
+
+    decided = [r for r in rows if r["result"] is not None]
+    local = [r for r in rows if r["source"] == "local"]
+    print("🏫 Comparison detector regression report")
+    print(f"Cases: {len(rows)}  decided locally: {len(local)}  deferred to LLM: {len(rows) - len(local)}")
+    unexpected = [r["query"] for r, case in zip(rows, cases) if (r["source"] != "local") != bool(case.get("needs_llm"))]
+    if unexpected:
+        print(f"⚠️ Routed differently than labeled (needs_llm): {unexpected}")
+    for label, subset in (("local", local), ("overall", decided)):
+        if not subset:
+            continue
+        print(f"[{label}] decision accuracy: {sum(r['decision'] for r in subset) / len(subset):.1%}  "
+              f"college accuracy: {sum(r['colleges'] for r in subset) / len(subset):.1%}  "
+              f"aspect recall: {sum(r['aspect_recall'] for r in subset) / len(subset):.1%}")
+    print(f"[recommend gate] decision accuracy: {1 - len(gate_misses) / len(cases):.1%}")
+    print(f"Local latency: p50 {median(local_ms):.3f} ms  p95 {_pct(local_ms, 0.95):.3f} ms  max {max(local_ms):.3f} ms")
+    if llm_ms:
+        print(f"LLM latency:   p50 {median(llm_ms):.0f} ms  p95 {_pct(llm_ms, 0.95):.0f} ms")
+    for r in local:
+        if not (r["decision"] and r["colleges"]):
+            print(f"❌ {r['query']!r} -> {r['result']}")
+    for query in gate_misses:
+        print(f"❌ recommend gate: {query!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accuracy/latency report for the comparison detector")
+    parser.add_argument("--cases", type=Path, default=DEFAULT_CASES)
+    parser.add_argument("--llm", action="store_true", help="send deferred cases to the LLM detector")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(load_cases(args.cases), args.llm, args.verbose))
@@ -0,0 +1,129 @@
+import re
+from typing import Dict, List, Optional
+from multi_Agents.college_registry import Mention, college_resolver, normalize_text
+
+# ---------- Local comparison extraction ----------
+# Pulls the compared colleges and aspects out of a question without an LLM:
+# colleges come from the registry's alias automaton, aspects from the vocabulary below.
+# The result has the same shape as ComparisonDetector's LLM answer.
+
+MAX_ASPECTS = 3
+DEFAULT_ASPECT = "overall"
+
+# Canonical aspect -> phrases that signal it (matched on normalized words)
+ASPECT_VOCABULARY: Dict[str, List[str]] = {
+    "computer science": ["computer science", "cs", "comp sci", "software engineering", "programming"],
+    "data science": ["data science", "data analytics", "analytics", "machine learning", "ai", "artificial intelligence"],
+    "engineering": ["engineering", "engineer"],
+    "business": ["business", "mba", "finance", "economics", "management"],
+    "medicine": ["medicine", "medical", "pre med", "premed", "nursing", "biology"],
+    "law": ["law", "pre law", "legal"],
+    "tuition": ["tuition", "cost", "costs", "fees", "fee", "price", "affordable", "affordability", "expensive", "cheaper"],
+    "financial aid": ["financial aid", "scholarship", "scholarships", "aid", "grants"],
+    "acceptance rate": ["acceptance rate", "acceptance", "admission rate", "admit rate", "selectivity",
+                        "admissions", "admission", "harder to get into", "easier to get into"],
+    "test scores": ["sat", "act", "test scores", "gpa"],
+    "rankings": ["ranking", "rankings", "ranked", "rank", "prestige", "reputation"],
+    "career outcomes": ["salary", "salaries", "career", "careers", "job placement", "jobs", "employment",
+                        "outcomes", "placement", "internships", "roi"],
+    "research": ["research", "labs", "faculty"],
+    "campus life": ["campus", "campus life", "student life", "housing", "dorms", "social life", "culture"],
+    "location": ["location", "city", "weather", "climate"],
+    "class size": ["class size", "class sizes", "student faculty ratio", "student to faculty ratio"],
+    "application deadline": ["deadline", "deadlines", "application deadline"],
+    "programs": ["programs", "majors", "courses", "curriculum", "degrees"],
+}
+
+# Cues that a question asks for a comparison at all
+STRONG_CUES_RE = re.compile(r"\b(compare|comparing|comparison|vs|versus|difference between|differences between)\b")
+# Comparative wording that counts once two colleges are named ("is MIT better than Stanford",
+# "which one has lower tuition"); plain "and" never does ("schools like Harvard and Yale")
+COMPARATIVE_RE = re.compile(
+    r"\b(?:better|worse|cheaper|pricier|harder|easier|bigger|smaller|stronger|weaker|higher|lower|more|less)\b.*\bthan\b"
+    r"|\bwhich (?:one|is|has|should|of)\b|\b(?:choose|pick|decide) between\b"
+)
+
+
+def _build_aspect_trie() -> Dict:
+    trie: Dict = {}
+    for aspect, phrases in ASPECT_VOCABULARY.items():
+        for phrase in phrases:
+            node = trie
+            for token in normalize_text(phrase).split():
+                node = node.setdefault(token, {})
+            node.setdefault("\x00", aspect)
+    return trie
+
+
+_ASPECT_TRIE = _build_aspect_trie()
+
+
+def extract_aspects(text: str, limit: int = MAX_ASPECTS) -> List[str]:
+    """Canonical aspects in order of mention (longest phrase wins), at most `limit`."""
+    tokens = normalize_text(text).split()
+    aspects: List[str] = []
+    i = 0
+    while i < len(tokens) and len(aspects) < limit:
+        node, best = _ASPECT_TRIE, None
+        for j in range(i, len(tokens)):
+            node = node.get(tokens[j])
+            if node is None:
+                break
+            if "\x00" in node:
+                best = (j + 1, node["\x00"])
+        if best:
+            if best[1] not in aspects:
+                aspects.append(best[1])
+            i = best[0]
+        else:
+            i += 1
+    return aspects
+
+
+def _compares(text: str, mentions: List[Mention]) -> bool:
+    """An explicit comparison cue, or two named colleges in a comparative shape ("X or Y", "X better than Y")."""
+    if STRONG_CUES_RE.search(text):
+        return True
+    if len({m.college.id for m in mentions}) < 2:
+        return False
+    if COMPARATIVE_RE.search(text):
+        return True
+    # "MIT or Stanford for CS?": "or" directly between two different colleges
+    tokens = text.split()
+    return any(tokens[a.end:b.start] == ["or"] for a, b in zip(mentions, mentions[1:]) if a.college.id != b.college.id)
+
+
+def extract_comparison(query: str) -> Optional[Dict]:
+    """
+    Local answer in the ComparisonDetector shape, or None when the question
+    needs the LLM: it names fewer than two known colleges but looks like a
+    comparison (unlisted or misspelled names), names two without comparing
+    them, or contains an ambiguous lowercase name ("brown rice").
+    """
+    mentions, doubtful = college_resolver.scan(query)
+    if doubtful:
+        return None
+    text = normalize_text(query)
+    colleges = list(dict.fromkeys(m.college.name for m in mentions))
+    if len(colleges) >= 2:
+        if not _compares(text, mentions):
+            return None
+        return {
+            "is_comparison": True,
+            "colleges": colleges[:2],
+            "comparison_aspects": extract_aspects(query) or [DEFAULT_ASPECT],
+        }
+    if not colleges and not STRONG_CUES_RE.search(text):
+        # Nothing to compare and no sign of a comparison ("what's the weather")
+        return {"is_comparison": False, "colleges": [], "comparison_aspects": []}
+    return None
+
+
+def is_comparison_request(query: str) -> bool:
+    """
+    Local-only check for the recommendation workflow: an explicit comparison
+    cue, or two known colleges in a comparative shape ("is MIT better than
+    Stanford", "MIT or Stanford?"). "Better colleges for CS" and "schools
+    like Harvard and Yale" are not comparisons.
+    """
+    return _compares(normalize_text(query), college_resolver.mentions(query))
@@ -0,0 +1,130 @@
+import os
+import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from multi_Agents import model_registry
+
+load_dotenv()
+
+# ---------- Micro-batching configuration ----------
+BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text encode requests into batched calls.
+
+    Requests from any thread or event loop are queued; a dedicated worker
+    thread takes the first pending text, waits at most `max_wait_ms` for up
+    to `max_batch_size - 1` more, encodes them in one call and resolves each
+    caller's future. An idle request therefore waits at most `max_wait_ms`
+    extra, while bursts share one forward pass.
+    """
+
+    def __init__(self, model_name: str = model_registry.DEFAULT_MODEL_NAME,
+                 max_batch_size: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_MAX_WAIT_MS):
+        self.model_name = model_name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "largest_batch": 0, "encode_ms_total": 0.0}
+
+    # ---------- Public API ----------
+    def submit(self, text: str) -> Future:
+        """Queue one text; the returned future resolves to its embedding (np.ndarray)."""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, text: str, timeout: Optional[float] = None):
+        """Blocking encode for worker threads and sync code paths."""
+        return self.submit(text).result(timeout)
+
+    async def aencode(self, text: str):
+        """Awaitable encode that never blocks the event loop."""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches = stats["batches"] or 1
+        return {
+            "requests": stats["requests"],
+            "batches": stats["batches"],
+            "avg_batch_size": round(stats["requests"] / batches, 2),
+            "largest_batch": stats["largest_batch"],
+            "avg_encode_ms": round(stats["encode_ms_total"] / batches, 2),
+            "pending": self._queue.qsize(),
+        }
+
+    # ---------- Worker ----------
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name=f"embedding-batcher-{self.model_name}", daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self) -> List:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Skip callers that already gave up (cancelled futures)
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.monotonic()
+            try:
+                embeddings = model_registry.encode([text for text, _ in batch], model_name=self.model_name)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+            with self._stats_lock:
+                self._stats["requests"] += len(batch)
+                self._stats["batches"] += 1
+                self._stats["largest_batch"] = max(self._stats["largest_batch"], len(batch))
+                self._stats["encode_ms_total"] += (time.monotonic() - started) * 1000
+
+
+# ---------- One batcher per model ----------
+_batchers: Dict[str, EmbeddingBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(model_name: str = model_registry.DEFAULT_MODEL_NAME) -> EmbeddingBatcher:
+    batcher = _batchers.get(model_name)
+    if batcher is None:
+        with _batchers_lock:
+            batcher = _batchers.setdefault(model_name, EmbeddingBatcher(model_name))
+    return batcher
+
+
+def batcher_stats() -> Dict[str, Dict]:
+    return {name: batcher.stats() for name, batcher in list(_batchers.items())}
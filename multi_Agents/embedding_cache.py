@@ -0,0 +1,128 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+import numpy as np
+from dotenv import load_dotenv
+from multi_Agents import model_registry
+from multi_Agents.embedding_batcher import get_batcher
+
+load_dotenv()
+
+# ---------- Cache configuration ----------
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+# Optional on-disk tier (SQLite); leave empty to keep the cache in memory only
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "")
+
+
+def normalize_query(text: str) -> str:
+    """Cache key normalization: case, surrounding and repeated whitespace are ignored."""
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+class EmbeddingCache:
+    """
+    LRU cache of query embeddings keyed by model name + normalized text,
+    with an optional SQLite tier so repeated prompts survive restarts.
+    Vectors are stored as float32 (1.5 KB for a 384-dim MiniLM embedding).
+    """
+
+    def __init__(self, max_entries: int = EMBED_CACHE_SIZE, disk_path: str = EMBED_CACHE_PATH):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, model TEXT, vector BLOB)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _key(model_name: str, text: str) -> str:
+        return hashlib.sha1(f"{model_name}\x00{normalize_query(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        key = self._key(model_name, text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return vector
+            if self._db is not None:
+                row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    vector = np.frombuffer(row[0], dtype=np.float32)
+                    self._remember(key, vector)
+                    self._hits += 1
+                    self._disk_hits += 1
+                    return vector
+            self._misses += 1
+            return None
+
+    def put(self, model_name: str, text: str, vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        key = self._key(model_name, text)
+        with self._lock:
+            self._remember(key, vector)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                    (key, model_name, vector.tobytes())
+                )
+                self._db.commit()
+        return vector
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+embedding_cache = EmbeddingCache()
+
+
+# ---------- Cached query embedding ----------
+def embed_query(text: str, model_name: str = model_registry.DEFAULT_MODEL_NAME) -> np.ndarray:
+    """Embed one query, hitting the cache first and the micro-batcher on a miss."""
+    vector = embedding_cache.get(model_name, text)
+    if vector is None:
+        vector = embedding_cache.put(model_name, text, get_batcher(model_name).encode(text))
+    return vector
+
+
+async def aembed_query(text: str, model_name: str = model_registry.DEFAULT_MODEL_NAME) -> np.ndarray:
+    """Async embed_query: cache first, then the micro-batcher without blocking the loop."""
+    vector = embedding_cache.get(model_name, text)
+    if vector is None:
+        vector = embedding_cache.put(model_name, text, await get_batcher(model_name).aencode(text))
+    return vector
@@ -0,0 +1,115 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from multi_Agents.college_snapshot import SnapshotFrame
+from multi_Agents.college_normalize import NUMERIC_SHADOWS
+
+# Filters read the typed shadow columns from college_normalize, both in the
+# snapshot and in the Snowflake normalized view, so no value is parsed here.
+
+JAN_15_DOY = 15
+
+# ---------- Compiled filter ----------
+@dataclass
+class CollegeFilter:
+    """
+    Structured WHERE clause built from the prompt parsers.
+
+    The same filter renders to bound-parameter SQL over the normalized view
+    (`to_sql`) or is evaluated as a vectorized mask over the local snapshot
+    (`mask`), so both data paths return the same rows.
+    """
+    numeric: List[Tuple[str, str, float]] = field(default_factory=list)
+    gpa: Optional[float] = None
+    sat: Optional[int] = None
+    location_abbr: str = ""
+    deadline_after_doy: Optional[int] = None
+    class_size_ranges: Tuple[str, ...] = ()
+
+    # ---------- SQL pushdown ----------
+    def where_sql(self) -> Tuple[List[str], List]:
+        clauses, params = [], []
+        for col, op, val in self.numeric:
+            clauses.append(f"{col} {op} %s")
+            params.append(val)
+        if self.deadline_after_doy is not None:
+            clauses.append("DEADLINE_DOY > %s")
+            params.append(self.deadline_after_doy)
+        academic = []
+        if self.gpa:
+            academic.append("GPA_MIN <= %s")
+            params.append(self.gpa)
+        if self.sat:
+            academic.append("(SAT_LOW <= %s AND SAT_HIGH >= %s)")
+            params.extend([self.sat, self.sat])
+        if academic:
+            clauses.append("(" + " OR ".join(academic) + ")")
+        if self.class_size_ranges:
+            clauses.append("(" + " OR ".join("CONTAINS(AVERAGE_CLASS_SIZE, %s)" for _ in self.class_size_ranges) + ")")
+            params.extend(self.class_size_ranges)
+        if self.location_abbr:
+            clauses.append("STATE_ABBR = %s")
+            params.append(self.location_abbr)
+        return clauses, params
+
+    def to_sql(self, columns: Sequence, table: str, not_null: Sequence[str] = (),
+               order_by: Optional[str] = None, limit: Optional[int] = None) -> Tuple[str, tuple]:
+        """
+        Render a full SELECT against `table` (the normalized view). Column names
+        come from fixed mappings, (name, source) pairs render as `source AS name`,
+        and every value is a bound parameter.
+        """
+        clauses, params = self.where_sql()
+        clauses = [f"{col} IS NOT NULL" for col in not_null] + clauses
+        select_list = [c if isinstance(c, str) else f"{c[1]} AS {c[0]}" for c in columns]
+        query = f"SELECT {', '.join(select_list)} FROM {table}"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        if order_by:
+            query += f" ORDER BY {order_by} ASC"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return query, tuple(params)
+
+    # ---------- Local evaluation ----------
+    def mask(self, frame: SnapshotFrame) -> np.ndarray:
+        keep = np.ones(frame.num_rows, dtype=bool)
+        # NaN compares False, matching SQL NULL semantics
+        with np.errstate(invalid="ignore"):
+            cols = frame.columns
+            for col, op, val in self.numeric:
+                keep &= cols[col] > val if op == ">" else cols[col] < val
+            if self.deadline_after_doy is not None:
+                keep &= cols["DEADLINE_DOY"] > self.deadline_after_doy
+            if self.gpa or self.sat:
+                academic = np.zeros(frame.num_rows, dtype=bool)
+                if self.gpa:
+                    academic |= cols["GPA_MIN"] <= self.gpa
+                if self.sat:
+                    academic |= (cols["SAT_LOW"] <= self.sat) & (cols["SAT_HIGH"] >= self.sat)
+                keep &= academic
+        if self.class_size_ranges:
+            sizes, valid = frame.columns["AVERAGE_CLASS_SIZE"], frame.valid["AVERAGE_CLASS_SIZE"]
+            keep &= np.array([
+                ok and any(r in str(size) for r in self.class_size_ranges)
+                for size, ok in zip(sizes, valid)
+            ], dtype=bool)
+        if self.location_abbr:
+            keep &= frame.columns["STATE_ABBR"] == self.location_abbr
+        return keep
+
+def compile_filters(numeric_filters: Sequence[Tuple[str, str, float]] = (), gpa: Optional[float] = None,
+                    sat: Optional[int] = None, location_abbr: str = "", check_deadline: bool = False,
+                    class_size_ranges: Sequence[str] = ()) -> CollegeFilter:
+    """
+    Turn the prompt parsers' output (parse_numeric_filters, extract_gpa_and_sat,
+    extract_location_state_abbr, the deadline check) into a CollegeFilter.
+    """
+    return CollegeFilter(
+        numeric=[(NUMERIC_SHADOWS[col], op, val) for col, op, val in numeric_filters if col in NUMERIC_SHADOWS],
+        gpa=gpa,
+        sat=sat,
+        location_abbr=location_abbr,
+        deadline_after_doy=JAN_15_DOY if check_deadline else None,
+        class_size_ranges=tuple(class_size_ranges),
+    )
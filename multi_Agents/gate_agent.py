@@ -1,10 +1,13 @@
 import asyncio
 import logging
+from collections import deque
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Deque, Dict, Optional
 from newintent.dynamic_handler import DynamicIntentHandler
 from newintent.safety_system import SafetySystem
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
+from multi_Agents.model_registry import encode
+from multi_Agents.embedding_cache import aembed_query
 
 # Setup logging
 logging.basicConfig(
@@ -13,12 +16,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Turns of context the safety check and the fallback handler look back over
+HISTORY_LIMIT = 20
+
+
+def new_history() -> Deque[Dict]:
+    """Per-session ring buffer of gatekeeper turns; the oldest turn drops off in O(1)."""
+    return deque(maxlen=HISTORY_LIMIT)
+
+
 class CollegeRecommender:
     def __init__(self):
         self.safety_system = SafetySystem()
         self.dynamic_handler = DynamicIntentHandler()
-        self.conversation_history: List[Dict] = []
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        # No history is kept here: one instance serves every session, so each
+        # caller passes its own buffer from new_history()
+        self.model_name = 'all-MiniLM-L6-v2'
         self.college_examples = [
             "Which universities offer data science in California?",
             "What's the tuition fee for Stanford?",
@@ -26,16 +39,24 @@ class CollegeRecommender:
             "I have a 3.8 GPA, what colleges can I get into?",
             "Best colleges for computer science in the US"
         ]
-        self.college_embeddings = self.model.encode(self.college_examples, convert_to_tensor=True)
+        self._college_embeddings = None
 
-    async def handle_query(self, query: str) -> Dict:
+    @property
+    def college_embeddings(self):
+        # Encoded on first classification instead of at construction/import time
+        if self._college_embeddings is None:
+            self._college_embeddings = encode(self.college_examples, model_name=self.model_name, convert_to_tensor=True)
+        return self._college_embeddings
+
+    async def handle_query(self, query: str, history: Optional[Deque[Dict]] = None) -> Dict:
+        history = new_history() if history is None else history
         logger.info(f"Query: {query}")
-        classification = await self.check_and_classify_query(query)
+        classification = await self.check_and_classify_query(query, history)
         logger.info(f"College-related: {classification['is_college_related']}")
 
         if classification["context"] == "college":
-            response = await self._handle_college_query(query)
-            self._update_history(query, response, "college_response")
+            response = await self._handle_college_query(query, history)
+            self._update_history(history, query, response, "college_response")
             return self._build_response(response)
 
         return self._build_response(
@@ -43,7 +64,7 @@ class CollegeRecommender:
             {"context": classification["context"]}
         )
 
-    async def _handle_college_query(self, query: str) -> str:
+    async def _handle_college_query(self, query: str, history: Deque[Dict]) -> str:
         mock_responses = {
             "tuition": "Average tuition is $35,000/year for private colleges.",
             "engineering": "Top engineering schools: MIT, Stanford, UC Berkeley",
@@ -55,30 +76,27 @@ class CollegeRecommender:
             if keyword in query_lower:
                 return response
 
-        return await self.dynamic_handler.handle_unknown(
-            query,
-            self.conversation_history
-        )
+        return await self.dynamic_handler.handle_unknown(query, history)
 
-    def _is_college_related(self, query: str) -> bool:
-        query_embedding = self.model.encode(query, convert_to_tensor=True)
+    async def _is_college_related(self, query: str) -> bool:
+        # Cached per normalized prompt, so the RAG retriever reuses this embedding;
+        # misses go through the micro-batcher so concurrent requests share a forward pass
+        query_embedding = await aembed_query(query, model_name=self.model_name)
         similarity_scores = util.cos_sim(query_embedding, self.college_embeddings)
         max_score = float(similarity_scores.max())
         logger.debug(f"Max semantic similarity score: {max_score}")
         return max_score > 0.5
 
-    def _update_history(self, query: str, response: str, context: str):
-        self.conversation_history.append({
+    @staticmethod
+    def _update_history(history: Deque[Dict], query: str, response: str, context: str):
+        history.append({
             "timestamp": datetime.now().isoformat(),
             "query": query,
             "response": response,
             "context": context,
-            "turns": len(self.conversation_history) + 1
+            "turns": history[-1]["turns"] + 1 if history else 1
         })
 
-        if len(self.conversation_history) > 20:
-            self.conversation_history.pop(0)
-
     def _build_response(self, message: str, metadata: Optional[Dict] = None) -> Dict:
         return {
             "response": message,
@@ -86,7 +104,9 @@ class CollegeRecommender:
             "metadata": metadata or {}
         }
 
-    async def check_and_classify_query(self, query: str) -> Dict:
+    async def check_and_classify_query(self, query: str, history: Optional[Deque[Dict]] = None) -> Dict:
+        """Safety and relevance gate; blocked and off-topic turns are recorded in `history`."""
+        history = new_history() if history is None else history
         if not query.strip():
             return {
                 "is_college_related": False,
@@ -96,9 +116,9 @@ class CollegeRecommender:
             }
 
         try:
-            safety_result = await self.safety_system.check_query(query, self.conversation_history)
+            safety_result = await self.safety_system.check_query(query, history)
             if not safety_result["safe"]:
-                self._update_history(query, safety_result["response"], "safety_block")
+                self._update_history(history, query, safety_result["response"], "safety_block")
                 return {
                     "is_college_related": False,
                     "safety_check_passed": False,
@@ -114,10 +134,10 @@ class CollegeRecommender:
             }
 
         try:
-            is_college = self._is_college_related(query)
+            is_college = await self._is_college_related(query)
             if not is_college:
-                general_response = await self.dynamic_handler.handle_unknown(query, self.conversation_history)
-                self._update_history(query, general_response, "general")
+                general_response = await self.dynamic_handler.handle_unknown(query, history)
+                self._update_history(history, query, general_response, "general")
                 return {
                     "is_college_related": False,
                     "safety_check_passed": True,
@@ -142,6 +162,7 @@ class CollegeRecommender:
 
 async def interactive_demo():
     agent = CollegeRecommender()
+    history = new_history()
     print("College Recommendation Assistant (type 'quit' to exit)\n")
 
     while True:
@@ -150,7 +171,7 @@ async def interactive_demo():
             if query.lower() in {'quit', 'exit'}:
                 break
 
-            response = await agent.handle_query(query)
+            response = await agent.handle_query(query, history)
             print(f"Assistant: {response['response']}\n")
 
         except KeyboardInterrupt:
@@ -0,0 +1,239 @@
+import os
+import re
+import math
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from multi_Agents import model_registry
+from multi_Agents.vector_store import VECTOR_STORE_BACKEND, get_vector_store, metadata_matches
+from multi_Agents.college_documents import get_document_store, COLLEGE_DOCS_ENABLED
+
+load_dotenv()
+
+# ---------- Hybrid retrieval configuration ----------
+# Dense (MiniLM) matches are fused with BM25 matches over the same chunks by
+# reciprocal-rank fusion, then a cross-encoder keeps only the chunks that are
+# actually relevant, so exact course codes/titles are found and GPT sees less noise.
+
+HYBRID_RETRIEVAL_ENABLED = os.getenv("HYBRID_RETRIEVAL_ENABLED", "true").lower() in ("1", "true", "yes")
+HYBRID_DENSE_CANDIDATES = int(os.getenv("HYBRID_DENSE_CANDIDATES", "30"))
+HYBRID_SPARSE_CANDIDATES = int(os.getenv("HYBRID_SPARSE_CANDIDATES", "30"))
+RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() in ("1", "true", "yes")
+# Fused candidates scored by the cross-encoder
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "16"))
+# ms-marco cross-encoders emit logits: > 0 reads as relevant
+RERANK_MIN_SCORE = float(os.getenv("RERANK_MIN_SCORE", "0.0"))
+# Never hand the LLM fewer chunks than this, however low they score
+RERANK_MIN_KEEP = int(os.getenv("RERANK_MIN_KEEP", "2"))
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i", "in",
+    "is", "it", "me", "my", "of", "on", "or", "that", "the", "this", "to", "what", "which", "with", "you",
+}
+# "CS 5800", "CS-5800" and "cs5800" all produce the token "cs5800"
+COURSE_CODE_RE = re.compile(r"\b([a-z]{2,5})\s*-?\s*(\d{3,5}[a-z]?)\b")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word and number tokens without stopwords, plus one joined token per course code."""
+    text = (text or "").lower()
+    tokens = [t for t in re.findall(r"[a-z]+|\d+", text) if t not in STOPWORDS]
+    tokens.extend(subject + number for subject, number in COURSE_CODE_RE.findall(text))
+    return tokens
+
+
+# ---------- BM25 ----------
+class BM25Index:
+    """Okapi BM25 over chunk text with an in-memory inverted index (token -> rows, term frequencies)."""
+
+    def __init__(self, chunks: List[Dict], k1: float = BM25_K1, b: float = BM25_B):
+        self.chunks = chunks
+        self.k1 = k1
+        postings: Dict[str, Dict[int, int]] = {}
+        lengths = np.zeros(len(chunks), dtype=np.float32)
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for row, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk.get("text", "")))
+            lengths[row] = sum(counts.values())
+            for token, tf in counts.items():
+                postings.setdefault(token, {})[row] = tf
+            metadata = chunk.get("metadata") or {}
+            groups.setdefault((metadata.get("college_name"), metadata.get("type")), []).append(row)
+
+        n = len(chunks)
+        avg_length = float(lengths.mean()) if n else 1.0
+        # Per-row length normalisation, precomputed once: k1 * (1 - b + b * len / avg)
+        self._norm = k1 * (1 - b + b * lengths / (avg_length or 1.0))
+        self._postings = {
+            token: (np.fromiter(rows.keys(), dtype=np.int64, count=len(rows)),
+                    np.fromiter(rows.values(), dtype=np.float32, count=len(rows)))
+            for token, rows in postings.items()
+        }
+        self._idf = {token: math.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5)) for token, rows in postings.items()}
+        self._groups = {key: np.asarray(rows, dtype=np.int64) for key, rows in groups.items()}
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def _allowed(self, filter: Dict) -> np.ndarray:
+        mask = np.zeros(len(self.chunks), dtype=bool)
+        if set(filter) <= {"college_name", "type"}:
+            for (college, doc_type), rows in self._groups.items():
+                if metadata_matches({"college_name": college, "type": doc_type}, filter):
+                    mask[rows] = True
+        else:
+            for row, chunk in enumerate(self.chunks):
+                mask[row] = metadata_matches(chunk.get("metadata") or {}, filter)
+        return mask
+
+    def search(self, query: str, top_k: int, filter: Optional[Dict] = None) -> List[Tuple[int, float]]:
+        """(row, score) of the best `top_k` chunks passing `filter`, best first."""
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        for token in set(tokenize(query)):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            rows, tf = posting
+            scores[rows] += self._idf[token] * tf * (self.k1 + 1) / (tf + self._norm[rows])
+        if filter:
+            scores[~self._allowed(filter)] = 0.0
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > top_k:
+            hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+        hits = hits[np.argsort(-scores[hits])]
+        return [(int(row), float(scores[row])) for row in hits]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank). Best first."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: -pair[1])
+
+
+# ---------- Hybrid retriever ----------
+class HybridRetrieval:
+    """
+    Second stage behind a dense index query. BM25 runs over the chunks the
+    process already holds in memory: the local vector store, or the college
+    document cache in front of Pinecone. The index is rebuilt whenever that
+    corpus is reloaded. Retrieval never loads the document cache itself: until
+    it is loaded (at startup), or without a local corpus, only the dense
+    ranking is reranked.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bm25: Optional[BM25Index] = None
+        self._bm25_key = None
+        self._counts = Counter()
+
+    def _corpus(self):
+        if VECTOR_STORE_BACKEND == "local":
+            store = get_vector_store()
+            return ("local", store.version), store.chunks
+        if COLLEGE_DOCS_ENABLED:
+            # Only a frame that is already loaded; pulling the index here would stall the request
+            frame = get_document_store().current_frame()
+            if frame.loaded_at is None:
+                return None, None
+            return ("documents", frame.loaded_at), lambda: frame.chunks
+        return None, None
+
+    def bm25(self) -> Optional[BM25Index]:
+        key, load_chunks = self._corpus()
+        if key is None:
+            return None
+        if self._bm25_key != key:
+            with self._lock:
+                if self._bm25_key != key:
+                    self._bm25 = BM25Index(load_chunks())
+                    self._bm25_key = key
+                    print(f"🔤 Built BM25 index over {len(self._bm25)} chunks")
+        return self._bm25
+
+    def warmup(self):
+        """Build the BM25 index up front (after the document cache is loaded) so no request pays for it."""
+        self.bm25()
+
+    def search(self, query: str, dense_matches: Sequence, filter: Optional[Dict] = None,
+               top_k: int = 8) -> List[Dict]:
+        """
+        Fuse `dense_matches` (index query matches, best first) with BM25 hits
+        under the same filter, rerank, and return at most `top_k` matches as
+        {"id", "metadata"}, best first.
+        """
+        candidates: Dict[str, Dict] = {}
+        dense_ranking = []
+        for match in dense_matches:
+            candidates[match["id"]] = match["metadata"]
+            dense_ranking.append(match["id"])
+
+        sparse_ranking = []
+        try:
+            bm25 = self.bm25()
+            if bm25 is not None:
+                for row, _ in bm25.search(query, HYBRID_SPARSE_CANDIDATES, filter):
+                    chunk = bm25.chunks[row]
+                    candidates.setdefault(chunk["id"], chunk["metadata"])
+                    sparse_ranking.append(chunk["id"])
+        except Exception as e:
+            print(f"⚠️ BM25 search failed, using dense ranking only: {e}")
+            self._count("bm25_failures")
+
+        ranked = [item for item, _ in reciprocal_rank_fusion([dense_ranking, sparse_ranking])]
+        if RERANK_ENABLED and ranked:
+            ranked = self._rerank(query, ranked[:RERANK_CANDIDATES], candidates, top_k)
+        else:
+            ranked = ranked[:top_k]
+
+        with self._lock:
+            self._counts["retrievals"] += 1
+            self._counts["candidates"] += len(candidates)
+            self._counts["kept"] += len(ranked)
+            self._counts["sparse_only_kept"] += len(set(ranked) - set(dense_ranking))
+        return [{"id": item, "metadata": candidates[item]} for item in ranked]
+
+    def _rerank(self, query: str, ids: List[str], candidates: Dict[str, Dict], top_k: int) -> List[str]:
+        try:
+            scores = model_registry.rerank_scores(query, [candidates[item].get("text", "") for item in ids])
+        except Exception as e:
+            print(f"⚠️ Rerank failed, keeping fused order: {e}")
+            self._count("rerank_failures")
+            return ids[:top_k]
+        order = sorted(zip(ids, scores), key=lambda pair: -pair[1])
+        kept = [item for item, score in order if score >= RERANK_MIN_SCORE][:top_k]
+        if len(kept) < RERANK_MIN_KEEP:
+            kept = [item for item, _ in order[:min(RERANK_MIN_KEEP, top_k)]]
+        return kept
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+            indexed = len(self._bm25) if self._bm25 is not None else 0
+        retrievals = counts.get("retrievals", 0)
+        return {
+            "enabled": HYBRID_RETRIEVAL_ENABLED,
+            "rerank_enabled": RERANK_ENABLED,
+            "bm25_chunks": indexed,
+            "retrievals": retrievals,
+            "avg_candidates": round(counts.get("candidates", 0) / retrievals, 2) if retrievals else 0.0,
+            "avg_kept": round(counts.get("kept", 0) / retrievals, 2) if retrievals else 0.0,
+            "sparse_only_kept": counts.get("sparse_only_kept", 0),
+            "bm25_failures": counts.get("bm25_failures", 0),
+            "rerank_failures": counts.get("rerank_failures", 0),
+        }
+
+
+hybrid_retrieval = HybridRetrieval()
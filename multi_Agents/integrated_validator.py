@@ -1,16 +1,19 @@
 import os
-from typing import Dict, Optional
+import asyncio
+from typing import Callable, Dict, Optional
 from dotenv import load_dotenv
-from openai import OpenAI
 from multi_Agents.compare_snowflake import search_compare_data, generate_comparison
-from multi_Agents.compareRAG import CollegeDocumentRetriever, GPT4CollegeComparator, resolve_college, index
+from multi_Agents.compareRAG import CollegeDocumentRetriever, GPT4CollegeComparator, index
+from multi_Agents.college_registry import college_resolver
+from multi_Agents.llm_client import complete, acomplete, astream
 
 # ---------- Load environment ----------
 load_dotenv("Agents/.env")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# ---------- Setup ----------
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+# Total wall-clock budget (seconds) for one acompare_validate call
+COMPARE_BUDGET = float(os.getenv("COMPARE_BUDGET", "60"))
+# Slice of that budget kept back for the final GPT-4 merge (at most half the budget)
+MERGE_RESERVE = float(os.getenv("COMPARE_MERGE_RESERVE", "15"))
 
 # ---------- Custom Exceptions ----------
 class ComparisonValidationError(Exception):
@@ -34,32 +37,88 @@ def _get_snowflake_response(prompt: str) -> Optional[str]:
         raise ValidationProcessingError(f"Snowflake agent error: {str(e)}")
 
 # ---------- RAG Agent ----------
+def _resolve_compared_colleges(prompt: str):
+    # The first two colleges mentioned, as Pinecone names; RAG needs documents for both
+    found = college_resolver.find(prompt)
+    if len(found) < 2 or not found[0].pinecone or not found[1].pinecone:
+        return None
+    return found[0].pinecone, found[1].pinecone
+
 def _get_rag_response(prompt: str) -> Optional[str]:
     try:
         retriever = CollegeDocumentRetriever(index)
         comparator = GPT4CollegeComparator()
 
-        # Simple extraction of two college names (first and second occurrence)
-        prompt_lower = prompt.lower()
-        found = [c for c in retriever.known_colleges if c.lower() in prompt_lower]
-        if len(found) < 2:
+        colleges = _resolve_compared_colleges(prompt)
+        if not colleges:
             return None
+        clg1_resolved, clg2_resolved = colleges
 
-        clg1_resolved = resolve_college(found[0], retriever.known_colleges, retriever.alias_map)
-        clg2_resolved = resolve_college(found[1], retriever.known_colleges, retriever.alias_map)
+        docs1 = retriever.get_documents_for_college(clg1_resolved, prompt)
+        docs2 = retriever.get_documents_for_college(clg2_resolved, prompt)
+        college_docs = {clg1_resolved: docs1, clg2_resolved: docs2}
 
-        if not clg1_resolved or not clg2_resolved:
+        return comparator.compare(clg1_resolved, clg2_resolved, prompt, college_docs)
+    except Exception as e:
+        raise ValidationProcessingError(f"RAG agent error: {str(e)}")
+
+async def _aget_rag_response(prompt: str) -> Optional[str]:
+    """Async RAG agent: both colleges' documents are fetched concurrently."""
+    try:
+        retriever = CollegeDocumentRetriever(index)
+        comparator = GPT4CollegeComparator()
+
+        colleges = _resolve_compared_colleges(prompt)
+        if not colleges:
             return None
+        clg1_resolved, clg2_resolved = colleges
 
-        docs1 = retriever.get_documents_for_college(clg1_resolved)
-        docs2 = retriever.get_documents_for_college(clg2_resolved)
+        docs1, docs2 = await asyncio.gather(
+            asyncio.to_thread(retriever.get_documents_for_college, clg1_resolved, prompt),
+            asyncio.to_thread(retriever.get_documents_for_college, clg2_resolved, prompt),
+        )
         college_docs = {clg1_resolved: docs1, clg2_resolved: docs2}
 
-        return comparator.compare(clg1_resolved, clg2_resolved, prompt, college_docs)
+        return await asyncio.to_thread(comparator.compare, clg1_resolved, clg2_resolved, prompt, college_docs)
     except Exception as e:
         raise ValidationProcessingError(f"RAG agent error: {str(e)}")
 
 # ---------- Validator Agent ----------
+def _build_combined_prompt(prompt: str, snowflake_output: Optional[str], rag_output: Optional[str]) -> str:
+    return f"""
+You are a university comparison validator.
+
+USER PROMPT:
+{prompt}
+
+SNOWFLAKE AGENT OUTPUT:
+{snowflake_output if snowflake_output else '[No result]'}
+
+RAG AGENT OUTPUT:
+{rag_output if rag_output else '[No result]'}
+
+TASK:
+Review the outputs. If either contains relevant comparison information, combine them and return a clean, helpful comparison.
+If neither provides relevant data, return an empty string.
+"""
+
+def _clean_validated_content(content: str) -> str:
+    validated_content = content.strip()
+    if validated_content in ('""', "''"):
+        validated_content = ""
+    if not validated_content:
+        raise NoRelevantDataError("Validator returned empty content")
+    return validated_content
+
+def _source_label(snowflake_output: Optional[str], rag_output: Optional[str]) -> Optional[str]:
+    # Determine which sources contributed
+    sources = []
+    if snowflake_output:
+        sources.append("snowflake")
+    if rag_output:
+        sources.append("rag")
+    return 'both' if len(sources) == 2 else sources[0] if sources else None
+
 def compare_validate(prompt: str) -> Dict[str, Optional[str]]:
     """
     Enhanced comparison validator that returns structured results
@@ -83,53 +142,88 @@ def compare_validate(prompt: str) -> Dict[str, Optional[str]]:
         if not snowflake_output and not rag_output:
             raise NoRelevantDataError("Neither agent provided relevant comparison data")
 
-        combined_prompt = f"""
-You are a university comparison validator.
+        content = complete(
+            _build_combined_prompt(prompt, snowflake_output, rag_output), model="gpt-4", temperature=0.5
+        )
 
-USER PROMPT:
-{prompt}
+        result.update({
+            'content': _clean_validated_content(content),
+            'source': _source_label(snowflake_output, rag_output)
+        })
 
-SNOWFLAKE AGENT OUTPUT:
-{snowflake_output if snowflake_output else '[No result]'}
+    except NoRelevantDataError as e:
+        result['error'] = str(e)
+    except Exception as e:
+        result['error'] = f"Validation processing error: {str(e)}"
+    
+    return result
 
-RAG AGENT OUTPUT:
-{rag_output if rag_output else '[No result]'}
+def _remaining(deadline: float) -> float:
+    return max(0.0, deadline - asyncio.get_running_loop().time())
 
-TASK:
-Review the outputs. If either contains relevant comparison information, combine them and return a clean, helpful comparison.
-If neither provides relevant data, return an empty string.
-"""
+async def _within_budget(name: str, awaitable, deadline: float) -> Optional[str]:
+    """Await one agent inside the shared budget; failures degrade to None."""
+    try:
+        return await asyncio.wait_for(awaitable, _remaining(deadline))
+    except asyncio.TimeoutError:
+        print(f"⏱️ {name} agent cancelled — comparison budget exhausted")
+    except ComparisonValidationError as e:
+        print(f"❌ {e}")
+    return None
+
+async def acompare_validate(prompt: str, budget: float = COMPARE_BUDGET,
+                            on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Optional[str]]:
+    """
+    Async counterpart of compare_validate.
+
+    The Snowflake and RAG agents run concurrently within `budget` minus a
+    merge reserve, so a hung agent can't starve the final GPT-4 call. An agent
+    that errors or is still pending at its deadline is dropped, and validation
+    continues with whatever the other agent produced. If the merge itself runs
+    out of time, the surviving agent's text is returned unmerged. Returns the
+    same dict as compare_validate.
+    """
+    result = {
+        'content': None,
+        'source': None,
+        'error': None
+    }
+    deadline = asyncio.get_running_loop().time() + budget
+    agent_deadline = deadline - min(MERGE_RESERVE, budget / 2)
+    snowflake_output = rag_output = None
 
-        response = openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": combined_prompt}],
-            temperature=0.5
+    try:
+        snowflake_output, rag_output = await asyncio.gather(
+            _within_budget("Snowflake", asyncio.to_thread(_get_snowflake_response, prompt), agent_deadline),
+            _within_budget("RAG", _aget_rag_response(prompt), agent_deadline),
         )
-        
-        validated_content = response.choices[0].message.content.strip()
-        if validated_content in ('""', "''"):
-            validated_content = ""
-        
-        if not validated_content:
-            raise NoRelevantDataError("Validator returned empty content")
-
-        # Determine which sources contributed
-        sources = []
-        if snowflake_output:
-            sources.append("snowflake")
-        if rag_output:
-            sources.append("rag")
-        
+
+        if not snowflake_output and not rag_output:
+            raise NoRelevantDataError("Neither agent provided relevant comparison data")
+
+        validation_prompt = _build_combined_prompt(prompt, snowflake_output, rag_output)
+        # Streamed to `on_token` (SSE endpoints) when a sink is supplied
+        validation_call = (astream(validation_prompt, on_token, model="gpt-4", temperature=0.5) if on_token
+                           else acomplete(validation_prompt, model="gpt-4", temperature=0.5))
+        content = await asyncio.wait_for(validation_call, _remaining(deadline))
+
         result.update({
-            'content': validated_content,
-            'source': 'both' if len(sources) == 2 else sources[0] if sources else None
+            'content': _clean_validated_content(content),
+            'source': _source_label(snowflake_output, rag_output)
         })
 
     except NoRelevantDataError as e:
         result['error'] = str(e)
+    except asyncio.TimeoutError:
+        # Unmerged beats nothing: hand back whichever agent answered
+        print(f"⏱️ Comparison merge ran past the {budget:.0f}s budget — returning agent output unmerged")
+        result.update({
+            'content': snowflake_output or rag_output,
+            'source': _source_label(snowflake_output, rag_output)
+        })
     except Exception as e:
         result['error'] = f"Validation processing error: {str(e)}"
-    
+
     return result
 
 # ---------- CLI ----------
@@ -0,0 +1,310 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Union
+from dotenv import load_dotenv
+from openai import OpenAI, AsyncOpenAI
+from multi_Agents.backend_limits import limit, alimit
+
+load_dotenv()
+
+# ---------- Shared GPT client ----------
+# Every agent calls the chat API through complete()/acomplete(), which gives
+# one exact-match completion cache and one place to meter token spend.
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory").lower()  # memory | sqlite | off
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite")
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "2048"))
+# SQLite backend bounds: rows kept, and how long (seconds) a completion stays valid
+LLM_CACHE_MAX_ROWS = int(os.getenv("LLM_CACHE_MAX_ROWS", "50000"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+# Only deterministic (temperature 0) calls are cached unless the caller passes cache=True
+LLM_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0"))
+# The SQLite cache sweeps expired and excess rows once every this many writes
+SWEEP_EVERY = 256
+
+Messages = Union[str, List[Dict[str, str]]]
+
+
+# ---------- Cache backends ----------
+class MemoryCompletionCache:
+    """In-process LRU of completion text keyed by request hash."""
+
+    def __init__(self, max_entries: int = LLM_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str, model: str = ""):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCompletionCache:
+    """
+    Persistent completion cache shared across restarts and worker processes.
+    Rows older than `ttl` are ignored on read; every SWEEP_EVERY writes the
+    expired rows are deleted and, past `max_rows`, the oldest ones too.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_rows: int = LLM_CACHE_MAX_ROWS, ttl: float = LLM_CACHE_TTL):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS completions "
+            "(key TEXT PRIMARY KEY, model TEXT, content TEXT, created_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS completions_created_at ON completions (created_at)")
+        self._db.commit()
+        with self._lock:
+            self._sweep_locked()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content FROM completions WHERE key = ? AND created_at >= ?", (key, self._cutoff())
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, value: str, model: str = ""):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, model, content, created_at) VALUES (?, ?, ?, ?)",
+                (key, model, value, time.time())
+            )
+            self._writes += 1
+            if self._writes % SWEEP_EVERY == 0:
+                self._sweep_locked()
+            self._db.commit()
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl if self.ttl > 0 else float("-inf")
+
+    def _sweep_locked(self):
+        if self.ttl > 0:
+            self._db.execute("DELETE FROM completions WHERE created_at < ?", (self._cutoff(),))
+        if self.max_rows > 0:
+            self._db.execute(
+                "DELETE FROM completions WHERE key IN "
+                "(SELECT key FROM completions ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,)
+            )
+        self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM completions")
+            self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+
+def _make_cache():
+    if LLM_CACHE_BACKEND == "sqlite":
+        return SQLiteCompletionCache()
+    if LLM_CACHE_BACKEND in ("off", "none", "false"):
+        return None
+    return MemoryCompletionCache()
+
+
+# ---------- Client ----------
+class LLMClient:
+    """
+    Thin wrapper over the OpenAI chat API with an exact-match completion cache
+    keyed by (model, temperature, messages, extra params) and per-model usage
+    counters. Calls hotter than `max_cache_temperature` (0 by default, so
+    sampled validator merges are never replayed) bypass the cache unless
+    `cache=True` is passed explicitly.
+    """
+
+    def __init__(self, cache=None, max_cache_temperature: float = LLM_CACHE_MAX_TEMPERATURE):
+        self.cache = cache
+        self.max_cache_temperature = max_cache_temperature
+        self._client: Optional[OpenAI] = None
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._usage_lock = threading.Lock()
+        self._usage: Dict[str, Dict[str, float]] = {}
+
+    # OpenAI clients are created on first use so importing an agent never needs a key
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            self._client = OpenAI(api_key=OPENAI_API_KEY)
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+        return self._async_client
+
+    # ---------- Public API ----------
+    def complete(self, messages: Messages, model: str = "gpt-4", temperature: float = 0.0,
+                 cache: Optional[bool] = None, **kwargs) -> str:
+        """Return the completion text for `messages` (a prompt string or chat messages)."""
+        messages = self._as_messages(messages)
+        key = self._cache_key(messages, model, temperature, kwargs) if self._use_cache(temperature, cache) else None
+        cached = self._lookup(key, model)
+        if cached is not None:
+            return cached
+        with limit("openai"):
+            started = time.monotonic()
+            response = self.client.chat.completions.create(
+                model=model, messages=messages, temperature=temperature, **kwargs
+            )
+        return self._finish(response, key, model, started)
+
+    async def acomplete(self, messages: Messages, model: str = "gpt-4", temperature: float = 0.0,
+                        cache: Optional[bool] = None, **kwargs) -> str:
+        """Async complete(); shares the same cache and usage counters."""
+        messages = self._as_messages(messages)
+        key = self._cache_key(messages, model, temperature, kwargs) if self._use_cache(temperature, cache) else None
+        cached = self._lookup(key, model)
+        if cached is not None:
+            return cached
+        async with alimit("openai"):
+            started = time.monotonic()
+            response = await self.async_client.chat.completions.create(
+                model=model, messages=messages, temperature=temperature, **kwargs
+            )
+        return self._finish(response, key, model, started)
+
+    async def astream(self, messages: Messages, on_token: Callable[[str], None], model: str = "gpt-4",
+                      temperature: float = 0.0, cache: Optional[bool] = None, **kwargs) -> str:
+        """acomplete() that hands each content delta to `on_token` as it arrives; returns the full text."""
+        messages = self._as_messages(messages)
+        key = self._cache_key(messages, model, temperature, kwargs) if self._use_cache(temperature, cache) else None
+        cached = self._lookup(key, model)
+        if cached is not None:
+            on_token(cached)
+            return cached
+        async with alimit("openai"):
+            started = time.monotonic()
+            stream = await self.async_client.chat.completions.create(
+                model=model, messages=messages, temperature=temperature,
+                stream=True, stream_options={"include_usage": True}, **kwargs
+            )
+            parts, usage = [], None
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    delta = chunk.choices[0].delta.content
+                    parts.append(delta)
+                    on_token(delta)
+        return self._settle("".join(parts), usage, key, model, started)
+
+    def usage(self) -> Dict:
+        with self._usage_lock:
+            models = {model: dict(stats) for model, stats in self._usage.items()}
+        for stats in models.values():
+            lookups = stats["cache_hits"] + stats["cache_misses"]
+            stats["cache_hit_rate"] = round(stats["cache_hits"] / lookups, 3) if lookups else 0.0
+            stats["avg_latency_ms"] = round(stats["latency_ms_total"] / stats["calls"], 1) if stats["calls"] else 0.0
+        return {
+            "cache_backend": type(self.cache).__name__ if self.cache is not None else None,
+            "cache_size": len(self.cache) if self.cache is not None else 0,
+            "models": models,
+        }
+
+    # ---------- Internals ----------
+    @staticmethod
+    def _as_messages(messages: Messages) -> List[Dict[str, str]]:
+        if isinstance(messages, str):
+            return [{"role": "user", "content": messages}]
+        return list(messages)
+
+    def _use_cache(self, temperature: float, cache: Optional[bool]) -> bool:
+        if self.cache is None or cache is False:
+            return False
+        return cache is True or temperature <= self.max_cache_temperature
+
+    @staticmethod
+    def _cache_key(messages: List[Dict[str, str]], model: str, temperature: float, kwargs: Dict) -> str:
+        payload = json.dumps(
+            {"model": model, "temperature": temperature, "messages": messages, "params": kwargs},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: Optional[str], model: str) -> Optional[str]:
+        if key is None:
+            return None
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._record(model, cache_hits=1)
+        else:
+            self._record(model, cache_misses=1)
+        return cached
+
+    def _finish(self, response, key: Optional[str], model: str, started: float) -> str:
+        return self._settle(
+            response.choices[0].message.content or "", getattr(response, "usage", None), key, model, started
+        )
+
+    def _settle(self, content: str, usage, key: Optional[str], model: str, started: float) -> str:
+        self._record(
+            model,
+            calls=1,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            latency_ms_total=(time.monotonic() - started) * 1000,
+        )
+        if key is not None and content:
+            self.cache.put(key, content, model)
+        return content
+
+    def _record(self, model: str, **deltas):
+        with self._usage_lock:
+            stats = self._usage.setdefault(model, {
+                "calls": 0, "cache_hits": 0, "cache_misses": 0,
+                "prompt_tokens": 0, "completion_tokens": 0, "latency_ms_total": 0.0,
+            })
+            for name, delta in deltas.items():
+                stats[name] += delta
+
+
+llm_client = LLMClient(cache=_make_cache())
+
+
+def complete(messages: Messages, model: str = "gpt-4", temperature: float = 0.0,
+             cache: Optional[bool] = None, **kwargs) -> str:
+    return llm_client.complete(messages, model=model, temperature=temperature, cache=cache, **kwargs)
+
+
+async def acomplete(messages: Messages, model: str = "gpt-4", temperature: float = 0.0,
+                    cache: Optional[bool] = None, **kwargs) -> str:
+    return await llm_client.acomplete(messages, model=model, temperature=temperature, cache=cache, **kwargs)
+
+
+async def astream(messages: Messages, on_token: Callable[[str], None], model: str = "gpt-4",
+                  temperature: float = 0.0, cache: Optional[bool] = None, **kwargs) -> str:
+    return await llm_client.astream(messages, on_token, model=model, temperature=temperature, cache=cache, **kwargs)
@@ -0,0 +1,82 @@
+import os
+import threading
+from typing import Dict, Iterable, List, Union
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---------- Shared SentenceTransformer registry ----------
+# Every agent embeds through this module, so each model is loaded at most once
+# per process and only when first needed (not at import time).
+
+DEFAULT_MODEL_NAME = os.getenv("EMBED_MODEL_NAME", "all-MiniLM-L6-v2")
+DEFAULT_RERANK_MODEL_NAME = os.getenv("RERANK_MODEL_NAME", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+ENCODE_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+
+_models: Dict[str, object] = {}
+_model_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def _lock_for(model_name: str) -> threading.Lock:
+    with _registry_lock:
+        return _model_locks.setdefault(model_name, threading.Lock())
+
+
+def _load(model_name: str, kind: str):
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+    with _lock_for(model_name):
+        model = _models.get(model_name)
+        if model is None:
+            import sentence_transformers
+
+            print(f"🧠 Loading {'reranking' if kind == 'CrossEncoder' else 'embedding'} model: {model_name}")
+            model = getattr(sentence_transformers, kind)(model_name)
+            _models[model_name] = model
+    return model
+
+
+def get_model(model_name: str = DEFAULT_MODEL_NAME):
+    """Return the process-wide instance of `model_name`, loading it on first use."""
+    return _load(model_name, "SentenceTransformer")
+
+
+def get_cross_encoder(model_name: str = DEFAULT_RERANK_MODEL_NAME):
+    """Process-wide CrossEncoder, loaded on first use (CPU-sized MiniLM by default)."""
+    return _load(model_name, "CrossEncoder")
+
+
+def encode(texts: Union[str, List[str]], model_name: str = DEFAULT_MODEL_NAME,
+           batch_size: int = ENCODE_BATCH_SIZE, **kwargs):
+    """
+    Thread-safe batched encode. Accepts one string or a list, like
+    SentenceTransformer.encode, and forwards extra kwargs (convert_to_tensor,
+    normalize_embeddings, ...). Calls on the same model are serialized, since
+    a single model instance is shared by every agent.
+    """
+    model = get_model(model_name)
+    with _lock_for(model_name):
+        return model.encode(texts, batch_size=batch_size, show_progress_bar=False, **kwargs)
+
+
+def rerank_scores(query: str, texts: List[str], model_name: str = DEFAULT_RERANK_MODEL_NAME,
+                  batch_size: int = ENCODE_BATCH_SIZE) -> List[float]:
+    """Cross-encoder relevance of each text to `query` (higher is more relevant)."""
+    if not texts:
+        return []
+    model = get_cross_encoder(model_name)
+    with _lock_for(model_name):
+        scores = model.predict([(query, text) for text in texts], batch_size=batch_size, show_progress_bar=False)
+    return [float(score) for score in scores]
+
+
+def warmup(model_names: Iterable[str] = (DEFAULT_MODEL_NAME,)):
+    """Load each model and run one tiny encode so the first request doesn't pay for it."""
+    for model_name in model_names:
+        encode(["warmup"], model_name=model_name)
+
+
+def loaded_models() -> List[str]:
+    return list(_models)
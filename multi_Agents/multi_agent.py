@@ -1,12 +1,15 @@
-from typing import TypedDict, Optional, List, Dict
+from typing import TypedDict, Optional, List, Dict, Deque
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableConfig
 import asyncio
 from datetime import datetime
 import json
 from multi_Agents.websearch_agent import WebSearchRecommender
-from multi_Agents.gate_agent import CollegeRecommender
+from multi_Agents.gate_agent import CollegeRecommender, new_history
+from multi_Agents.comparison_extractor import is_comparison_request
 from dotenv import load_dotenv
-from multi_Agents.validate_recommender import validate_and_compare
+from multi_Agents.validate_recommender import avalidate_and_compare
+from multi_Agents.semantic_cache import cache_lookup_node
 
 load_dotenv()
 
@@ -23,6 +26,8 @@ class RecommendationState(TypedDict):
     early_response: Optional[str]
     fallback_used: Optional[bool]
     fallback_message: Optional[str]
+    conversation_history: Deque[Dict]  # this session's gatekeeper turns
+    cache_hit: bool  # answered from the response cache
 
 workflow = StateGraph(RecommendationState)
 
@@ -32,11 +37,8 @@ async def detect_comparison_node(state: RecommendationState):
     """New node to detect comparison queries"""
     STANDARD_RESPONSE = "I specialize in college recommendations, not comparisons. Please ask about specific programs or colleges."
     
-    # Simple keyword-based detection (you could replace with LLM-based detection)
-    comparison_keywords = ["compare", "vs", "versus", "difference", "better", "worse", "ranking"]
-    
-    query_lower = state['user_query'].lower()
-    is_comparison = any(keyword in query_lower for keyword in comparison_keywords)
+    # Local cue + college-registry check (no LLM); "better colleges for CS" is not a comparison
+    is_comparison = is_comparison_request(state['user_query'])
     
     print(f"\n🔍 Comparison check for: '{state['user_query']}'")
     print(f"Comparison detected: {is_comparison}")
@@ -59,7 +61,9 @@ async def check_prompt_node(state: RecommendationState):
             "early_response": state.get('early_response', STANDARD_RESPONSE)
         }
     
-    classification = await college_recommender.check_and_classify_query(state['user_query'])
+    classification = await college_recommender.check_and_classify_query(
+        state['user_query'], state.get('conversation_history')
+    )
     
     print(f"📊 Classification results:")
     print(f"  - is_college_related: {classification['is_college_related']}")
@@ -81,7 +85,7 @@ async def check_prompt_node(state: RecommendationState):
     }
 
 #output from our rag and snowflake agents
-async def query_combined_agent_node(state: RecommendationState):
+async def query_combined_agent_node(state: RecommendationState, config: RunnableConfig = None):
     '''
     """TEST VERSION - Always returns empty results to trigger fallback"""
     print("\n🔍 TEST MODE: Combined agent returning empty results to trigger fallback")
@@ -95,12 +99,16 @@ async def query_combined_agent_node(state: RecommendationState):
     }
 '''
     try:
-        result = validate_and_compare(state['user_query'])
+        # Streaming endpoints pass a token sink through the run config
+        token_sink = (config or {}).get("configurable", {}).get("token_sink")
+        result = await avalidate_and_compare(state['user_query'], on_token=token_sink)
         
-        print("\n🔍 Raw results from validate_and_compare:")
+        print("\n🔍 Raw results from avalidate_and_compare:")
         print(f"Combined output length: {len(result.get('combined_agent_results', ''))}")
         print(f"Snowflake results type: {type(result.get('snowflake_results'))} count: {len(result.get('snowflake_results', []))}")
         print(f"RAG results type: {type(result.get('rag_results'))} count: {len(result.get('rag_results', []))}")
+        if result.get("failed_branches"):
+            print(f"⚠️ Partial results — failed branches: {', '.join(result['failed_branches'])}")
 
         return {
             **state,  
@@ -198,6 +206,7 @@ def compile_results(state: RecommendationState):
 # Modified workflow construction
 workflow.add_node("detect_comparison", detect_comparison_node)
 workflow.add_node("gatekeeper", check_prompt_node)
+workflow.add_node("cache", cache_lookup_node)
 workflow.add_node("combined_agent", query_combined_agent_node)
 workflow.add_node("check_results", check_results_node)
 workflow.add_node("web", query_web_node)
@@ -221,10 +230,20 @@ workflow.add_conditional_edges(
     lambda state: (
         "early_exit" 
         if not state["is_college_related"] or not state["safety_check_passed"] 
-        else "combined_agent"
+        else "cache"
     ),
     {
         "early_exit": END,
+        "cache": "cache"
+    }
+)
+
+# Cached answers are only reachable once the gatekeeper has passed the prompt
+workflow.add_conditional_edges(
+    "cache",
+    lambda state: "cached" if state.get("cache_hit") else "combined_agent",
+    {
+        "cached": END,
         "combined_agent": "combined_agent"
     }
 )
@@ -240,6 +259,24 @@ workflow.add_edge("compile", END)
 # Compile the graph
 app = workflow.compile()
 
+def initial_state(query: str, history: Optional[Deque[Dict]] = None) -> Dict:
+    """Fresh RecommendationState for one query; `history` is the session's gatekeeper buffer."""
+    return {
+        "user_query": query,
+        "combined_agent_results": None,
+        "snowflake_results": [],
+        "rag_results": [],
+        "web_results": [],
+        "final_output": None,
+        "is_college_related": False,
+        "safety_check_passed": False,
+        "early_response": None,
+        "fallback_used": False,
+        "fallback_message": None,
+        "cache_hit": False,
+        "conversation_history": new_history() if history is None else history
+    }
+
 async def test_workflow(query: str):
     print(f"\n🔍 Testing query: '{query}'")
     initial_state = {
@@ -1,11 +1,13 @@
 # compare_workflow.py
-from typing import TypedDict, Optional, List, Dict
+from typing import TypedDict, Optional, List, Dict, Deque
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableConfig
 import asyncio
 from multi_Agents.websearch_compare import WebSearchComparisonAgent
 from multi_Agents.gate_agent import CollegeRecommender
 from multi_Agents.college_compare import ComparisonDetector
-from multi_Agents.integrated_validator import compare_validate
+from multi_Agents.integrated_validator import acompare_validate
+from multi_Agents.semantic_cache import cache_lookup_node
 
 class ComparisonState(TypedDict):
     user_query: str
@@ -20,6 +22,8 @@ class ComparisonState(TypedDict):
     early_response: Optional[str]
     fallback_used: bool
     fallback_message: Optional[str]
+    conversation_history: Deque[Dict]  # this session's gatekeeper turns
+    cache_hit: bool  # answered from the response cache
 
 #initializing all the agents
 college_recommender = CollegeRecommender()
@@ -36,7 +40,7 @@ async def check_prompt_node(state: ComparisonState):
     
     try:
         safety_result = await college_recommender.safety_system.check_query(
-            state['user_query'], []
+            state['user_query'], state.get('conversation_history') or []
         )
         if not safety_result["safe"]:
             return {
@@ -77,14 +81,15 @@ async def detect_comparison_node(state: ComparisonState):
         "comparison_aspects": detection_result["comparison_aspects"]
     }
 #output from our rag and snowflake agents
-async def query_combined_agent_node(state: ComparisonState):
+async def query_combined_agent_node(state: ComparisonState, config: RunnableConfig = None):
 
     if not state["is_comparison"]:
         return {"combined_results": None, "fallback_used": False}
     
     try:
-        
-        validation_result = compare_validate(state["user_query"])
+        # Streaming endpoints pass a token sink through the run config
+        token_sink = (config or {}).get("configurable", {}).get("token_sink")
+        validation_result = await acompare_validate(state["user_query"], on_token=token_sink)
         
         # Check for empty/None content specifically
         if not validation_result.get('content') or validation_result['content'] in ('""', '""'):
@@ -162,6 +167,7 @@ def compile_results(state: ComparisonState):
 
 
 workflow.add_node("gatekeeper", check_prompt_node)
+workflow.add_node("cache", cache_lookup_node)
 workflow.add_node("detect_comparison", detect_comparison_node)
 workflow.add_node("combined_agent", query_combined_agent_node)  # Replaces snowflake and rag nodes
 workflow.add_node("check_results", check_results_node)
@@ -177,9 +183,16 @@ workflow.add_conditional_edges(
     lambda state: (
         "early_exit" 
         if not state["is_college_related"] or not state["safety_check_passed"] 
-        else "detect_comparison"
+        else "cache"
     ),
-    {"early_exit": END, "detect_comparison": "detect_comparison"}
+    {"early_exit": END, "cache": "cache"}
+)
+
+# Cached answers are only reachable once the gatekeeper has passed the prompt
+workflow.add_conditional_edges(
+    "cache",
+    lambda state: "cached" if state.get("cache_hit") else "detect_comparison",
+    {"cached": END, "detect_comparison": "detect_comparison"}
 )
 
 # 2. Second conditional edge
@@ -1,10 +1,11 @@
-import os
 import re
-import datetime
 from dotenv import load_dotenv
-import snowflake.connector
-from langchain_openai import ChatOpenAI
 from langgraph.graph import Graph
+from multi_Agents.snowflake_pool import get_pool
+from multi_Agents.llm_client import complete
+from multi_Agents.college_snapshot import get_snapshot, SNAPSHOT_ENABLED
+from multi_Agents.filter_compiler import compile_filters
+from multi_Agents.college_normalize import NORMALIZED_VIEW, NUMERIC_SHADOWS, numeric_select
 
 load_dotenv()
 
@@ -38,21 +39,8 @@ SHORT_COLUMN_NAMES = {
 
 DEFAULT_COLUMNS = list(SHORT_COLUMN_NAMES.keys())
 
-def query_snowflake(query: str) -> list:
-    conn = snowflake.connector.connect(
-        user=os.getenv("SNOWFLAKE_USER"),
-        password=os.getenv("SNOWFLAKE_PASSWORD"),
-        account=os.getenv("SNOWFLAKE_ACCOUNT"),
-        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
-        database=os.getenv("SNOWFLAKE_DATABASE"),
-        schema="TOP_30"
-    )
-    cursor = conn.cursor()
-    cursor.execute(query)
-    results = cursor.fetchall()
-    columns = [col[0] for col in cursor.description]
-    conn.close()
-    return [dict(zip(columns, row)) for row in results]
+def query_snowflake(query: str, params=None) -> list:
+    return get_pool().execute(query, params)
 
 def identify_relevant_columns(prompt: str) -> list:
     return [col for word, col in COLUMN_MAPPING.items() if word in prompt.lower()]
@@ -87,12 +75,6 @@ def summarize_data_for_prompt(data: list) -> str:
         summary.append(" | ".join(line))
     return "\n".join(summary)
 
-def parse_date_string(date_str):
-    try:
-        return datetime.datetime.strptime(date_str.strip(), "%B %d")
-    except Exception:
-        return None
-
 def parse_numeric_filters(prompt: str):
     numeric_filters = []
     patterns = [
@@ -131,81 +113,40 @@ def search_and_filter(prompt: str) -> list:
     if "LOCATION" not in relevant_columns:
         relevant_columns.append("LOCATION")
 
-    query = f"""
-        SELECT {', '.join(relevant_columns)}
-        FROM {COLLEGE_TABLE}
-        WHERE {" AND ".join([f"{col} IS NOT NULL" for col in relevant_columns])}
-        ORDER BY RANKING ASC
-        LIMIT 100
-    """
-    results = query_snowflake(query)
-
-    for row in results:
-        for col in ["UNDERGRADUATE_ENROLLMENT", "MEDIAN_SALARY_AFTER_GRADUATION", "TUITION_FEES", "ACCEPTANCE_RATE"]:
-            try:
-                val = str(row[col]).replace(",", "").replace("$", "").replace("%", "")
-                row[col] = float(val)
-            except:
-                row[col] = None
-
-    if check_deadline:
-        jan15 = datetime.datetime.strptime("January 15", "%B %d")
-        results = [
-            row for row in results
-            if "APPLICATION_DEADLINE" in row and parse_date_string(str(row["APPLICATION_DEADLINE"])) and
-               parse_date_string(str(row["APPLICATION_DEADLINE"])) > jan15
-        ]
-
-    if gpa or sat:
-        filtered = []
-        for row in results:
-            gpa_match = False
-            sat_match = False
-
-            try:
-                row_gpa = float(row.get("MINIMUM_GPA", 0))
-                if gpa and row_gpa <= gpa:
-                    gpa_match = True
-            except:
-                pass
-
-            sat_str = str(row.get("SAT_RANGE", "")).strip()
-            match = re.search(r"(\d{3,4})\s*[-–]?\s*(\d{3,4})?", sat_str)
-            if match and sat:
-                low = int(match.group(1))
-                high = int(match.group(2)) if match.group(2) else low
-                sat_match = low <= sat <= high
-
-            if (gpa and gpa_match) or (sat and sat_match):
-                filtered.append(row)
-
-        results = filtered
+    college_filter = compile_filters(
+        numeric_filters=numeric_filters,
+        gpa=gpa,
+        sat=sat,
+        location_abbr=location_abbr,
+        check_deadline=check_deadline,
+    )
 
-    if numeric_filters:
-        results = [
-            row for row in results
-            if all(
-                row.get(col) is not None and
-                isinstance(row.get(col), (int, float)) and
-                ((op == ">" and row[col] > val) or (op == "<" and row[col] < val))
-                for col, op, val in numeric_filters
-            )
-        ]
+    # Numeric display columns come pre-parsed from their shadow columns
+    select_columns = numeric_select(relevant_columns, list(NUMERIC_SHADOWS))
+
+    # Filters run where the data lives: vectorized over the snapshot, or as bound SQL
+    if SNAPSHOT_ENABLED:
+        results = get_snapshot().select(
+            select_columns, not_null=relevant_columns, where=college_filter.mask,
+            order_by="RANKING", limit=100
+        )
+    else:
+        query, params = college_filter.to_sql(
+            select_columns, NORMALIZED_VIEW, not_null=relevant_columns, order_by="RANKING", limit=100
+        )
+        results = query_snowflake(query, params)
 
-    if location_abbr:
-        results = [
-            row for row in results
-            if "LOCATION" in row and re.search(rf",\s*{location_abbr}\b", row["LOCATION"], flags=re.IGNORECASE)
-        ]
+    for row in results:
+        for col in NUMERIC_SHADOWS:
+            row.setdefault(col, None)
 
     return results
 
 def generate_recommendation(prompt: str, data: list) -> str:
     if not data:
         return ""
-    llm = ChatOpenAI(model="gpt-4", temperature=0.3)
     summary = summarize_data_for_prompt(data)
-    return llm.invoke(
+    return complete(
         f"""You are a helpful assistant.
 Use only the following college data to respond:
 
@@ -214,8 +155,10 @@ Use only the following college data to respond:
 User Prompt: {prompt}
 
 Respond only using the colleges in the data. If none match all conditions, return an empty string.
-"""
-    ).content
+""",
+        model="gpt-4",
+        temperature=0.3
+    )
 
 # ---------------------- AGENT FLOW ----------------------
 def input_node(state):
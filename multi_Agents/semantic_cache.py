@@ -0,0 +1,161 @@
+import os
+import re
+import time
+import threading
+from typing import Any, Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from multi_Agents import model_registry
+from multi_Agents.embedding_cache import aembed_query
+
+load_dotenv()
+
+# ---------- Response cache configuration ----------
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+
+
+NEGATION_RE = re.compile(r"\b(?:not|no|never|without|except|excluding|outside|non|nor|neither)\b|n['’]t\b")
+
+
+def _guards(text: str) -> frozenset:
+    # "under $30,000" / "under $50,000" and "in California" / "not in California"
+    # embed almost identically, so cached answers are only reused when every
+    # number and every negation in the prompt matches
+    numbers = {n.replace(",", "") for n in re.findall(r"\d[\d,]*(?:\.\d+)?", text)}
+    negations = {"not" if m.startswith("n'") or m.startswith("n’") else m for m in NEGATION_RE.findall(text.lower())}
+    return frozenset(numbers | {f"~{n}" for n in negations})
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache of workflow results keyed by prompt embedding.
+
+    Prompts are embedded (through the shared embedding cache) and compared by
+    cosine similarity against a local matrix of previous prompts; the closest
+    live entry at or above `threshold` is a hit. Entries expire after `ttl`
+    seconds and the least recently used one is evicted beyond `max_entries`.
+    """
+
+    def __init__(self, name: str, threshold: float = RESPONSE_CACHE_THRESHOLD, ttl: float = RESPONSE_CACHE_TTL,
+                 max_entries: int = RESPONSE_CACHE_SIZE, model_name: str = model_registry.DEFAULT_MODEL_NAME):
+        self.name = name
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None  # (n, dim) unit vectors
+        self._prompts: List[str] = []
+        self._guards: List[frozenset] = []
+        self._values: List[Any] = []
+        self._created: List[float] = []
+        self._last_used: List[float] = []
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    async def _embed(self, prompt: str) -> np.ndarray:
+        vector = np.asarray(await aembed_query(prompt, model_name=self.model_name), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def lookup(self, prompt: str) -> Optional[Any]:
+        vector = await self._embed(prompt)
+        guards = _guards(prompt)
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if self._matrix is not None and len(self._values):
+                scores = self._matrix @ vector
+                for idx in np.argsort(-scores):
+                    if scores[idx] < self.threshold:
+                        break
+                    if self._guards[idx] == guards:
+                        self._hits += 1
+                        self._last_used[idx] = now
+                        print(f"♻️ {self.name} cache hit ({scores[idx]:.3f}): '{self._prompts[idx][:60]}'")
+                        return self._values[idx]
+            self._misses += 1
+            return None
+
+    async def store(self, prompt: str, value: Any):
+        vector = await self._embed(prompt)
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if len(self._values) >= self.max_entries:
+                self._drop([int(np.argmin(self._last_used))])
+                self._evictions += 1
+            row = vector[np.newaxis, :]
+            self._matrix = row if self._matrix is None or not len(self._values) else np.vstack([self._matrix, row])
+            self._prompts.append(prompt)
+            self._guards.append(_guards(prompt))
+            self._values.append(value)
+            self._created.append(now)
+            self._last_used.append(now)
+
+    def invalidate(self):
+        """Drop every entry, e.g. after the college data is refreshed."""
+        with self._lock:
+            self._drop(list(range(len(self._values))))
+
+    def _expire(self, now: float):
+        expired = [i for i, created in enumerate(self._created) if now - created > self.ttl]
+        if expired:
+            self._drop(expired)
+
+    def _drop(self, indices: List[int]):
+        drop = set(indices)
+        keep = [i for i in range(len(self._values)) if i not in drop]
+        self._matrix = self._matrix[keep] if keep and self._matrix is not None else None
+        for column in (self._prompts, self._guards, self._values, self._created, self._last_used):
+            column[:] = [column[i] for i in keep]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+                "size": len(self._values),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "ttl": self.ttl,
+            }
+
+
+recommend_cache = SemanticCache("recommend")
+compare_cache = SemanticCache("compare")
+
+
+async def lookup_cached(cache: Optional[SemanticCache], prompt: str) -> Optional[Dict]:
+    if cache is None or not RESPONSE_CACHE_ENABLED:
+        return None
+    try:
+        return await cache.lookup(prompt)
+    except Exception as e:
+        print(f"⚠️ Response cache lookup failed: {e}")
+        return None
+
+
+async def cache_lookup_node(state: Dict, config: Optional[Dict] = None) -> Dict:
+    """
+    Workflow node placed after the gatekeeper, so a cached answer is only
+    served to prompts that passed the safety and relevance checks. The API
+    hands the cache in as config["configurable"]["response_cache"].
+    """
+    cache = ((config or {}).get("configurable") or {}).get("response_cache")
+    cached = await lookup_cached(cache, state["user_query"])
+    if cached is None:
+        return {"cache_hit": False}
+    return {**cached, "cache_hit": True}
+
+
+def invalidate_all():
+    recommend_cache.invalidate()
+    compare_cache.invalidate()
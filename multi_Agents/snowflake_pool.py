@@ -0,0 +1,299 @@
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from multi_Agents.backend_limits import limit
+
+load_dotenv()
+
+# ---------- Pool configuration ----------
+POOL_MAX_SIZE = int(os.getenv("SNOWFLAKE_POOL_SIZE", "4"))
+POOL_IDLE_TIMEOUT = float(os.getenv("SNOWFLAKE_POOL_IDLE_TIMEOUT", "600"))
+POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("SNOWFLAKE_POOL_HEALTH_CHECK_INTERVAL", "60"))
+POOL_CHECKOUT_TIMEOUT = float(os.getenv("SNOWFLAKE_POOL_CHECKOUT_TIMEOUT", "30"))
+
+HEALTH_CHECK_QUERY = "SELECT 1"
+
+
+def snowflake_connect():
+    """Default connection factory: one authenticated Snowflake session on TOP_30."""
+    import snowflake.connector
+
+    return snowflake.connector.connect(
+        user=os.getenv("SNOWFLAKE_USER"),
+        password=os.getenv("SNOWFLAKE_PASSWORD"),
+        account=os.getenv("SNOWFLAKE_ACCOUNT"),
+        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
+        database=os.getenv("SNOWFLAKE_DATABASE"),
+        schema="TOP_30",
+        client_session_keep_alive=True
+    )
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be checked out within the timeout"""
+    pass
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used", "last_checked")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+        self.last_checked = now
+
+
+class SnowflakeConnectionPool:
+    """
+    Bounded, thread-safe pool of long-lived DB-API connections.
+
+    `connect` is any zero-argument callable returning a DB-API 2.0 connection,
+    so the pool runs unchanged against a fake connector or SQLite, e.g.
+    SnowflakeConnectionPool(connect=lambda: sqlite3.connect(":memory:", check_same_thread=False)).
+    """
+
+    def __init__(
+        self,
+        connect: Callable = snowflake_connect,
+        max_size: int = POOL_MAX_SIZE,
+        idle_timeout: float = POOL_IDLE_TIMEOUT,
+        health_check_interval: float = POOL_HEALTH_CHECK_INTERVAL,
+        checkout_timeout: float = POOL_CHECKOUT_TIMEOUT,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+
+        self._cond = threading.Condition()
+        self._idle: deque = deque()
+        self._size = 0      # open connections + connections being opened
+        self._in_use = 0
+        self._waiters = 0
+        self._closed = False
+        self._stats = {
+            "connects": 0,
+            "connect_failures": 0,
+            "connect_time_total_ms": 0.0,
+            "last_connect_ms": 0.0,
+            "checkouts": 0,
+            "checkout_wait_total_ms": 0.0,
+            "health_check_failures": 0,
+            "idle_evictions": 0,
+        }
+
+    # ---------- Checkout API ----------
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Check out a connection for the duration of the `with` block."""
+        pooled = self._acquire(self.checkout_timeout if timeout is None else timeout)
+        try:
+            yield pooled.conn
+        except Exception:
+            # The connection may be fine (bad SQL) or dead (network); verify before reuse
+            pooled.last_checked = 0.0
+            raise
+        finally:
+            self._release(pooled)
+
+    def execute(self, query: str, params=None) -> List[Dict]:
+        """Run a query on a pooled connection and return rows as dicts."""
+        with limit("snowflake"), self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                if params is None:
+                    cursor.execute(query)
+                else:
+                    cursor.execute(query, params)
+                results = cursor.fetchall()
+                columns = [col[0] for col in cursor.description]
+            finally:
+                cursor.close()
+        return [dict(zip(columns, row)) for row in results]
+
+    # ---------- Internals ----------
+    def _acquire(self, timeout: float) -> _PooledConnection:
+        started = time.monotonic()
+        deadline = started + timeout
+        # Evicted connections are closed after the lock is released; close() can block on the network
+        stale: List = []
+        try:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+                    stale.extend(self._evict_idle_locked())
+                    if self._idle:
+                        pooled = self._idle.pop()  # most recently used first
+                        self._in_use += 1
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        self._in_use += 1
+                        pooled = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No Snowflake connection available within {timeout:.1f}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    self._waiters += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiters -= 1
+        finally:
+            for conn in stale:
+                self._discard(conn)
+
+        try:
+            if pooled is None:
+                pooled = self._open()
+            elif not self._is_healthy(pooled):
+                self._discard(pooled.conn)
+                pooled = self._open()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._stats["checkouts"] += 1
+            self._stats["checkout_wait_total_ms"] += (time.monotonic() - started) * 1000
+        return pooled
+
+    def _release(self, pooled: _PooledConnection):
+        pooled.last_used = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            closed = self._closed
+            if closed:
+                self._size -= 1
+            else:
+                self._idle.append(pooled)
+            self._cond.notify()
+        if closed:
+            self._discard(pooled.conn)
+
+    def _open(self) -> _PooledConnection:
+        started = time.monotonic()
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._stats["connect_failures"] += 1
+            raise
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._cond:
+            self._stats["connects"] += 1
+            self._stats["connect_time_total_ms"] += elapsed_ms
+            self._stats["last_connect_ms"] = elapsed_ms
+        return _PooledConnection(conn)
+
+    def _is_healthy(self, pooled: _PooledConnection) -> bool:
+        if time.monotonic() - pooled.last_checked < self.health_check_interval:
+            return True
+        try:
+            cursor = pooled.conn.cursor()
+            try:
+                cursor.execute(HEALTH_CHECK_QUERY)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            pooled.last_checked = time.monotonic()
+            return True
+        except Exception as e:
+            print(f"⚠️ Snowflake pool health check failed, reconnecting: {e}")
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            return False
+
+    def _evict_idle_locked(self) -> List:
+        """Drop idle connections past the timeout; returns them for the caller to close unlocked."""
+        evicted = []
+        if self.idle_timeout <= 0:
+            return evicted
+        cutoff = time.monotonic() - self.idle_timeout
+        # Idle deque is ordered by last use, so stale connections sit at the left
+        while self._idle and self._idle[0].last_used < cutoff:
+            pooled = self._idle.popleft()
+            self._size -= 1
+            self._stats["idle_evictions"] += 1
+            evicted.append(pooled.conn)
+        return evicted
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # ---------- Lifecycle & metrics ----------
+    def close(self):
+        """Close idle connections; in-use ones are closed when returned."""
+        with self._cond:
+            self._closed = True
+            idle = [pooled.conn for pooled in self._idle]
+            self._size -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+    def metrics(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+            connects = stats["connects"] or 1
+            checkouts = stats["checkouts"] or 1
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiters": self._waiters,
+                "connects": stats["connects"],
+                "connect_failures": stats["connect_failures"],
+                "avg_connect_ms": round(stats["connect_time_total_ms"] / connects, 2),
+                "last_connect_ms": round(stats["last_connect_ms"], 2),
+                "checkouts": stats["checkouts"],
+                "avg_checkout_wait_ms": round(stats["checkout_wait_total_ms"] / checkouts, 2),
+                "health_check_failures": stats["health_check_failures"],
+                "idle_evictions": stats["idle_evictions"],
+            }
+
+
+# ---------- Shared process-wide pool ----------
+_pool: Optional[SnowflakeConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> SnowflakeConnectionPool:
+    """Return the shared pool, creating it on first use (no connection is opened yet)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SnowflakeConnectionPool()
+    return _pool
+
+
+def set_pool(pool: Optional[SnowflakeConnectionPool]):
+    """Swap the shared pool, e.g. for a SQLite-backed stand-in in local runs."""
+    global _pool
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    if previous is not None and previous is not pool:
+        previous.close()
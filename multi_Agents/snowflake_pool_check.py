@@ -0,0 +1,163 @@
+import sys
+import time
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from typing import List
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from multi_Agents.snowflake_pool import SnowflakeConnectionPool, PoolTimeoutError
+
+# ---------- Snowflake pool check against SQLite ----------
+# Runs the connection pool against in-memory SQLite connections (no Snowflake
+# account needed) and checks checkout/reuse, the size bound under concurrent
+# load, idle eviction, reconnect after a failed health check, checkout
+# timeouts and close(). Exits non-zero if any check fails.
+#
+#   python multi_Agents/snowflake_pool_check.py [--threads 8] [--queries 50] [--size 4]
+
+
+class _Counting:
+    """Connection factory that records every SQLite connection it opens."""
+
+    def __init__(self):
+        self.opened: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def __call__(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        with self._lock:
+            self.opened.append(conn)
+        return conn
+
+
+def _is_closed(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("SELECT 1")
+        return False
+    except sqlite3.ProgrammingError:
+        return True
+
+
+def check_reuse():
+    factory = _Counting()
+    pool = SnowflakeConnectionPool(connect=factory, max_size=2)
+    for _ in range(5):
+        assert pool.execute("SELECT 1 AS ONE") == [{"ONE": 1}]
+    assert len(factory.opened) == 1, f"sequential queries opened {len(factory.opened)} connections"
+    pool.close()
+
+
+def check_concurrency(threads: int, queries: int, size: int):
+    factory = _Counting()
+    pool = SnowflakeConnectionPool(connect=factory, max_size=size, checkout_timeout=10)
+    peak = [0]
+    errors: List[Exception] = []
+    lock = threading.Lock()
+
+    def worker(n: int):
+        try:
+            for i in range(queries):
+                with pool.connection() as conn:
+                    with lock:
+                        peak[0] = max(peak[0], pool.metrics()["in_use"])
+                    value = conn.execute("SELECT ?", (n * queries + i,)).fetchone()[0]
+                    assert value == n * queries + i
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    metrics = pool.metrics()
+    assert not errors, f"worker errors: {errors[:3]}"
+    assert metrics["checkouts"] == threads * queries, metrics
+    assert peak[0] <= size and len(factory.opened) <= size, f"peak {peak[0]}, opened {len(factory.opened)}"
+    assert metrics["in_use"] == 0 and metrics["waiters"] == 0, metrics
+    pool.close()
+
+
+def check_idle_eviction():
+    factory = _Counting()
+    pool = SnowflakeConnectionPool(connect=factory, max_size=2, idle_timeout=0.05)
+    pool.execute("SELECT 1")
+    time.sleep(0.1)
+    pool.execute("SELECT 1")
+    metrics = pool.metrics()
+    assert metrics["idle_evictions"] == 1 and len(factory.opened) == 2, metrics
+    assert _is_closed(factory.opened[0]), "evicted connection was left open"
+    pool.close()
+
+
+def check_health_reconnect():
+    factory = _Counting()
+    pool = SnowflakeConnectionPool(connect=factory, max_size=1, health_check_interval=0)
+    pool.execute("SELECT 1")
+    factory.opened[0].close()  # the server dropped the session while it sat idle
+    assert pool.execute("SELECT 2 AS TWO") == [{"TWO": 2}]
+    metrics = pool.metrics()
+    assert metrics["health_check_failures"] == 1 and metrics["connects"] == 2, metrics
+    pool.close()
+
+
+def check_timeout():
+    pool = SnowflakeConnectionPool(connect=_Counting(), max_size=1)
+    with pool.connection():
+        try:
+            with pool.connection(timeout=0.05):
+                raise AssertionError("second checkout should not succeed")
+        except PoolTimeoutError:
+            pass
+    assert pool.metrics()["in_use"] == 0
+    pool.close()
+
+
+def check_close():
+    factory = _Counting()
+    pool = SnowflakeConnectionPool(connect=factory, max_size=2)
+    with pool.connection():
+        pool.execute("SELECT 1")
+        pool.close()
+    assert all(_is_closed(conn) for conn in factory.opened), "close() left connections open"
+    assert pool.metrics()["size"] == 0
+    try:
+        pool.execute("SELECT 1")
+        raise AssertionError("closed pool handed out a connection")
+    except RuntimeError:
+        pass
+
+
+def run(threads: int, queries: int, size: int) -> bool:
+    checks: List[tuple] = [
+        ("checkout reuse", check_reuse),
+        (f"{threads} threads x {queries} queries, size {size}", lambda: check_concurrency(threads, queries, size)),
+        ("idle eviction", check_idle_eviction),
+        ("health check reconnect", check_health_reconnect),
+        ("checkout timeout", check_timeout),
+        ("close", check_close),
+    ]
+    print("🔌 Snowflake pool check (SQLite stand-in)")
+    ok = True
+    for name, check in checks:
+        started = time.monotonic()
+        try:
+            check()
+            print(f"✅ {name} ({(time.monotonic() - started) * 1000:.0f} ms)")
+        except Exception as e:
+            ok = False
+            print(f"❌ {name}: {e!r}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exercise the Snowflake connection pool against SQLite")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--size", type=int, default=4)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.threads, args.queries, args.size) else 1)
@@ -1,34 +1,38 @@
 import os
+import asyncio
+from typing import Callable, Optional
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from multi_Agents.recommendation_snowflake import search_and_filter, generate_recommendation
 from multi_Agents.RecommenderRAG_4 import PineconeRetriever, GPT4Recommender, CourseRecommenderAgent, index
+from multi_Agents.llm_client import complete, acomplete, astream
 
 # ---------- Load Environment ----------
 load_dotenv("Agents/.env")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
 
 # ---------- Initialize Agents ----------
 retriever = PineconeRetriever(index)
 gpt4 = GPT4Recommender()
 rag_agent = CourseRecommenderAgent(retriever, gpt4)
 
-# ---------- Validator Agent with Code 2 Output Structure ----------
-def validate_and_compare(prompt: str) -> dict:
-    # Get responses from both agents
+# ---------- Branch Timeouts (seconds) ----------
+SNOWFLAKE_BRANCH_TIMEOUT = float(os.getenv("SNOWFLAKE_BRANCH_TIMEOUT", "25"))
+RAG_BRANCH_TIMEOUT = float(os.getenv("RAG_BRANCH_TIMEOUT", "40"))
+MERGE_TIMEOUT = float(os.getenv("VALIDATOR_MERGE_TIMEOUT", "45"))
+
+NO_DATA_MESSAGE = "❌ No valid data found in either Snowflake or RAG system. Please refine your query or use web search."
+
+# ---------- Agent Branches ----------
+def _snowflake_branch(prompt: str):
     snowflake_data = search_and_filter(prompt)
     snowflake_response = generate_recommendation(prompt, snowflake_data) if snowflake_data else None
-    rag_response = rag_agent.recommend(prompt)
+    return snowflake_data, snowflake_response
 
-    # Process RAG response to match Code 2 structure
-    rag_clean = []
-    if rag_response and "no relevant course information" not in rag_response.lower():
-        rag_clean = [r.strip() for r in rag_response.split("\n") if "⚠️" not in r and r.strip()]
+def _rag_branch(prompt: str):
+    return rag_agent.recommend(prompt)
 
-    # Generate combined response using GPT-4 (Code 1 approach)
-    combined_prompt = f"""
+def _build_combined_prompt(prompt: str, snowflake_response, rag_response) -> str:
+    return f"""
 You are a university and course recommendation validator.
 
 USER PROMPT:
@@ -46,22 +50,91 @@ Read the user prompt and the outputs from both agents.
 1. If either output contains information relevant to the user prompt, generate a clean, well-formatted answer using the data provided.
 2. If neither output is relevant to the user prompt, return an empty string only.
 """
-    
-    gpt_response = openai_client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": combined_prompt}],
-        temperature=0.4
-    )
-    final_response = gpt_response.choices[0].message.content.strip()
+
+def _build_results(final_response: str, snowflake_data, rag_response) -> dict:
+    # Process RAG response to match Code 2 structure
+    rag_clean = []
+    if rag_response and "no relevant course information" not in rag_response.lower():
+        rag_clean = [r.strip() for r in rag_response.split("\n") if "⚠️" not in r and r.strip()]
 
     # Return in Code 2 output structure
     return {
-        "combined_agent_results": final_response if final_response else 
-            "❌ No valid data found in either Snowflake or RAG system. Please refine your query or use web search.",
+        "combined_agent_results": final_response if final_response else NO_DATA_MESSAGE,
         "snowflake_results": snowflake_data if snowflake_data else [],
         "rag_results": [{"text": course, "metadata": {"source": "rag"}} for course in rag_clean]
     }
 
+# ---------- Validator Agent with Code 2 Output Structure ----------
+def validate_and_compare(prompt: str) -> dict:
+    # Get responses from both agents
+    snowflake_data, snowflake_response = _snowflake_branch(prompt)
+    rag_response = _rag_branch(prompt)
+
+    # Generate combined response using GPT-4 (Code 1 approach)
+    final_response = complete(
+        _build_combined_prompt(prompt, snowflake_response, rag_response), model="gpt-4", temperature=0.4
+    ).strip()
+
+    return _build_results(final_response, snowflake_data, rag_response)
+
+# ---------- Async Validator (concurrent fan-out) ----------
+async def _run_branch(name: str, func, prompt: str, timeout: float, default):
+    """
+    Run a blocking agent branch on a worker thread with its own timeout.
+    Returns (value, ok) so callers can tell a timed-out or failed branch
+    from one that legitimately returned nothing.
+    """
+    try:
+        value = await asyncio.wait_for(asyncio.to_thread(func, prompt), timeout)
+        return value, True
+    except asyncio.TimeoutError:
+        print(f"⏱️ {name} branch timed out after {timeout:.0f}s — continuing with partial results")
+    except Exception as e:
+        print(f"❌ {name} branch error: {e}")
+    return default, False
+
+async def avalidate_and_compare(
+    prompt: str,
+    snowflake_timeout: float = SNOWFLAKE_BRANCH_TIMEOUT,
+    rag_timeout: float = RAG_BRANCH_TIMEOUT,
+    merge_timeout: float = MERGE_TIMEOUT,
+    on_token: Optional[Callable[[str], None]] = None,
+) -> dict:
+    """
+    Async counterpart of validate_and_compare.
+
+    The Snowflake branch (search_and_filter + generate_recommendation) and the
+    RAG branch (Pinecone + GPT-4) run concurrently, so latency is bounded by the
+    slowest branch instead of their sum. A branch that errors or exceeds its
+    timeout contributes '[No result]' to the merge step and is listed under
+    'failed_branches' in the returned dict. When `on_token` is given, the
+    merge call is streamed and each text delta is passed to it.
+    """
+    (snowflake_result, snowflake_ok), (rag_response, rag_ok) = await asyncio.gather(
+        _run_branch("Snowflake", _snowflake_branch, prompt, snowflake_timeout, ([], None)),
+        _run_branch("RAG", _rag_branch, prompt, rag_timeout, None),
+    )
+    snowflake_data, snowflake_response = snowflake_result
+    failed_branches = [name for name, ok in (("snowflake", snowflake_ok), ("rag", rag_ok)) if not ok]
+
+    final_response = ""
+    if snowflake_response or rag_response:
+        try:
+            merge_prompt = _build_combined_prompt(prompt, snowflake_response, rag_response)
+            merge_call = (astream(merge_prompt, on_token, model="gpt-4", temperature=0.4) if on_token
+                          else acomplete(merge_prompt, model="gpt-4", temperature=0.4))
+            final_response = (await asyncio.wait_for(merge_call, merge_timeout)).strip()
+        except asyncio.TimeoutError:
+            print(f"⏱️ Validator merge timed out after {merge_timeout:.0f}s")
+            failed_branches.append("merge")
+            final_response = snowflake_response or rag_response or ""
+    else:
+        print("⚠️ Neither branch returned data — skipping validator merge call")
+
+    results = _build_results(final_response, snowflake_data, rag_response)
+    results["failed_branches"] = failed_branches
+    return results
+
 # ---------- CLI for Interactive Testing ----------
 if __name__ == "__main__":
     while True:
@@ -0,0 +1,360 @@
+import os
+import re
+import json
+import argparse
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---------- Vector store selection ----------
+# The RAG agents talk to their index through the subset of the Pinecone Index
+# API they already use (query / upsert / list / fetch / describe_index_stats),
+# so either a Pinecone index or LocalVectorStore can be plugged in:
+#   VECTOR_STORE_BACKEND=pinecone  (default) remote index
+#   VECTOR_STORE_BACKEND=local     memory-mapped matrices under VECTOR_STORE_PATH
+
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone").lower()
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", ".cache/vector_store")
+VECTOR_STORE_DTYPE = os.getenv("VECTOR_STORE_DTYPE", "float32")  # float32 | float16
+VECTOR_STORE_SEARCH = os.getenv("VECTOR_STORE_SEARCH", "auto").lower()  # exact | ivf | auto
+# auto switches a college to IVF once it holds this many chunks
+IVF_MIN_ROWS = int(os.getenv("VECTOR_STORE_IVF_MIN_ROWS", "20000"))
+IVF_NPROBE = int(os.getenv("VECTOR_STORE_IVF_NPROBE", "8"))
+PINECONE_INDEX_NAME = "college-recommendations"
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "_"
+
+
+_OPERATORS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+    "$exists": lambda value, operand: (value is not None) == bool(operand),
+}
+
+
+def _matches(value, condition) -> bool:
+    """
+    Pinecone metadata filter semantics for one field: a bare value, or an
+    operator dict such as {"$in": [...]} or {"$gte": a, "$lte": b}, where
+    every operator must hold.
+    """
+    if isinstance(condition, dict):
+        for operator, operand in condition.items():
+            check = _OPERATORS.get(operator)
+            if check is None:
+                raise ValueError(f"Unsupported metadata filter operator: {operator}")
+            if not check(value, operand):
+                return False
+        return True
+    return value == condition
+
+
+def metadata_matches(metadata: Dict, filter: Optional[Dict]) -> bool:
+    """Whether one chunk's metadata passes a Pinecone-style filter."""
+    return all(_matches(metadata.get(field), condition) for field, condition in (filter or {}).items())
+
+
+class _CollegeShard:
+    """One college's chunks: a memory-mapped (n, dim) matrix, ids, types, metadata, optional IVF lists."""
+
+    def __init__(self, directory: str, slug: str):
+        self.vectors = np.load(os.path.join(directory, f"{slug}.npy"), mmap_mode="r")
+        with open(os.path.join(directory, f"{slug}.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.ids: List[str] = meta["ids"]
+        self.metadata: List[Dict] = meta["metadata"]
+        # type -> row numbers, so the type prefilter is evaluated once per distinct type
+        rows_by_type: Dict[object, List[int]] = {}
+        for row, m in enumerate(self.metadata):
+            rows_by_type.setdefault(m.get("type"), []).append(row)
+        self.type_rows = {t: np.asarray(rows, dtype=np.int64) for t, rows in rows_by_type.items()}
+        self.centroids: Optional[np.ndarray] = None
+        self.assign: Optional[np.ndarray] = None
+        ivf_path = os.path.join(directory, f"{slug}.ivf.npz")
+        if os.path.exists(ivf_path):
+            with np.load(ivf_path) as ivf:
+                self.centroids, self.assign = ivf["centroids"], ivf["assign"]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def candidates(self, query: np.ndarray, type_condition, use_ivf: bool, nprobe: int) -> np.ndarray:
+        if type_condition is None:
+            rows = np.arange(len(self.ids))
+        else:
+            selected = [rows for t, rows in self.type_rows.items() if _matches(t, type_condition)]
+            if len(selected) == len(self.type_rows):
+                rows = np.arange(len(self.ids))
+            else:
+                rows = np.sort(np.concatenate(selected)) if selected else np.zeros(0, dtype=np.int64)
+        if use_ivf and self.centroids is not None and len(rows):
+            probe = np.argsort(-(self.centroids @ query))[:nprobe]
+            rows = rows[np.isin(self.assign[rows], probe)]
+        return rows
+
+
+def _kmeans(vectors: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Spherical k-means (unit vectors, dot-product assignment) for the IVF coarse quantizer."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(k):
+            members = vectors[assign == c]
+            if len(members):
+                centroid = members.mean(axis=0)
+                centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+    return centroids, np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+
+
+class LocalVectorStore:
+    """
+    In-process vector index with the Pinecone query interface.
+
+    Chunks are sharded by `college_name`: each shard is a unit-normalized
+    float32 (or float16) matrix saved as .npy and memory-mapped on load, with
+    ids and metadata alongside. A query prefilters shards on college_name and
+    rows on type, then scores by dot product (cosine). With search="ivf" every
+    shard gets an IVF coarse quantizer (at most one list per row) and probes
+    only the `nprobe` nearest lists; with "auto" that is a size-gated
+    optimisation for shards of at least `ivf_min_rows` chunks. Records use the format the indexing script
+    upserts to Pinecone: {"id", "values", "metadata": {"college_name", "type", "text", ...}}.
+    """
+
+    def __init__(self, path: str = VECTOR_STORE_PATH, dtype: str = VECTOR_STORE_DTYPE,
+                 search: str = VECTOR_STORE_SEARCH, ivf_min_rows: int = IVF_MIN_ROWS, nprobe: int = IVF_NPROBE):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.search = search
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self._lock = threading.Lock()
+        self._shards: Dict[str, _CollegeShard] = {}
+        self._manifest: Dict = {"dimension": None, "colleges": {}}
+        # Bumped on every (re)load so derived indexes (BM25) know to rebuild
+        self.version = 0
+        self._load()
+
+    # ---------- Loading & building ----------
+    def _manifest_path(self) -> str:
+        return os.path.join(self.path, "manifest.json")
+
+    def _load(self):
+        if not os.path.exists(self._manifest_path()):
+            return
+        with open(self._manifest_path(), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        shards = {college: _CollegeShard(self.path, slug) for college, slug in manifest["colleges"].items()}
+        self._manifest, self._shards = manifest, shards
+        self.version += 1
+
+    def upsert(self, vectors: Sequence[Dict], **kwargs):
+        """Add or replace records; each touched college's shard is rewritten."""
+        by_college: Dict[str, Dict[str, Dict]] = {}
+        for record in vectors:
+            college = (record.get("metadata") or {}).get("college_name") or "_unassigned"
+            by_college.setdefault(college, {})[record["id"]] = record
+        with self._lock:
+            # An id moving to another college must leave its old shard
+            moved = {rid for records in by_college.values() for rid in records}
+            for college in set(self._shards) - set(by_college):
+                if any(rid in moved for rid in self._shards[college].ids):
+                    by_college[college] = {}
+            for college, records in by_college.items():
+                existing = self._shard_records(college)
+                existing = {rid: rec for rid, rec in existing.items() if rid not in moved or rid in records}
+                existing.update(records)
+                self._write_shard(college, list(existing.values()))
+            self._write_manifest()
+            self._load()
+        return {"upserted_count": len(vectors)}
+
+    def _shard_records(self, college: str) -> Dict[str, Dict]:
+        shard = self._shards.get(college)
+        if shard is None:
+            return {}
+        return {
+            rid: {"id": rid, "values": np.asarray(shard.vectors[i], dtype=np.float32), "metadata": shard.metadata[i]}
+            for i, rid in enumerate(shard.ids)
+        }
+
+    def _write_shard(self, college: str, records: List[Dict]):
+        slug = self._manifest["colleges"].get(college) or self._unique_slug(college)
+        os.makedirs(self.path, exist_ok=True)
+        if not records:
+            for suffix in (".npy", ".json", ".ivf.npz"):
+                if os.path.exists(os.path.join(self.path, slug + suffix)):
+                    os.remove(os.path.join(self.path, slug + suffix))
+            self._manifest["colleges"].pop(college, None)
+            return
+        matrix = np.vstack([np.asarray(r["values"], dtype=np.float32) for r in records])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1.0, norms)
+        self._manifest["dimension"] = int(matrix.shape[1])
+
+        # Shards are replaced atomically so a concurrent reader keeps its old memmap
+        tmp = os.path.join(self.path, f"{slug}.tmp.npy")
+        np.save(tmp, matrix.astype(self.dtype))
+        os.replace(tmp, os.path.join(self.path, f"{slug}.npy"))
+        tmp = os.path.join(self.path, f"{slug}.tmp.json")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"ids": [r["id"] for r in records], "metadata": [r.get("metadata") or {} for r in records]}, f)
+        os.replace(tmp, os.path.join(self.path, f"{slug}.json"))
+
+        ivf_path = os.path.join(self.path, f"{slug}.ivf.npz")
+        if self.search == "ivf" or (self.search == "auto" and len(records) >= self.ivf_min_rows):
+            nlist = min(len(records), max(1, int(np.sqrt(len(records)))))
+            centroids, assign = _kmeans(matrix, k=nlist)
+            np.savez(ivf_path, centroids=centroids, assign=assign)
+        elif os.path.exists(ivf_path):
+            os.remove(ivf_path)
+        self._manifest["colleges"][college] = slug
+
+    def _unique_slug(self, college: str) -> str:
+        slug, taken, n = _slug(college), set(self._manifest["colleges"].values()), 1
+        candidate = slug
+        while candidate in taken:
+            n += 1
+            candidate = f"{slug}_{n}"
+        return candidate
+
+    def _write_manifest(self):
+        tmp = self._manifest_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp, self._manifest_path())
+
+    # ---------- Pinecone-compatible API ----------
+    def query(self, vector: Sequence[float], top_k: int = 10, filter: Optional[Dict] = None,
+              include_metadata: bool = True, include_values: bool = False, **kwargs) -> Dict:
+        filter = filter or {}
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        college_condition = filter.get("college_name")
+        type_condition = filter.get("type")
+        other = {k: v for k, v in filter.items() if k not in ("college_name", "type")}
+
+        shards = self._shards
+        hits: List[Tuple[float, str, int]] = []
+        for college, shard in shards.items():
+            if college_condition is not None and not _matches(college, college_condition):
+                continue
+            use_ivf = self.search == "ivf" or (self.search == "auto" and len(shard) >= self.ivf_min_rows)
+            rows = shard.candidates(query, type_condition, use_ivf, self.nprobe)
+            if other:
+                rows = np.array([r for r in rows if metadata_matches(shard.metadata[r], other)], dtype=np.int64)
+            if not len(rows):
+                continue
+            # Scoring the whole shard and masking beats gathering rows unless few are left (IVF)
+            if len(rows) * 4 < len(shard):
+                scores = np.asarray(shard.vectors[rows] @ query.astype(shard.vectors.dtype), dtype=np.float32)
+            else:
+                scores = np.asarray(shard.vectors @ query.astype(shard.vectors.dtype), dtype=np.float32)[rows]
+            k = min(top_k, len(rows))
+            best = np.argpartition(-scores, k - 1)[:k]
+            hits.extend((float(scores[i]), college, int(rows[i])) for i in best)
+
+        hits.sort(key=lambda h: -h[0])
+        matches = []
+        for score, college, row in hits[:top_k]:
+            shard = shards[college]
+            match = {"id": shard.ids[row], "score": score}
+            if include_metadata:
+                match["metadata"] = shard.metadata[row]
+            if include_values:
+                match["values"] = np.asarray(shard.vectors[row], dtype=np.float32).tolist()
+            matches.append(match)
+        return {"matches": matches}
+
+    def list(self, prefix: Optional[str] = None, limit: int = 100, **kwargs) -> Iterator[List[str]]:
+        ids = [rid for shard in self._shards.values() for rid in shard.ids if not prefix or rid.startswith(prefix)]
+        for start in range(0, len(ids), limit):
+            yield ids[start:start + limit]
+
+    def fetch(self, ids: Iterable[str], **kwargs) -> Dict:
+        wanted, vectors = set(ids), {}
+        for shard in self._shards.values():
+            for row, rid in enumerate(shard.ids):
+                if rid in wanted:
+                    vectors[rid] = {
+                        "id": rid,
+                        "values": np.asarray(shard.vectors[row], dtype=np.float32).tolist(),
+                        "metadata": shard.metadata[row],
+                    }
+        return {"vectors": vectors}
+
+    def chunks(self) -> List[Dict]:
+        """Every chunk as {"id", "text", "metadata"}, for building text indexes."""
+        return [
+            {"id": rid, "text": shard.metadata[row].get("text", ""), "metadata": shard.metadata[row]}
+            for shard in self._shards.values() for row, rid in enumerate(shard.ids)
+        ]
+
+    def describe_index_stats(self, **kwargs) -> Dict:
+        return {
+            "dimension": self._manifest.get("dimension"),
+            "total_vector_count": sum(len(shard) for shard in self._shards.values()),
+            "colleges": {college: len(shard) for college, shard in self._shards.items()},
+        }
+
+
+# ---------- Factory ----------
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_vector_store():
+    """The process-wide index for VECTOR_STORE_BACKEND (a Pinecone Index or a LocalVectorStore)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if VECTOR_STORE_BACKEND == "local":
+                    _store = LocalVectorStore()
+                    print(f"🗂️ Local vector store: {_store.describe_index_stats()['total_vector_count']} chunks")
+                else:
+                    from pinecone import Pinecone
+
+                    _store = Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(PINECONE_INDEX_NAME)
+    return _store
+
+
+def export_from_pinecone(store: LocalVectorStore, batch_size: int = 100) -> int:
+    """Copy every vector in the Pinecone index into `store` (one-off, or after ingestion)."""
+    from pinecone import Pinecone
+
+    index = Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(PINECONE_INDEX_NAME)
+    records = []
+    for page in index.list():
+        ids = list(page)
+        for start in range(0, len(ids), batch_size):
+            response = index.fetch(ids=ids[start:start + batch_size])
+            vectors = response["vectors"] if isinstance(response, dict) else response.vectors
+            for vector_id, vector in vectors.items():
+                values = vector["values"] if isinstance(vector, dict) else vector.values
+                metadata = vector["metadata"] if isinstance(vector, dict) else vector.metadata
+                records.append({"id": vector_id, "values": values, "metadata": dict(metadata or {})})
+    store.upsert(records)
+    return len(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local vector store")
+    parser.add_argument("command", choices=["export", "stats"])
+    parser.add_argument("--path", default=VECTOR_STORE_PATH)
+    args = parser.parse_args()
+    local_store = LocalVectorStore(path=args.path)
+    if args.command == "export":
+        print(f"✅ Exported {export_from_pinecone(local_store)} vectors to {args.path}")
+    print(json.dumps(local_store.describe_index_stats(), indent=2))
@@ -5,6 +5,7 @@ from langchain_openai import ChatOpenAI
 import os
 import json
 from dotenv import load_dotenv
+from multi_Agents.college_registry import college_resolver
 
 load_dotenv()
 
@@ -78,16 +79,8 @@ class WebSearchComparisonAgent:
         }
 
     def _extract_colleges_simple(self, query: str) -> List[str]:
-        """Basic college name extraction"""
-        colleges = []
-        common_colleges = ["MIT", "Stanford", "Harvard", "Yale", 
-                         "Columbia", "NYU", "Caltech", "Georgia Tech"]
-        for college in common_colleges:
-            if college.lower() in query.lower():
-                colleges.append(college)
-                if len(colleges) == 2:
-                    break
-        return colleges
+        """First two colleges mentioned, by display name"""
+        return [college.name for college in college_resolver.find(query)[:2]]
 
     async def _web_search(self, query: str) -> Dict:
         """Search with error handling"""
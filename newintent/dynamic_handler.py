@@ -1,21 +1,20 @@
-from langchain_openai import ChatOpenAI
-from typing import List, Dict
+from multi_Agents.llm_client import acomplete
+from typing import Dict, Sequence
 
 class DynamicIntentHandler:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.3)
+        self.llm_model = "gpt-3.5-turbo"
         self.examples = [
             "Find colleges with strong CS programs",
             "Suggest universities for 3.5 GPA students",
             "Compare tuition between public and private schools"
         ]
 
-    async def handle_unknown(self, query: str, history: List[Dict]) -> str:
+    async def handle_unknown(self, query: str, history: Sequence[Dict]) -> str:
         prompt = self._build_prompt(query, history)
-        response = await self.llm.ainvoke(prompt)
-        return response.content
+        return await acomplete(prompt, model=self.llm_model, temperature=0.3)
 
-    def _build_prompt(self, query: str, history: List[Dict]) -> str:
+    def _build_prompt(self, query: str, history: Sequence[Dict]) -> str:
         return f"""You're a college advisor. Handle this unexpected query:
         
         Previous conversation:
@@ -32,8 +31,9 @@ class DynamicIntentHandler:
         
         Keep response under 75 words."""
 
-    def _format_history(self, history: List[Dict]) -> str:
+    def _format_history(self, history: Sequence[Dict]) -> str:
+        # history may be a deque, which doesn't slice
         return "\n".join([
             f"User: {h['query']}\nAI: {h['response']}" 
-            for h in history[-3:]
+            for h in list(history)[-3:]
         ])
\ No newline at end of file
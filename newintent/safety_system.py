@@ -1,6 +1,7 @@
 import json
-from typing import Dict, List
-from langchain_openai import ChatOpenAI
+from typing import Dict, Sequence
+from multi_Agents.llm_client import acomplete
+from newintent.safety_prefilter import safety_prefilter
 
 class SafetySystem:
     def __init__(self):
@@ -10,10 +11,11 @@ class SafetySystem:
             "remote code", "system(", "eval(", "exec(",
             "import os", "delete from", "drop table"
         }
-        self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+        self.llm_model = "gpt-3.5-turbo"
         self.max_retries = 2
+        self.prefilter = safety_prefilter
 
-    async def check_query(self, query: str, history: List[Dict]) -> Dict:
+    async def check_query(self, query: str, history: Sequence[Dict]) -> Dict:
         """Three-layer safety check"""
         # Layer 1: Immediate hard block
         if self._hard_block_check(query):
@@ -24,8 +26,9 @@ class SafetySystem:
                 "response": "I can't assist with that request."
             }
 
-        # Layer 2: LLM content moderation
-        moderation = await self._llm_moderation(query)
+        # Layer 2: content moderation; the embedding pre-filter settles clear
+        # cases locally and only low-confidence queries reach the LLM
+        moderation = await self.prefilter.moderate(query, self._llm_moderation)
         if not moderation["safe"]:
             return {
                 "safe": False,
@@ -60,8 +63,10 @@ class SafetySystem:
 Query: {query}"""
 
         try:
-            response = await self.llm.ainvoke(prompt)
-            return json.loads(response.content)
+            # Not cached as raw text: a non-JSON reply would fail to parse on every replay.
+            # Parsed decisions are cached by safety_prefilter instead.
+            response = await acomplete(prompt, model=self.llm_model, temperature=0, cache=False)
+            return json.loads(response)
         except Exception as e:
             print(f"Moderation error: {str(e)}")
             return {"safe": False, "categories": ["error"], "confidence": 0.9}
@@ -75,12 +80,12 @@ Query: {query}"""
         }
         return responses.get(result["categories"][0], "How can I help with college search?")
 
-    def _violates_policy(self, query: str, history: List[Dict]) -> bool:
+    def _violates_policy(self, query: str, history: Sequence[Dict]) -> bool:
         """Check if user is persistently off-topic"""
         if len(history) < self.max_retries:
             return False
             
-        last_interactions = [h["query"] for h in history[-self.max_retries:]]
+        last_interactions = [history[i]["query"] for i in range(-self.max_retries, 0)]
         return all(not self._is_college_related(q) for q in last_interactions + [query])
 
     def _is_college_related(self, query: str) -> bool:
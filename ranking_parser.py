@@ -0,0 +1,161 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+from rankings_store import RankingsStore
+
+# ---------- Deterministic ranking-question parser ----------
+# Turns questions like "who is ranked 47th", "top 20", "ranks 10-15",
+# "between 5th and 8th" or "MIT vs Oxford ranking" into a RankingQuery that
+# is answered straight from the RankingsStore, with no LLM involved.
+
+MAX_LISTED = 50
+
+WORD_NUMBERS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20,
+    "twenty five": 25, "thirty": 30, "fifty": 50, "hundred": 100, "a hundred": 100, "one hundred": 100,
+}
+WORD_ORDINALS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "sixth": 6, "seventh": 7,
+    "eighth": 8, "ninth": 9, "tenth": 10, "eleventh": 11, "twelfth": 12, "thirteenth": 13,
+    "fourteenth": 14, "fifteenth": 15, "sixteenth": 16, "seventeenth": 17, "eighteenth": 18,
+    "nineteenth": 19, "twentieth": 20,
+}
+
+_NUMBER = r"(\d+|" + "|".join(sorted(WORD_NUMBERS, key=len, reverse=True)) + r")"
+_POSITION = r"#?\s*(\d+)(?:st|nd|rd|th)?"
+
+YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+RANGE_RE = re.compile(
+    rf"(?:ranks?|ranked|ranking|positions?|places?|#)\s*{_POSITION}\s*(?:-|–|—|to|through|thru)\s*{_POSITION}"
+)
+BETWEEN_RE = re.compile(rf"between\s+(?:ranks?\s+|positions?\s+)?{_POSITION}\s+and\s+{_POSITION}")
+TOP_N_RE = re.compile(rf"\b(?:top|best|first|highest[- ]ranked)\s+{_NUMBER}\b")
+TOP_ONE_RE = re.compile(
+    r"\b(?:top|best|highest[- ]ranked|number one|no\.? ?1)\s+(?:ranked\s+)?(?:university|college|school|institution)\b"
+    r"|\bwho(?:'s| is) (?:the )?(?:top|best|number one)\b"
+)
+TOP_PLAIN_RE = re.compile(r"\btop\s+(?:ranked\s+)?(?:universities|colleges|schools|institutions)\b")
+POSITION_RE = re.compile(
+    r"\b(\d+)(?:st|nd|rd|th)\b"
+    r"|(?:number|no\.?|#|rank(?:ed)?(?: at)?|position|place)\s*(\d+)\b"
+)
+_WORD_ORDINAL = r"(" + "|".join(sorted(WORD_ORDINALS, key=len, reverse=True)) + r")"
+WORD_ORDINAL_RE = re.compile(rf"\b{_WORD_ORDINAL}\b")
+# Word ordinals that clearly ask for a position even without "rank": "who is first", "the third best university"
+ORDINAL_QUESTION_RE = re.compile(
+    rf"\bwho(?:'s| is) (?:the )?{_WORD_ORDINAL}\b"
+    rf"|\b{_WORD_ORDINAL}\s+(?:best|highest[- ]ranked|ranked|place|university|college|school|institution)\b"
+)
+
+
+@dataclass
+class RankingQuery:
+    kind: str  # "universities" | "range" | "top" | "rank" | "unknown"
+    positions: List[int] = field(default_factory=list)
+    universities: List[Dict] = field(default_factory=list)
+    matched_names: List[str] = field(default_factory=list)  # the question's words that named each university
+
+
+def _to_int(token: str) -> int:
+    return int(token) if token.isdigit() else WORD_NUMBERS[token]
+
+
+def parse_ranking_question(question: str, store: RankingsStore) -> RankingQuery:
+    """Classify a ranking question; positions hold [rank], [n] for top-n or [low, high]."""
+    text = YEAR_RE.sub(" ", question.lower())
+
+    matches = store.find_matches(question)
+    if matches:
+        return RankingQuery("universities", universities=[entry for _, entry in matches],
+                            matched_names=[key for key, _ in matches])
+
+    match = RANGE_RE.search(text) or BETWEEN_RE.search(text)
+    if match:
+        low, high = sorted((int(match.group(1)), int(match.group(2))))
+        return RankingQuery("range", positions=[low, high])
+
+    match = TOP_N_RE.search(text)
+    if match:
+        return RankingQuery("top", positions=[_to_int(match.group(1))])
+
+    # Explicit positions come before "best university" ("the 3rd best university" is #3)
+    match = POSITION_RE.search(text)
+    if match:
+        return RankingQuery("rank", positions=[int(match.group(1) or match.group(2))])
+    match = ORDINAL_QUESTION_RE.search(text)
+    if match:
+        return RankingQuery("rank", positions=[WORD_ORDINALS[match.group(1) or match.group(2)]])
+    match = WORD_ORDINAL_RE.search(text)
+    if match and ("rank" in text or "qs" in text):
+        return RankingQuery("rank", positions=[WORD_ORDINALS[match.group(1)]])
+
+    if TOP_ONE_RE.search(text):
+        return RankingQuery("rank", positions=[1])
+    if TOP_PLAIN_RE.search(text):
+        return RankingQuery("top", positions=[10])
+    return RankingQuery("unknown")
+
+
+def mentioned_positions(question: str) -> Set[int]:
+    """Every explicit rank number in the question ("5th", "#12", "ranked 3", "who is first", "top 5")."""
+    text = YEAR_RE.sub(" ", question.lower())
+    positions = {int(m.group(1) or m.group(2)) for m in POSITION_RE.finditer(text)}
+    positions.update(_to_int(m.group(1)) for m in TOP_N_RE.finditer(text))
+    positions.update(WORD_ORDINALS[m.group(1) or m.group(2)] for m in ORDINAL_QUESTION_RE.finditer(text))
+    return positions
+
+
+# ---------- Answer formatting ----------
+def _format_list(title: str, entries: List[Dict]) -> str:
+    lines = [f"#{uni['rank']}: {uni['name']}" for uni in entries[:MAX_LISTED]]
+    if len(entries) > MAX_LISTED:
+        lines.append(f"... and {len(entries) - MAX_LISTED} more")
+    return f"{title}:\n" + "\n".join(lines)
+
+
+def _format_universities(universities: List[Dict]) -> str:
+    if len(universities) == 1:
+        uni = universities[0]
+        return f"{uni['name']} is ranked #{uni['rank']}"
+    answer = "\n".join(f"{uni['name']} is ranked #{uni['rank']}" for uni in universities)
+    if len(universities) == 2:
+        first, second = sorted(universities, key=lambda u: u["position"])
+        if first["position"] == second["position"]:
+            answer += f"\n{first['name']} and {second['name']} are tied in the QS rankings"
+        else:
+            answer += f"\n{first['name']} ranks higher than {second['name']}"
+    return answer
+
+
+def answer_ranking_question(question: str, store: RankingsStore, query: Optional[RankingQuery] = None) -> Optional[Dict]:
+    """
+    Answer from the store, or None when the question isn't a recognizable
+    ranking lookup. Pass `query` when the question has already been parsed.
+    """
+    if query is None:
+        query = parse_ranking_question(question, store)
+
+    if query.kind == "universities":
+        answer = _format_universities(query.universities)
+    elif query.kind == "range":
+        low, high = query.positions
+        entries = store.between(low, high)
+        answer = (_format_list(f"QS Rankings #{low}-#{high}", entries) if entries
+                  else f"No universities are listed between #{low} and #{high} in the QS rankings")
+    elif query.kind == "top":
+        n = query.positions[0]
+        answer = _format_list(f"Top {n} QS Rankings", store.top(n))
+    elif query.kind == "rank":
+        position = query.positions[0]
+        entries = store.rank(position)
+        if not entries:
+            answer = f"No university is listed at #{position} in the QS rankings"
+        elif len(entries) == 1:
+            answer = f"The #{position} ranked university is {entries[0]['name']}"
+        else:
+            answer = f"The #{position} ranked universities (tied) are " + ", ".join(e["name"] for e in entries)
+    else:
+        return None
+
+    return {"status": "success", "query_type": query.kind, "answer": answer}
@@ -0,0 +1,136 @@
+import re
+import asyncio
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from multi_Agents import model_registry
+from multi_Agents.embedding_cache import aembed_query
+from multi_Agents.llm_client import acomplete
+from rankings_store import get_store
+from ranking_parser import RankingQuery, parse_ranking_question, mentioned_positions
+
+# ---------- Local pre-router for /university_rankings ----------
+# Plain rank / name lookups are answered from the rankings store directly;
+# only open-ended questions go through the Agents runner and its LLM calls.
+
+# Phrasings the structured parser answers well
+LOOKUP_EXAMPLES = [
+    "Which university is ranked 5th?",
+    "What is MIT's ranking?",
+    "Show the top 10 universities",
+    "Who is number 1 in the QS rankings?",
+    "Universities ranked between 20 and 30",
+    "Where does Oxford rank?",
+    "How do Harvard and Stanford rank?",
+    "List the top 50 QS universities",
+]
+# Questions that mention ranks but need reasoning or knowledge beyond the table
+OPEN_EXAMPLES = [
+    "Why is MIT ranked higher than Harvard?",
+    "How has Oxford's ranking changed over the years?",
+    "How are the QS rankings calculated?",
+    "Which top 10 university is best for computer science?",
+    "Is a top 20 university worth the tuition?",
+    "What makes Cambridge rank so well?",
+    "Which highly ranked universities offer scholarships for international students?",
+]
+OPEN_ENDED_RE = re.compile(
+    r"\b(why|how come|explain|methodology|calculated|criteria|trend|history|over the years|changed|"
+    r"worth|should i|recommend|better for|best for|scholarship|admission|tuition)\b"
+)
+
+CONTEXT_SYSTEM_PROMPT = """Provide helpful context about university rankings.
+When mentioning a ranked university:
+- Note its historical ranking trends if significant
+- Mention 1-2 notable strengths
+- Suggest similar-ranked institutions
+Keep responses concise and factual."""
+MAX_CONTEXT_UNIVERSITIES = 3
+# Name matches this short are too easily coincidental to answer without the agent
+MIN_TRUSTED_NAME_LENGTH = 3
+
+
+class RankingRouter:
+    """
+    Classifies ranking questions as "direct" (answer from the store) or
+    "agent" (send to the LLM agent). A question is direct only if the
+    deterministic parser understands it, the parse passes the sanity checks
+    in `_doubtful`, it has no open-ended cue words, and its embedding is at
+    least as close to the lookup examples as to the open-ended ones.
+    """
+
+    def __init__(self, margin: float = 0.0, model_name: str = model_registry.DEFAULT_MODEL_NAME):
+        self.margin = margin
+        self.model_name = model_name
+        self._prototypes: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._lock = threading.Lock()
+
+    def _encode_prototypes(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._prototypes is None:
+            with self._lock:
+                if self._prototypes is None:
+                    lookup = model_registry.encode(LOOKUP_EXAMPLES, model_name=self.model_name, normalize_embeddings=True)
+                    open_ended = model_registry.encode(OPEN_EXAMPLES, model_name=self.model_name, normalize_embeddings=True)
+                    self._prototypes = (np.asarray(lookup), np.asarray(open_ended))
+        return self._prototypes
+
+    @staticmethod
+    def _doubtful(question: str, query: RankingQuery) -> Optional[str]:
+        """Why the parse shouldn't be answered confidently, or None when it looks sound."""
+        store = get_store()
+        for name in query.matched_names:
+            if name in store.abbreviation_keys or len(name.replace(" ", "")) < MIN_TRUSTED_NAME_LENGTH:
+                return f"name matched only by abbreviation '{name}'"
+        ignored = mentioned_positions(question) - set(query.positions)
+        if ignored:
+            return f"position {sorted(ignored)} not used by the {query.kind} parse"
+        return None
+
+    async def classify(self, question: str) -> Tuple[str, RankingQuery]:
+        """(route, parsed query); the endpoint answers "direct" routes from this same parse."""
+        store = get_store()
+        await asyncio.to_thread(store.ensure_loaded)
+        query = parse_ranking_question(question, store)
+        if query.kind == "unknown" or OPEN_ENDED_RE.search(question.lower()):
+            return "agent", query
+        reason = self._doubtful(question, query)
+        if reason:
+            print(f"🧭 Ranking route: agent ({reason})")
+            return "agent", query
+
+        lookup, open_ended = await asyncio.to_thread(self._encode_prototypes)
+        vector = np.asarray(await aembed_query(question, model_name=self.model_name), dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        lookup_score, open_score = float(np.max(lookup @ vector)), float(np.max(open_ended @ vector))
+        route = "direct" if lookup_score >= open_score + self.margin else "agent"
+        print(f"🧭 Ranking route: {route} ({query.kind}, lookup={lookup_score:.2f}, open={open_score:.2f})")
+        return route, query
+
+
+ranking_router = RankingRouter()
+
+
+# ---------- Opt-in context enrichment ----------
+async def university_context(university: Dict) -> str:
+    """Background blurb for one ranked university; cached per university by the LLM client."""
+    return await acomplete(
+        [
+            {"role": "system", "content": CONTEXT_SYSTEM_PROMPT},
+            {"role": "user", "content": f"About this university ranking: {university['name']} is ranked #{university['rank']} in the QS World University Rankings"},
+        ],
+        model="gpt-4-turbo",
+        temperature=0.3,
+    )
+
+
+async def rankings_context(answer: str) -> Optional[str]:
+    """Context for the universities named in an answer (at most MAX_CONTEXT_UNIVERSITIES)."""
+    universities: List[Dict] = get_store().find_in_text(answer)[:MAX_CONTEXT_UNIVERSITIES]
+    if not universities:
+        return None
+    blurbs = await asyncio.gather(*(university_context(uni) for uni in universities), return_exceptions=True)
+    sections = [
+        f"**{uni['name']}**\n{blurb}" for uni, blurb in zip(universities, blurbs)
+        if not isinstance(blurb, Exception)
+    ]
+    return "\n\n".join(sections) or None
@@ -0,0 +1,325 @@
+import os
+import re
+import json
+import time
+import difflib
+import threading
+from typing import Dict, List, Optional, Tuple
+import requests
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv
+from multi_Agents.college_registry import COLLEGES, AMBIGUOUS_NAMES, INSTITUTION_WORDS
+
+load_dotenv()
+
+# ---------- Rankings source & cache ----------
+QS_RANKINGS_URL = os.getenv(
+    "QS_RANKINGS_URL",
+    "https://www.topuniversities.com/sites/default/files/qs-rankings-data/en/3740566_indicators.txt"
+)
+QS_RANKINGS_PATH = os.getenv("QS_RANKINGS_PATH", ".cache/qs_rankings.json")
+QS_RANKINGS_TTL = float(os.getenv("QS_RANKINGS_TTL", str(7 * 24 * 3600)))  # QS publishes yearly
+# After a failed fetch, wait this long before trying the network again
+QS_RANKINGS_RETRY_AFTER = float(os.getenv("QS_RANKINGS_RETRY_AFTER", "300"))
+
+# Shorter parenthesised QS abbreviations ("UC", "UB") are too ambiguous to index
+MIN_ABBREVIATION_LENGTH = 3
+
+# Common short names that don't appear in the QS name itself (colleges in
+# multi_Agents.college_registry contribute their aliases too)
+ALIASES = {
+    "mit": "massachusetts institute of technology",
+    "caltech": "california institute of technology",
+    "harvard": "harvard university",
+    "stanford": "stanford university",
+    "oxford": "university of oxford",
+    "cambridge": "university of cambridge",
+    "imperial": "imperial college london",
+    "eth": "eth zurich",
+    "princeton": "princeton university",
+    "yale": "yale university",
+    "columbia": "columbia university",
+    "cornell": "cornell university",
+    "uchicago": "university of chicago",
+    "penn": "university of pennsylvania",
+    "upenn": "university of pennsylvania",
+    "berkeley": "university of california berkeley",
+    "uc berkeley": "university of california berkeley",
+    "ucla": "university of california los angeles",
+    "ucsd": "university of california san diego",
+    "cmu": "carnegie mellon university",
+    "nyu": "new york university",
+    "jhu": "johns hopkins university",
+    "johns hopkins": "johns hopkins university",
+    "duke": "duke university",
+    "northwestern": "northwestern university",
+    "michigan": "university of michigan ann arbor",
+    "umich": "university of michigan ann arbor",
+    "nus": "national university of singapore",
+    "ntu": "nanyang technological university singapore",
+    "lse": "the london school of economics and political science",
+    "kcl": "king's college london",
+    "hku": "the university of hong kong",
+    "tsinghua": "tsinghua university",
+    "peking": "peking university",
+    "toronto": "university of toronto",
+    "mcgill": "mcgill university",
+    "georgia tech": "georgia institute of technology",
+}
+
+
+def normalize_name(text: str) -> str:
+    """Lowercase, drop possessives and punctuation, collapse whitespace ("MIT's" -> "mit")."""
+    text = re.sub(r"['’]s\b", "", text.lower()).replace("'", "").replace("’", "")
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9]+", " ", text)).strip()
+
+
+def _cased_tokens(text: str) -> List[str]:
+    # normalize_name without the lowercasing, token for token
+    text = re.sub(r"['’][sS]\b", "", text).replace("'", "").replace("’", "")
+    return re.sub(r"\s+", " ", re.sub(r"[^A-Za-z0-9]+", " ", text)).strip().split()
+
+
+def parse_rank(rank: str) -> Optional[int]:
+    """'1' -> 1, '=12' -> 12, '601-610' -> 601; None when there is no number."""
+    match = re.search(r"\d+", str(rank))
+    return int(match.group(0)) if match else None
+
+
+class RankingsStore:
+    """
+    Indexed QS rankings.
+
+    Entries are kept sorted by position with a dict by rank (ties share a
+    position), a normalized-name index that also covers the abbreviation QS
+    puts in parentheses plus ALIASES, and a token n-gram table for finding
+    universities mentioned inside a question. The parsed table is persisted to
+    `path` as JSON; a fresh file loads without touching the network, and a
+    stale one is revalidated with ETag / Last-Modified before re-parsing.
+    """
+
+    def __init__(self, path: str = QS_RANKINGS_PATH, ttl: float = QS_RANKINGS_TTL, url: str = QS_RANKINGS_URL):
+        self.path = path
+        self.ttl = ttl
+        self.url = url
+        self._lock = threading.Lock()
+        self._meta: Dict = {}
+        self.entries: List[Dict] = []
+        self.by_rank: Dict[int, List[Dict]] = {}
+        self.by_name: Dict[str, Dict] = {}
+        # by_name keys that exist only as a QS abbreviation (no name or alias says so)
+        self.abbreviation_keys = set()
+        self._ngram_len = 1
+        self._retry_at = 0.0  # no network attempt before this time (set after a failed fetch)
+
+    # ---------- Loading ----------
+    def ensure_loaded(self):
+        if self.entries and not self._due():
+            return
+        with self._lock:
+            if not self.entries or self._due():
+                self._load()
+
+    def _expired(self) -> bool:
+        return time.time() - self._meta.get("fetched_at", 0) > self.ttl
+
+    def _due(self) -> bool:
+        """Stale and not inside the back-off window of a failed fetch."""
+        return self._expired() and time.time() >= self._retry_at
+
+    def _load(self):
+        cached = self._read_file()
+        if cached and time.time() - cached.get("fetched_at", 0) <= self.ttl:
+            self._install(cached)
+            return
+        if time.time() < self._retry_at:
+            # Still backing off: serve the stale copy if there is one, without another network attempt
+            if not cached:
+                raise RuntimeError("QS rankings unavailable, last fetch failed")
+            self._install(cached)
+            return
+        try:
+            fresh = self._fetch(cached)
+        except Exception as e:
+            self._retry_at = time.time() + QS_RANKINGS_RETRY_AFTER
+            if not cached:
+                raise
+            print(f"⚠️ QS rankings refresh failed, serving cached copy for {QS_RANKINGS_RETRY_AFTER:.0f}s: {e}")
+            fresh = cached
+        else:
+            self._retry_at = 0.0
+        self._install(fresh)
+
+    def _read_file(self) -> Optional[Dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _fetch(self, cached: Optional[Dict]) -> Dict:
+        headers = {"User-Agent": "Mozilla/5.0"}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        response = requests.get(self.url, headers=headers, timeout=30)
+        if response.status_code == 304 and cached:
+            print("🏆 QS rankings unchanged (304), extending cached copy")
+            cached["fetched_at"] = time.time()
+            self._write_file(cached)
+            return cached
+        response.raise_for_status()
+
+        entries = []
+        for entry in response.json()["data"]:
+            soup = BeautifulSoup(entry["uni"], "html.parser")
+            link = soup.select_one(".uni-link")
+            if link is None:
+                continue
+            entries.append({"name": link.get_text(strip=True), "rank": str(entry["overall_rank"])})
+        data = {
+            "fetched_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "entries": entries,
+        }
+        self._write_file(data)
+        print(f"🏆 Fetched {len(entries)} QS rankings")
+        return data
+
+    def _write_file(self, data: Dict):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def _install(self, data: Dict):
+        entries = []
+        for raw in data["entries"]:
+            position = parse_rank(raw["rank"])
+            if position is not None:
+                entries.append({"name": raw["name"], "rank": raw["rank"], "position": position})
+        entries.sort(key=lambda e: e["position"])
+
+        by_rank: Dict[int, List[Dict]] = {}
+        by_name: Dict[str, Dict] = {}
+        abbreviations: Dict[str, List[Dict]] = {}
+        for entry in entries:
+            by_rank.setdefault(entry["position"], []).append(entry)
+            by_name.setdefault(normalize_name(entry["name"]), entry)
+            for abbr in re.findall(r"\(([^)]+)\)", entry["name"]):
+                abbreviations.setdefault(normalize_name(abbr), []).append(entry)
+            base = normalize_name(re.sub(r"\([^)]*\)", "", entry["name"]))
+            by_name.setdefault(base, entry)
+            if base.startswith("the "):
+                by_name.setdefault(base[4:], entry)
+        for alias, target in ALIASES.items():
+            target = normalize_name(target)
+            entry = by_name.get(target) or self._closest(target, by_name)
+            if entry is not None:
+                by_name.setdefault(normalize_name(alias), entry)
+        # Names and aliases from the shared college registry reach the same entry
+        for college in COLLEGES:
+            entry = by_name.get(normalize_name(college.qs)) or by_name.get(normalize_name(college.full_name))
+            if entry is not None:
+                for alias in (college.name, *college.aliases):
+                    by_name.setdefault(normalize_name(alias), entry)
+        # "Massachusetts Institute of Technology (MIT)" is also reachable as "mit", but
+        # abbreviations are indexed last and skipped when shorter than 3 characters or
+        # shared by several universities: "(UC)" would otherwise turn "UC Davis" into
+        # the Pontificia Universidad Católica de Chile
+        abbreviation_keys = set()
+        for abbr, owners in abbreviations.items():
+            if (len(abbr.replace(" ", "")) >= MIN_ABBREVIATION_LENGTH and len({e["name"] for e in owners}) == 1
+                    and abbr not in by_name):
+                by_name[abbr] = owners[0]
+                abbreviation_keys.add(abbr)
+
+        self.entries, self.by_rank, self.by_name = entries, by_rank, by_name
+        self.abbreviation_keys = abbreviation_keys
+        self._ngram_len = max((len(name.split()) for name in by_name), default=1)
+        self._meta = {k: data.get(k) for k in ("fetched_at", "etag", "last_modified")}
+
+    # ---------- Lookups ----------
+    def rank(self, position: int) -> List[Dict]:
+        """Every university at `position` (ties share a rank)."""
+        self.ensure_loaded()
+        return self.by_rank.get(position, [])
+
+    def top(self, n: int) -> List[Dict]:
+        self.ensure_loaded()
+        return self.entries[:max(0, n)]
+
+    def between(self, low: int, high: int) -> List[Dict]:
+        """Universities ranked low..high inclusive, in rank order."""
+        self.ensure_loaded()
+        low, high = min(low, high), max(low, high)
+        return [e for e in self.entries if low <= e["position"] <= high]
+
+    def lookup(self, name: str, fuzzy: bool = True) -> Optional[Dict]:
+        """Exact normalized name, abbreviation or alias; then a close fuzzy match."""
+        self.ensure_loaded()
+        key = normalize_name(name)
+        entry = self.by_name.get(key)
+        if entry is None and fuzzy:
+            entry = self._closest(key, self.by_name)
+        return entry
+
+    def find_matches(self, text: str) -> List[Tuple[str, Dict]]:
+        """
+        (matched name key, entry) for universities named in `text`, longest
+        match first, in order of mention. Registry names that are also everyday
+        words ("rice", "brown") only count when capitalised or followed by
+        "university"/"college", as in college_registry.
+        """
+        self.ensure_loaded()
+        cased = _cased_tokens(text)
+        tokens = [token.lower() for token in cased]
+        found: List[Tuple[str, Dict]] = []
+        seen = set()
+        i = 0
+        while i < len(tokens):
+            for size in range(min(self._ngram_len, len(tokens) - i), 0, -1):
+                key = " ".join(tokens[i:i + size])
+                entry = self.by_name.get(key)
+                if entry is not None and size == 1 and key in AMBIGUOUS_NAMES:
+                    following = tokens[i + 1] if i + 1 < len(tokens) else ""
+                    if not cased[i][0].isupper() and following not in INSTITUTION_WORDS:
+                        entry = None
+                if entry is not None:
+                    if entry["name"] not in seen:
+                        seen.add(entry["name"])
+                        found.append((key, entry))
+                    i += size
+                    break
+            else:
+                i += 1
+        return found
+
+    def find_in_text(self, text: str) -> List[Dict]:
+        """Universities named anywhere in `text`, longest match first, in order of mention."""
+        return [entry for _, entry in self.find_matches(text)]
+
+    @staticmethod
+    def _closest(key: str, by_name: Dict[str, Dict]) -> Optional[Dict]:
+        match = difflib.get_close_matches(key, by_name.keys(), n=1, cutoff=0.85)
+        return by_name[match[0]] if match else None
+
+    def __len__(self):
+        return len(self.entries)
+
+
+_store: Optional[RankingsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> RankingsStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RankingsStore()
+    return _store
@@ -8,13 +8,12 @@ import signal
 from functools import wraps
 from datetime import datetime
 import snowflake.connector
-from bs4 import BeautifulSoup
-import requests
 from typing import Dict
+from rankings_store import get_store
+from ranking_parser import answer_ranking_question
 
 # Create MCP server with timeout
 mcp = FastMCP("EnhancedServer", request_timeout=60)
-QS_RANKINGS_CACHE = None
 
 
 
@@ -44,62 +43,26 @@ def timeout(seconds=30):
 @timeout(60)
 def get_qs_rankings(question: str) -> Dict:
     """
-    Improved version that better handles ranking questions like:
-    - "Which university is ranked 1st?"
-    - "Who is number 1 in QS rankings?"
-    - "Top ranked university?"
+    Answers QS ranking questions straight from the indexed rankings store:
+    - "Which university is ranked 47th?" / "Who is number 1?"
+    - "Show the top 20 universities"
+    - "Universities ranked 10-15" / "between 5th and 8th"
+    - "How do MIT and Oxford rank?"
     """
-    global QS_RANKINGS_CACHE
-
     try:
-        # Load data if not cached
-        if QS_RANKINGS_CACHE is None:
-            url = "https://www.topuniversities.com/sites/default/files/qs-rankings-data/en/3740566_indicators.txt"
-            headers = {"User-Agent": "Mozilla/5.0"}
-            
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            QS_RANKINGS_CACHE = []
-            for entry in response.json()["data"]:
-                soup = BeautifulSoup(entry["uni"], "html.parser")
-                name = soup.select_one(".uni-link").get_text(strip=True)
-                rank = entry["overall_rank"]
-                QS_RANKINGS_CACHE.append({"name": name, "rank": rank})
-
-        question_lower = question.lower()
-
-        # 1. Direct rank queries (e.g., "1st", "2nd", "ranked 5th")
-        rank_words = ["1st", "2nd", "3rd", "4th", "5th", "first", "second", "third"]
-        for i, word in enumerate(rank_words, 1):
-            if word in question_lower:
-                for uni in QS_RANKINGS_CACHE:
-                    if uni["rank"] == str(i):
-                        return {
-                            "status": "success",
-                            "answer": f"The #{i} ranked university is {uni['name']}"
-                        }
-
-        # 2. "Top university?" or "Who is number 1?"
-        if any(keyword in question_lower for keyword in ["top university", "number 1", "ranked 1st"]):
-            top_uni = next(uni for uni in QS_RANKINGS_CACHE if uni["rank"] == "1")
-            return {
-                "status": "success",
-                "answer": f"The top-ranked university is {top_uni['name']}"
-            }
+        # Indexed store, loaded from the local cache file when fresh
+        store = get_store()
+        store.ensure_loaded()
 
-        # 3. University name search (e.g., "MIT ranking")
-        for uni in QS_RANKINGS_CACHE:
-            if uni["name"].lower() in question_lower:
-                return {
-                    "status": "success",
-                    "answer": f"{uni['name']} is ranked #{uni['rank']}"
-                }
+        result = answer_ranking_question(question, store)
+        if result is not None:
+            return result
 
-        # 4. Fallback: Return top 5 if no specific match
-        top_5 = "\n".join([f"#{uni['rank']}: {uni['name']}" for uni in QS_RANKINGS_CACHE[:5]])
+        # Fallback: Return top 5 if no specific match
+        top_5 = "\n".join([f"#{uni['rank']}: {uni['name']}" for uni in store.top(5)])
         return {
             "status": "success",
+            "query_type": "fallback",
             "answer": f"Top 5 QS Rankings:\n{top_5}"
         }
 
@@ -0,0 +1,320 @@
+import os
+import json
+import time
+import uuid
+import zlib
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---------- Session store configuration ----------
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "sqlite").lower()  # sqlite | memory
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", ".cache/sessions.sqlite")
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1000"))       # sessions kept hot in memory
+SESSION_HISTORY_LIMIT = int(os.getenv("SESSION_HISTORY_LIMIT", "50"))   # entries kept per session
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", str(24 * 3600)))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "600"))
+# last_seen is written back at most this often for sessions that are only read
+SESSION_TOUCH_INTERVAL = 60.0
+
+
+def _pack(response: Any) -> Tuple[str, bytes]:
+    """Canonical JSON -> (sha256 digest, zlib blob). Identical responses share one blob."""
+    raw = json.dumps(response, sort_keys=True, default=str, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest(), zlib.compress(raw, 6)
+
+
+def _unpack(blob: Optional[bytes]) -> Any:
+    return json.loads(zlib.decompress(blob)) if blob is not None else None
+
+
+class _Session:
+    __slots__ = ("created_at", "last_seen", "persisted_seen", "history", "context")
+
+    def __init__(self, created_at: float, last_seen: float, history_limit: int, entries=()):
+        self.created_at = created_at
+        self.last_seen = last_seen
+        self.persisted_seen = last_seen
+        # Entries hold the prompt, metadata and the digest of the response blob
+        self.history = deque(entries, maxlen=history_limit)
+        self.context = None
+
+
+class SessionStore:
+    """
+    Conversation history per session.
+
+    Hot sessions live in an in-memory LRU of at most `max_sessions`; with a
+    `path` every session is also written to SQLite, so history survives
+    restarts and evicted sessions are reloaded on their next request. Each
+    session keeps its last `history_limit` entries, sessions idle for longer
+    than `idle_ttl` are dropped, and responses are stored once per distinct
+    payload as zlib-compressed, content-addressed blobs.
+    """
+
+    def __init__(self, path: str = "", max_sessions: int = SESSION_CACHE_SIZE,
+                 history_limit: int = SESSION_HISTORY_LIMIT, idle_ttl: float = SESSION_IDLE_TTL):
+        self.path = path
+        self.max_sessions = max(1, max_sessions)
+        self.history_limit = max(1, history_limit)
+        self.idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        # Memory-only mode: digest -> [blob, reference count]
+        self._blobs: Dict[str, list] = {}
+        self._blob_bytes = 0
+        self._expired = 0
+        self._evicted = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, created_at REAL, last_seen REAL);
+                CREATE TABLE IF NOT EXISTS history (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, timestamp TEXT,
+                    prompt TEXT, digest TEXT, metadata TEXT
+                );
+                CREATE INDEX IF NOT EXISTS history_by_session ON history (session_id, seq);
+                CREATE INDEX IF NOT EXISTS history_by_digest ON history (digest);
+                CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, data BLOB);
+                """
+            )
+            self._db.commit()
+
+    # ---------- Public API ----------
+    def create(self) -> str:
+        session_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._remember(session_id, _Session(now, now, self.history_limit))
+            if self._db is not None:
+                self._db.execute("INSERT INTO sessions (id, created_at, last_seen) VALUES (?, ?, ?)",
+                                 (session_id, now, now))
+                self._db.commit()
+        return session_id
+
+    def exists(self, session_id: str) -> bool:
+        """True for a live session; also counts as activity for idle expiry."""
+        now = time.time()
+        with self._lock:
+            session = self._load(session_id, now)
+            if session is None:
+                return False
+            session.last_seen = now
+            if self._db is not None and now - session.persisted_seen > SESSION_TOUCH_INTERVAL:
+                self._db.execute("UPDATE sessions SET last_seen = ? WHERE id = ?", (now, session_id))
+                self._db.commit()
+                session.persisted_seen = now
+            return True
+
+    def append(self, session_id: str, prompt: str, response: Any, metadata: Optional[Dict] = None,
+               timestamp: Optional[str] = None) -> bool:
+        """Record one exchange; the oldest entry is dropped beyond `history_limit`."""
+        digest, blob = _pack(response)
+        now = time.time()
+        timestamp = timestamp or time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(now))
+        entry = {"timestamp": timestamp, "prompt": prompt, "digest": digest, "workflow_metadata": metadata}
+        with self._lock:
+            session = self._load(session_id, now)
+            if session is None:
+                return False
+            if self._db is None:
+                if len(session.history) == session.history.maxlen:
+                    self._release(session.history[0]["digest"])
+                self._retain(digest, blob)
+            session.history.append(entry)
+            session.last_seen = session.persisted_seen = now
+
+            if self._db is not None:
+                self._db.execute("INSERT OR IGNORE INTO blobs (digest, data) VALUES (?, ?)", (digest, blob))
+                self._db.execute(
+                    "INSERT INTO history (session_id, timestamp, prompt, digest, metadata) VALUES (?, ?, ?, ?, ?)",
+                    (session_id, timestamp, prompt, digest, json.dumps(metadata, default=str))
+                )
+                self._db.execute(
+                    "DELETE FROM history WHERE session_id = ? AND seq NOT IN "
+                    "(SELECT seq FROM history WHERE session_id = ? ORDER BY seq DESC LIMIT ?)",
+                    (session_id, session_id, self.history_limit)
+                )
+                self._db.execute("UPDATE sessions SET last_seen = ? WHERE id = ?", (now, session_id))
+                self._db.commit()
+        return True
+
+    def history(self, session_id: str, limit: Optional[int] = None) -> Optional[List[Dict]]:
+        """Entries oldest first with responses decompressed; None for an unknown session."""
+        with self._lock:
+            session = self._load(session_id, time.time())
+            if session is None:
+                return None
+            entries = list(session.history)[-limit:] if limit else list(session.history)
+            blobs = self._fetch_blobs({e["digest"] for e in entries})
+        return [
+            {
+                "timestamp": e["timestamp"],
+                "prompt": e["prompt"],
+                "response": _unpack(blobs.get(e["digest"])),
+                "workflow_metadata": e["workflow_metadata"],
+            }
+            for e in entries
+        ]
+
+    def context(self, session_id: str, factory: Callable[[], Any] = deque) -> Optional[Any]:
+        """
+        In-process working state for a session (e.g. the gatekeeper's turn
+        buffer), created with `factory` on first use. It is not persisted, so
+        it starts over after the session is evicted or the process restarts.
+        """
+        with self._lock:
+            session = self._load(session_id, time.time())
+            if session is None:
+                return None
+            if session.context is None:
+                session.context = factory()
+            return session.context
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            known = self._load(session_id, time.time()) is not None
+            if known:
+                self._drop(session_id, expired=False)
+            return known
+
+    def sweep(self) -> int:
+        """Drop every session idle for longer than `idle_ttl` and any blob nothing refers to."""
+        cutoff = time.time() - self.idle_ttl
+        with self._lock:
+            stale = {sid for sid, s in self._sessions.items() if s.last_seen < cutoff}
+            if self._db is not None:
+                stale.update(row[0] for row in self._db.execute(
+                    "SELECT id FROM sessions WHERE last_seen < ?", (cutoff,)
+                ))
+            for session_id in stale:
+                self._drop(session_id, commit=False)
+            if self._db is not None:
+                self._db.execute("DELETE FROM blobs WHERE digest NOT IN (SELECT digest FROM history)")
+                self._db.commit()
+        if stale:
+            print(f"🧹 Expired {len(stale)} idle sessions")
+        return len(stale)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = {
+                "backend": "sqlite" if self._db is not None else "memory",
+                "cached_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "history_limit": self.history_limit,
+                "idle_ttl": self.idle_ttl,
+                "expired": self._expired,
+                "evicted": self._evicted,
+            }
+            if self._db is not None:
+                stats["sessions"] = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+                stats["entries"] = self._db.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+                blobs, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()
+                stats.update({"blobs": blobs, "blob_bytes": size})
+            else:
+                stats["sessions"] = len(self._sessions)
+                stats["entries"] = sum(len(s.history) for s in self._sessions.values())
+                stats.update({"blobs": len(self._blobs), "blob_bytes": self._blob_bytes})
+            return stats
+
+    # ---------- Internals (callers hold self._lock) ----------
+    def _load(self, session_id: str, now: float) -> Optional[_Session]:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+        elif self._db is not None:
+            row = self._db.execute("SELECT created_at, last_seen FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is not None:
+                rows = self._db.execute(
+                    "SELECT timestamp, prompt, digest, metadata FROM history WHERE session_id = ? "
+                    "ORDER BY seq DESC LIMIT ?", (session_id, self.history_limit)
+                ).fetchall()
+                entries = [
+                    {"timestamp": ts, "prompt": prompt, "digest": digest, "workflow_metadata": json.loads(meta)}
+                    for ts, prompt, digest, meta in reversed(rows)
+                ]
+                session = _Session(row[0], row[1], self.history_limit, entries)
+                self._remember(session_id, session)
+        if session is not None and now - session.last_seen > self.idle_ttl:
+            self._drop(session_id)
+            return None
+        return session
+
+    def _remember(self, session_id: str, session: _Session):
+        self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            evicted_id, evicted = self._sessions.popitem(last=False)
+            # In SQLite mode the session stays on disk and is reloaded on its next request
+            self._evicted += 1
+            if self._db is None:
+                # Nothing else holds this session, so eviction ends it
+                for entry in evicted.history:
+                    self._release(entry["digest"])
+            elif evicted.last_seen > evicted.persisted_seen:
+                self._db.execute("UPDATE sessions SET last_seen = ? WHERE id = ?", (evicted.last_seen, evicted_id))
+                self._db.commit()
+
+    def _drop(self, session_id: str, commit: bool = True, expired: bool = True):
+        session = self._sessions.pop(session_id, None)
+        if self._db is None:
+            if session is not None:
+                for entry in session.history:
+                    self._release(entry["digest"])
+        else:
+            self._db.execute("DELETE FROM history WHERE session_id = ?", (session_id,))
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            if commit:
+                self._db.commit()
+        if expired:
+            self._expired += 1
+
+    def _retain(self, digest: str, blob: bytes):
+        slot = self._blobs.get(digest)
+        if slot is None:
+            self._blobs[digest] = [blob, 1]
+            self._blob_bytes += len(blob)
+        else:
+            slot[1] += 1
+
+    def _release(self, digest: str):
+        slot = self._blobs.get(digest)
+        if slot is None:
+            return
+        slot[1] -= 1
+        if slot[1] <= 0:
+            del self._blobs[digest]
+            self._blob_bytes -= len(slot[0])
+
+    def _fetch_blobs(self, digests) -> Dict[str, bytes]:
+        if self._db is None:
+            return {d: self._blobs[d][0] for d in digests if d in self._blobs}
+        digests = list(digests)
+        if not digests:
+            return {}
+        placeholders = ",".join("?" * len(digests))
+        rows = self._db.execute(f"SELECT digest, data FROM blobs WHERE digest IN ({placeholders})", digests)
+        return dict(rows.fetchall())
+
+
+async def run_sweeper(store: "SessionStore", interval: float = SESSION_SWEEP_INTERVAL):
+    """Background loop for the FastAPI app: expire idle sessions every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(store.sweep)
+        except Exception as e:
+            print(f"⚠️ Session sweep failed: {e}")
+
+
+session_store = SessionStore(path=SESSION_STORE_PATH if SESSION_STORE_BACKEND == "sqlite" else "")